@@ -4,34 +4,25 @@ set -e
 
 echo "Entrypoint script started..."
 
-if [ "$1" = "/app/cron.sh" ]; then
-    echo "Running in Cron mode (staying as root to configure daemon)..."
-else
-    echo "Entrypoint script started as user: $(whoami)"
-    echo "Taking ownership of volume directories..."
-    chown -R appuser:appuser /app/media
-    chown -R appuser:appuser /app/staticfiles
-fi
+echo "Entrypoint script started as user: $(whoami)"
+echo "Taking ownership of volume directories..."
+chown -R appuser:appuser /app/media
+chown -R appuser:appuser /app/staticfiles
+chown -R appuser:appuser /app/theme/static
 
 echo "Setting mask..."
 umask 0002
 
-if [ "$1" != "/app/cron.sh" ]; then
-    echo "Applying database migrations..."
-    gosu appuser python manage.py migrate --noinput
-
-    echo "Wiping old static files from volume..."
-    gosu appuser find /app/staticfiles/ -mindepth 1 -delete
-
-    echo "Compiling tailwind..."
-    python manage.py tailwind build
-
-    echo "Collecting static files for production..."
-    gosu appuser python manage.py collectstatic --noinput --clear
-    
-    echo "Starting application server as user: appuser..."
-    exec gosu appuser "$@"
+# Migrates and rebuilds tailwind/static files only when their inputs changed
+# (use FORCE_STATIC_REBUILD=True to rebuild anyway)
+echo "Preparing migrations and static files..."
+if [ "$SKIP_FAST_BOOT" = "True" ]; then
+    echo "Skipped (SKIP_FAST_BOOT=True)."
+elif [ "$FORCE_STATIC_REBUILD" = "True" ]; then
+    gosu appuser python manage.py fast_boot --force
 else
-    echo "Starting Cron..."
-    exec "$@"
-fi
\ No newline at end of file
+    gosu appuser python manage.py fast_boot
+fi
+
+echo "Starting application as user: appuser..."
+exec gosu appuser "$@"
\ No newline at end of file
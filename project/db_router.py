@@ -0,0 +1,74 @@
+# project/db_router.py
+
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_pin_primary'
+
+# True only while a view decorated with @use_replica is running
+_replica_allowed = ContextVar('replica_allowed', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to the replica only inside views marked with @use_replica.
+    Everything else (writes, transactions, migrations, admin, auth) stays on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_allowed.get() and replica_configured():
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def use_replica(view_func):
+    """
+    Allows the ORM reads of a read-only view to go to the replica.
+    Clients that wrote recently (see ReplicaPinningMiddleware) keep reading from
+    the primary so they always see their own changes.
+    """
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or PIN_COOKIE in request.COOKIES:
+            return view_func(request, *args, **kwargs)
+
+        token = _replica_allowed.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_allowed.reset(token)
+    return _wrapped
+
+
+class ReplicaPinningMiddleware:
+    """Pins a client to the primary for a few seconds after any write request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if replica_configured() and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'DB_REPLICA_PIN_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
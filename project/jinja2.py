@@ -0,0 +1,19 @@
+# project/jinja2.py
+
+from django.template.defaultfilters import date
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment # pyright: ignore[reportMissingImports]
+
+
+def environment(**options):
+    """Jinja2 environment for the optional fast render path (STARTPAGE_JINJA2)."""
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': reverse,
+    })
+    # Same output as Django's |date, which converts to the current time zone first
+    env.filters['date'] = lambda value, arg=None: date(template_localtime(value), arg)
+    return env
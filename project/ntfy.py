@@ -1,7 +1,6 @@
 # project/ntfy.py
 
 import os
-import requests # pyright: ignore[reportMissingModuleSource]
 from django.apps import apps
 from .settings import NTFY_TOPIC, NTFY_BASE_URL
 
@@ -21,6 +20,9 @@ def send_notification(message, title="Django Notification", priority="default",
         print("NTFY: Configuration missing (NTFY_BASE_URL or NTFY_TOPIC).")
         return
 
+    # Import inside function, requests is only needed when a notification is actually sent
+    import requests # pyright: ignore[reportMissingModuleSource]
+
     url = f"{NTFY_BASE_URL.rstrip('/')}/{NTFY_TOPIC}"
     
     headers = {
@@ -39,6 +39,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'project.db_router.ReplicaPinningMiddleware',
     
     "allauth.account.middleware.AccountMiddleware",
 ]
@@ -57,6 +58,50 @@ SOCIALACCOUNT_PROVIDERS = {
     }
 }
 
+# INFO: Rate limiting of the editor API (startpages/ratelimit.py)
+# (per user, per client IP) token buckets, same "count/period" format as ACCOUNT_RATE_LIMITS
+RATE_LIMITS_ENABLED = os.environ.get('RATE_LIMITS_ENABLED', 'True') == 'True'
+# Proxies in front of Django that append to X-Forwarded-For: the bundled nginx, plus one per proxy in front of it
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '1'))
+RATE_LIMITS = {
+    'default': ('60/m', '240/m'),
+    'add_link': ('30/m', '120/m'),
+    'add_section': ('20/m', '80/m'),
+    'save_item_details': ('60/m', '240/m'),
+    'delete_item': ('30/m', '120/m'),
+    # One request carries up to 100 queued edits
+    'batch': ('30/m', '120/m'),
+    'reorder': ('120/m', '480/m'),
+    'update_theme': ('10/m', '40/m'),
+}
+
+# INFO: Public share links (startpages/sharing.py)
+# Seconds nginx / a CDN may serve a shared page before revalidating it with its ETag
+SHARE_CACHE_SECONDS = int(os.environ.get('SHARE_CACHE_SECONDS', '300'))
+# Comma separated URLs that are requested (SHARE_PURGE_METHOD) when a shared page changes, "{path}" is the share path
+SHARE_PURGE_URLS = [url.strip() for url in os.environ.get('SHARE_PURGE_URLS', '').split(',') if url.strip()]
+SHARE_PURGE_METHOD = os.environ.get('SHARE_PURGE_METHOD', 'PURGE')
+
+# INFO: Periodic jobs, run by `python manage.py run_scheduler` (startpages/scheduler.py)
+# schedule: "minute hour day month weekday" in TIME_ZONE, jitter: random delay in seconds,
+# timeout: seconds after which the overlap lock of a crashed run expires
+DAILY_MAIL_TIME = os.environ.get('DAILY_MAIL_TIME', '00:00')
+_mail_hour, _mail_minute = (int(part) for part in DAILY_MAIL_TIME.split(':'))
+SCHEDULED_JOBS = {
+    'send_daily_mail': {'schedule': f'{_mail_minute} {_mail_hour} * * *', 'jitter': 30, 'timeout': 600},
+    'rollup_stats': {'schedule': '5 0 * * *', 'jitter': 60, 'timeout': 600},
+    'prune_changelog': {'schedule': '0 3 * * *', 'jitter': 300, 'timeout': 3600},
+    'rebalance_order': {'schedule': '15 3 * * *', 'jitter': 300, 'timeout': 3600},
+    'check_links': {'schedule': '30 3 * * *', 'jitter': 300, 'timeout': 3 * 3600},
+    'cleanup': {'schedule': '0 4 * * *', 'jitter': 300, 'timeout': 3600},
+}
+
+# INFO: Maximum milliseconds django.setup() may take, checked by `python manage.py startup_profile`
+STARTUP_BUDGET_MS = int(os.environ.get('STARTUP_BUDGET_MS', '1500'))
+
+# INFO: Cache family values (startpages/cache.py) of at least this many pickled bytes are stored zlib-compressed
+CACHE_COMPRESS_MIN_BYTES = int(os.environ.get('CACHE_COMPRESS_MIN_BYTES', '1024'))
+
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID', '')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET', '')
 
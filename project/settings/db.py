@@ -12,6 +12,18 @@ DB_PORT = os.environ.get('DB_PORT')
 REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
 REDIS_PORT = os.environ.get('REDIS_PORT', '6379')
 
+# Persistent connections: reuse a connection for this many seconds instead of opening one per request.
+# Health checks make sure a connection that went stale while idle is replaced before it is used.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+
+# Optional read replica, used for read-only views (see project/db_router.py)
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+DB_REPLICA_PORT = os.environ.get('DB_REPLICA_PORT', DB_PORT)
+DB_REPLICA_NAME = os.environ.get('DB_REPLICA_NAME')
+
+# Seconds a client keeps reading from the primary after a write, to hide replication lag
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '5'))
+
 if RUNNING_IN_DOCKER:
     # Postgress
     DATABASES = {
@@ -22,16 +34,37 @@ if RUNNING_IN_DOCKER:
             'PASSWORD': DB_PASSWORD,
             'HOST': DB_HOST,
             'PORT': DB_PORT,
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
+    if DB_REPLICA_HOST:
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': DB_REPLICA_NAME or DB_NAME,
+            'HOST': DB_REPLICA_HOST,
+            'PORT': DB_REPLICA_PORT,
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     # SQLite
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
+    if DB_REPLICA_NAME:
+        # Second SQLite file to exercise the router locally (copy db.sqlite3 to "replicate")
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': BASE_DIR / DB_REPLICA_NAME,
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['project.db_router.PrimaryReplicaRouter']
 
 # INFO: Cache
 if RUNNING_IN_DOCKER:
@@ -2,10 +2,21 @@
 
 import os
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# Mail is queued in the database and delivered by `python manage.py send_queued_mail` (the mailer service),
+# so signups and password resets never wait for the SMTP server. EMAIL_QUEUE=False sends synchronously.
+EMAIL_QUEUE = os.environ.get('EMAIL_QUEUE', 'True') == 'True'
+EMAIL_QUEUE_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = 'startpages.mail.QueuedEmailBackend' if EMAIL_QUEUE else EMAIL_QUEUE_DELIVERY_BACKEND
+EMAIL_QUEUE_RATE_PER_MINUTE = int(os.environ.get('EMAIL_QUEUE_RATE_PER_MINUTE', '60'))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get('EMAIL_QUEUE_MAX_ATTEMPTS', '5'))
+EMAIL_QUEUE_POLL_SECONDS = float(os.environ.get('EMAIL_QUEUE_POLL_SECONDS', '2'))
+
+# Point these at a local stand-in to test delivery without Gmail, e.g. the mailpit service
+# (`docker compose --profile mail up`, EMAIL_HOST=mailpit EMAIL_PORT=1025 EMAIL_USE_TLS=False, inbox on port 8025)
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_TIMEOUT = 30
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
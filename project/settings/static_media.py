@@ -31,4 +31,26 @@ TEMPLATES = [
             ],
         },
     },
-]
\ No newline at end of file
+]
+
+# Optional Jinja2 render path for the section and link cards of the startpage (startpages/rendering.py).
+# Only these hot templates use it, everything else stays on the Django engine.
+STARTPAGE_JINJA2 = os.environ.get('STARTPAGE_JINJA2', 'False') == 'True'
+JINJA2_TEMPLATES = {
+    'BACKEND': 'django.template.backends.jinja2.Jinja2',
+    'NAME': 'jinja2',
+    'DIRS': [BASE_DIR / 'templates' / 'jinja2'],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'environment': 'project.jinja2.environment',
+        'autoescape': True,
+        'auto_reload': DEBUG,
+    },
+}
+if STARTPAGE_JINJA2:
+    TEMPLATES.append(JINJA2_TEMPLATES)
+
+# Stream the startpage: head, search bar and preview row first, then the sections grid in chunks
+# of this many sections (python manage.py benchmark_streaming compares both modes)
+STARTPAGE_STREAMING = os.environ.get('STARTPAGE_STREAMING', 'False') == 'True'
+STARTPAGE_STREAM_CHUNK_SECTIONS = int(os.environ.get('STARTPAGE_STREAM_CHUNK_SECTIONS', '10'))
\ No newline at end of file
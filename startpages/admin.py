@@ -1,5 +1,94 @@
-from django.contrib import admin
-from .models import GlobalSettings, StartPage, Section, Link, ColorScheme, Profile
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .cache import family_stats
+from .models import GlobalSettings, StartPage, Section, Link, ColorScheme, Profile, DailyStats, QueuedEmail
+from .services import SectionService, StartPageService, StatsService
+
+class EstimatedCountPaginator(Paginator):
+    """
+    On Postgres, unfiltered changelists use the planner's row estimate instead of COUNT(*),
+    which has to scan the whole table. Small tables and filtered lists still count exactly.
+    """
+    ESTIMATE_ABOVE = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > self.ESTIMATE_ABOVE:
+                return row[0]
+        return super().count
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False # Skip the second, unfiltered COUNT(*)
+    list_per_page = 50
+
+    def get_actions(self, request):
+        # The default delete action loads every related object to build its confirmation page
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+class TargetPageForm(forms.Form):
+    page_id = forms.IntegerField(label="Target page ID")
+
+    def clean_page_id(self):
+        try:
+            return StartPage.objects.get(id=self.cleaned_data['page_id'])
+        except StartPage.DoesNotExist:
+            raise forms.ValidationError("No page with this ID.")
+
+def confirm_action(modeladmin, request, queryset, action, title, form=None):
+    """
+    Renders the intermediate confirmation page shared by the bulk actions (counts only, no object list).
+    It posts back the selection the changelist sent: the checked ids and select_across. With "select all"
+    the admin then derives the queryset again from the changelist filters in the URL, so the page never
+    holds one input per selected row.
+    """
+    return render(request, 'admin/startpages/bulk_action_confirmation.html', {
+        **modeladmin.admin_site.each_context(request),
+        'title': title,
+        'opts': modeladmin.model._meta,
+        'action': action,
+        'ids': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+        'select_across': request.POST.get('select_across', '0'),
+        'count': queryset.count(),
+        'form': form,
+    })
+
+def summarize_deleted_pages(request, objs, pages):
+    """
+    Stands in for ModelAdmin.get_deleted_objects on the single-object delete page: the default walks
+    the ORM collector over every section and link, here the page tree is summarized with two COUNTs.
+    """
+    sections = Section.objects.filter(page__in=pages)
+    model_count = {
+        StartPage._meta.verbose_name_plural: pages.count(),
+        Section._meta.verbose_name_plural: sections.count(),
+        Link._meta.verbose_name_plural: Link.objects.filter(section__in=sections).count(),
+    }
+    summary = [f"{count} {name}" for name, count in model_count.items() if count]
+    deleted_objects = []
+    for obj in objs:
+        deleted_objects += [str(obj), summary]
+    perms_needed = {
+        model._meta.verbose_name for model in (StartPage, Section, Link)
+        if not request.user.has_perm(f"{model._meta.app_label}.delete_{model._meta.model_name}")
+    }
+    return deleted_objects, model_count, perms_needed, []
 
 class LinkInline(admin.TabularInline):
     model = Link
@@ -7,10 +96,54 @@ class LinkInline(admin.TabularInline):
     fields = ('name', 'url', 'order')
     sortable_field_name = "order"
 
-class SectionAdmin(admin.ModelAdmin):
+class SectionAdmin(LargeTableAdmin):
     inlines = [LinkInline]
-    list_display = ('name', 'page', 'order')
+    list_display = ('name', 'page', 'order', 'link_count')
     list_editable = ('order',)
+    list_select_related = ('page',)
+    autocomplete_fields = ('page',)
+    search_fields = ('name', 'page__title', 'page__user__username')
+    actions = ['move_sections', 'clone_sections', 'delete_sections']
+
+    @admin.action(description="Move selected sections to another page")
+    def move_sections(self, request, queryset):
+        if 'apply' in request.POST:
+            form = TargetPageForm(request.POST)
+            if form.is_valid():
+                moved = SectionService.move_sections(list(queryset.values_list('id', flat=True)), form.cleaned_data['page_id'])
+                self.message_user(request, f"Moved {moved} sections.", messages.SUCCESS)
+                return None
+        else:
+            form = TargetPageForm()
+        return confirm_action(self, request, queryset, 'move_sections', "Move sections", form)
+
+    @admin.action(description="Clone selected sections (with links)")
+    def clone_sections(self, request, queryset):
+        cloned = SectionService.clone_sections(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f"Cloned {cloned} sections.", messages.SUCCESS)
+
+    @admin.action(description="Delete selected sections (with links)", permissions=['delete'])
+    def delete_sections(self, request, queryset):
+        if 'apply' in request.POST:
+            deleted = SectionService.delete_sections(list(queryset.values_list('id', flat=True)))
+            self.message_user(request, f"Deleted {deleted} sections.", messages.SUCCESS)
+            return None
+        return confirm_action(self, request, queryset, 'delete_sections', "Delete sections and all their links")
+
+class LinkAdmin(LargeTableAdmin):
+    list_display = ('name', 'url', 'section')
+    list_select_related = ('section__page',)
+    autocomplete_fields = ('section',)
+    search_fields = ('name', 'url')
+    actions = ['delete_links']
+
+    @admin.action(description="Delete selected links", permissions=['delete'])
+    def delete_links(self, request, queryset):
+        if 'apply' in request.POST:
+            deleted = SectionService.delete_links(list(queryset.values_list('id', flat=True)))
+            self.message_user(request, f"Deleted {deleted} links.", messages.SUCCESS)
+            return None
+        return confirm_action(self, request, queryset, 'delete_links', "Delete links")
 
 class SectionInline(admin.TabularInline):
     model = Section
@@ -18,11 +151,34 @@ class SectionInline(admin.TabularInline):
     show_change_link = True
     fields = ('name', 'order')
 
-class StartPageAdmin(admin.ModelAdmin):
+class StartPageAdmin(LargeTableAdmin):
     inlines = [SectionInline]
-    list_display = ('user', 'title', 'slug')
-    list_filter = ('user',)
+    list_display = ('user', 'title', 'slug', 'is_default')
+    list_select_related = ('user',)
+    list_filter = ('is_default',)
+    autocomplete_fields = ('user',)
     search_fields = ('user__username', 'title')
+    actions = ['duplicate_pages', 'delete_pages']
+
+    def delete_model(self, request, obj):
+        SectionService.delete_pages([obj.id])
+
+    def get_deleted_objects(self, objs, request):
+        return summarize_deleted_pages(request, objs, StartPage.objects.filter(id__in=[obj.id for obj in objs]))
+
+    @admin.action(description="Duplicate selected pages (for their owners)", permissions=['add'])
+    def duplicate_pages(self, request, queryset):
+        for page in queryset.select_related('user'):
+            StartPageService.clone_page(page, page.user, title=f"{page.title} (copy)")
+        self.message_user(request, f"Duplicated {queryset.count()} pages.", messages.SUCCESS)
+
+    @admin.action(description="Delete selected pages (with sections and links)", permissions=['delete'])
+    def delete_pages(self, request, queryset):
+        if 'apply' in request.POST:
+            deleted = SectionService.delete_pages(list(queryset.values_list('id', flat=True)))
+            self.message_user(request, f"Deleted {deleted} pages.", messages.SUCCESS)
+            return None
+        return confirm_action(self, request, queryset, 'delete_pages', "Delete pages with all their sections and links")
 
 class ColorSchemeInline(admin.StackedInline):
     model = ColorScheme
@@ -32,15 +188,112 @@ class ColorSchemeInline(admin.StackedInline):
 
 class GlobalSettingsAdmin(admin.ModelAdmin):
     inlines = [ColorSchemeInline]
+    autocomplete_fields = ('SIGNUP_TEMPLATE_PAGE',)
     
     def has_add_permission(self, request):
         if self.model.objects.exists():
             return False
         return super().has_add_permission(request)
 
+class ProfileAdmin(LargeTableAdmin):
+    list_display = ('user', 'theme')
+    list_select_related = ('user', 'theme')
+    autocomplete_fields = ('user',)
+    search_fields = ('user__username', 'user__email')
+
+class AccountAdmin(UserAdmin):
+    actions = ['delete_accounts']
+
+    def delete_model(self, request, obj):
+        SectionService.delete_users([obj.id])
+
+    def get_deleted_objects(self, objs, request):
+        return summarize_deleted_pages(request, objs, StartPage.objects.filter(user__in=[obj.id for obj in objs]))
+
+    def get_actions(self, request):
+        # Same reason as LargeTableAdmin: the default action collects every page, section and link
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description="Delete selected accounts (with all their pages)", permissions=['delete'])
+    def delete_accounts(self, request, queryset):
+        if 'apply' in request.POST:
+            deleted = SectionService.delete_users(list(queryset.values_list('id', flat=True)))
+            self.message_user(request, f"Deleted {deleted} accounts.", messages.SUCCESS)
+            return None
+        return confirm_action(self, request, queryset, 'delete_accounts', "Delete accounts with all their pages")
+
+class DailyStatsAdmin(admin.ModelAdmin):
+    """Reporting dashboard, reads only the rollup table (see StatsService)."""
+    change_list_template = 'admin/startpages/dailystats/change_list.html'
+    list_display = ('date', 'new_users', 'active_users', 'edits', 'pages_created', 'sections_created', 'links_created')
+    date_hierarchy = 'date'
+    list_per_page = 31
+    actions = ['recompute']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Recompute selected days")
+    def recompute(self, request, queryset):
+        first_complete_day = StatsService.first_complete_day()
+        days = list(queryset.values_list('date', flat=True))
+        recomputed = [day for day in days if StatsService.rollup_day(day, first_complete_day) is not None]
+        if len(recomputed) < len(days):
+            self.message_user(request, f"Skipped {len(days) - len(recomputed)} days before {first_complete_day}: their change log has been pruned, the stored rows were kept.", messages.WARNING)
+        self.message_user(request, f"Recomputed {len(recomputed)} days.", messages.SUCCESS)
+
+    def changelist_view(self, request, extra_context=None):
+        # Make sure yesterday is there before showing the dashboard
+        StatsService.rollup_pending()
+        response = super().changelist_view(request, extra_context)
+        try:
+            queryset = response.context_data['cl'].queryset
+        except (AttributeError, KeyError):
+            return response
+
+        fields = ['new_users', 'edits', 'pages_created', 'sections_created', 'links_created']
+        response.context_data['summary'] = queryset.aggregate(
+            days=models.Count('id'),
+            peak_active_users=models.Max('active_users'),
+            **{field: models.Sum(field) for field in fields},
+        )
+        response.context_data['latest'] = queryset.first()
+        response.context_data['cache_stats'] = sorted(family_stats().items())
+        return response
+
+class QueuedEmailAdmin(admin.ModelAdmin):
+    """Outgoing mail queue (see startpages/mail.py), read-only apart from retrying."""
+    list_display = ('subject', 'recipient_list', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    exclude = ('message',)
+    readonly_fields = ('from_email', 'recipients', 'subject', 'status', 'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at')
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="Recipients")
+    def recipient_list(self, obj):
+        return ', '.join(obj.recipients)
+
+    @admin.action(description="Send selected messages again")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=QueuedEmail.SENT).update(status=QueuedEmail.PENDING, attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"Queued {count} message(s) again.", messages.SUCCESS)
+
+admin.site.unregister(User)
+admin.site.register(User, AccountAdmin)
 admin.site.register(GlobalSettings, GlobalSettingsAdmin)
 admin.site.register(StartPage, StartPageAdmin)
 admin.site.register(Section, SectionAdmin)
-admin.site.register(Link)
+admin.site.register(Link, LinkAdmin)
 admin.site.register(ColorScheme)
-admin.site.register(Profile)
\ No newline at end of file
+admin.site.register(Profile, ProfileAdmin)
+admin.site.register(DailyStats, DailyStatsAdmin)
+admin.site.register(QueuedEmail, QueuedEmailAdmin)
\ No newline at end of file
@@ -1,69 +1,126 @@
 import json
-from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, reverse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
-from django.db import models
-from .models import Section, Link, StartPage, ColorScheme
+from django.db import models, transaction, connections
+from .models import Section, Link, StartPage, ColorScheme, ChangeLogEntry, ORDER_GAP, MAX_LINKS
+from .services import OrderService, ChangeLogService, SectionService
+from .events import publish_from_request, event_stream
+from .ratelimit import rate_limit
+from .batch import run_batch, BatchError
+from project.db_router import use_replica
 
 @login_required
 @require_POST
+@rate_limit('reorder')
 def update_section_order(request):
     data = json.loads(request.body)
     section_ids = data.get('ids', [])
     
+    updated_ids = []
     for index, sec_id in enumerate(section_ids):
-        Section.objects.filter(id=sec_id, page__user=request.user).update(order=index)
-        
+        if Section.objects.filter(id=sec_id, page__user=request.user).update(order=(index + 1) * ORDER_GAP):
+            updated_ids.append(sec_id)
+
+    ChangeLogEntry.record(request.user, ChangeLogEntry.SECTION, updated_ids, ChangeLogEntry.UPDATE)
+
+    publish_from_request(request, 'sections_reordered', {'ids': section_ids})
     return JsonResponse({'status': 'success'})
 
 @login_required
 @require_POST
+@rate_limit('reorder')
 def update_link_order(request):
     data = json.loads(request.body)
     section_id = data.get('section_id')
     link_ids = data.get('link_ids', [])
     
-    if len(link_ids) > 10:
-        return JsonResponse({
-            'status': 'error', 
-            'message': 'Section cannot contain more than 10 links.'
-        }, status=400)
+    limit_error = JsonResponse({
+        'status': 'error', 
+        'message': f'Section cannot contain more than {MAX_LINKS} links.'
+    }, status=400)
+    if len(link_ids) > MAX_LINKS:
+        return limit_error
     
-    target_section = get_object_or_404(Section, id=section_id, page__user=request.user)
-    
-    for index, link_id in enumerate(link_ids):
-        Link.objects.filter(id=link_id, section__page__user=request.user).update(
-            order=index, 
-            section=target_section
-        )
-        
+    with transaction.atomic():
+        # The section's row lock makes concurrent reorders and adds into it wait, so the count below stays true
+        target_section = get_object_or_404(Section.objects.select_for_update(of=('self',)), id=section_id, page__user=request.user)
+
+        # Links may arrive from other sections, whose counts change as well
+        source_ids = set(Link.objects.filter(id__in=link_ids, section__page__user=request.user).values_list('section_id', flat=True))
+
+        # The limit applies to the whole section, including links that are not in the submitted list
+        if source_ids - {target_section.id}:
+            staying = Link.objects.filter(section=target_section).exclude(id__in=link_ids).count()
+            if staying + Link.objects.filter(id__in=link_ids, section__page__user=request.user).count() > MAX_LINKS:
+                return limit_error
+
+        updated_ids = []
+        for index, link_id in enumerate(link_ids):
+            if Link.objects.filter(id=link_id, section__page__user=request.user).update(
+                order=(index + 1) * ORDER_GAP,
+                section=target_section
+            ):
+                updated_ids.append(link_id)
+
+        ChangeLogEntry.record(request.user, ChangeLogEntry.LINK, updated_ids, ChangeLogEntry.UPDATE)
+
+        if source_ids - {target_section.id}:
+            Section.refresh_link_counts(source_ids | {target_section.id})
+
+    publish_from_request(request, 'links_reordered', {'section_id': target_section.id, 'ids': link_ids})
     return JsonResponse({'status': 'success'})
 
 @login_required
-def get_item_details(request):
-    item_type = request.GET.get('type')
-    item_id = request.GET.get('id')
-    
-    data = {}
-    
-    if item_type == 'section':
-        item = get_object_or_404(Section, id=item_id, page__user=request.user)
-        data = {'id': item.id, 'name': item.name, 'type': 'section'}
-    elif item_type == 'link':
-        item = get_object_or_404(Link, id=item_id, section__page__user=request.user)
-        data = {
-            'id': item.id, 
-            'name': item.name, 
-            'url': item.url, 
-            'color': item.color,
-            'type': 'link'
-        }
-        
-    return JsonResponse(data)
+@require_POST
+@rate_limit('reorder')
+def move_item(request):
+    """Moves one section or link between two neighbours, writing only the moved row."""
+    data = json.loads(request.body)
+    item_type = data.get('type')
+    prev_id = data.get('prev_id') or None
+    next_id = data.get('next_id') or None
+
+    try:
+        with transaction.atomic():
+            if item_type == 'section':
+                item = get_object_or_404(Section, id=data.get('id'), page__user=request.user)
+                OrderService.move(item, Section.objects.filter(page_id=item.page_id), prev_id, next_id)
+                ChangeLogEntry.record(request.user, ChangeLogEntry.SECTION, item.id, ChangeLogEntry.UPDATE)
+                publish_from_request(request, 'item_moved', {'type': 'section', 'id': item.id, 'prev_id': prev_id, 'next_id': next_id})
+            elif item_type == 'link':
+                item = get_object_or_404(Link, id=data.get('id'), section__page__user=request.user)
+                # Locked, so a concurrent add or move cannot fill the section between the check and the move
+                target_section = get_object_or_404(
+                    Section.objects.select_for_update(of=('self',)), id=data.get('section_id'), page__user=request.user
+                )
+                old_section_id = item.section_id
+
+                if target_section.id != old_section_id and target_section.link_count >= MAX_LINKS:
+                    return JsonResponse({'status': 'error', 'message': f'Section cannot contain more than {MAX_LINKS} links.'}, status=400)
+
+                OrderService.move(item, Link.objects.filter(section=target_section), prev_id, next_id, section=target_section)
+
+                if target_section.id != old_section_id:
+                    Section.objects.filter(id=old_section_id, link_count__gt=0).update(link_count=models.F('link_count') - 1)
+                    Section.objects.filter(id=target_section.id).update(link_count=models.F('link_count') + 1)
+
+                ChangeLogEntry.record(request.user, ChangeLogEntry.LINK, item.id, ChangeLogEntry.UPDATE)
+                publish_from_request(request, 'item_moved', {
+                    'type': 'link', 'id': item.id, 'section_id': target_section.id, 'prev_id': prev_id, 'next_id': next_id
+                })
+            else:
+                return JsonResponse({'status': 'error', 'message': 'Invalid type'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    return JsonResponse({'status': 'success', 'order': item.order})
 
 @login_required
 @require_POST
+@rate_limit('save_item_details')
 def save_item_details(request):
     data = json.loads(request.body)
     item_type = data.get('type')
@@ -73,9 +130,14 @@ def save_item_details(request):
         item = get_object_or_404(Section, id=item_id, page__user=request.user)
         item.name = data.get('name')
         item.save()
+        ChangeLogEntry.record(request.user, ChangeLogEntry.SECTION, item.id, ChangeLogEntry.UPDATE)
+        publish_from_request(request, 'item_updated', {'type': 'section', 'id': item.id, 'name': item.name})
     elif item_type == 'link':
         item = get_object_or_404(Link, id=item_id, section__page__user=request.user)
         item.name = data.get('name')
+        if item.url != data.get('url'):
+            # The health check result belonged to the old URL
+            item.check_status = item.checked_at = item.latency_ms = None
         item.url = data.get('url')
         
         # If color is empty string or None, save as None
@@ -83,11 +145,16 @@ def save_item_details(request):
         item.color = color if color else None
             
         item.save()
+        ChangeLogEntry.record(request.user, ChangeLogEntry.LINK, item.id, ChangeLogEntry.UPDATE)
+        publish_from_request(request, 'item_updated', {
+            'type': 'link', 'id': item.id, 'name': item.name, 'url': item.url, 'color': item.color
+        })
         
     return JsonResponse({'status': 'success'})
 
 @login_required
 @require_POST
+@rate_limit('add_link')
 def add_link(request):
     data = json.loads(request.body)
     section_id = data.get('section_id')
@@ -95,34 +162,30 @@ def add_link(request):
     url = data.get('url')
     color = data.get('color') # Can be None or empty string
 
-    section = get_object_or_404(Section, id=section_id, page__user=request.user)
-    
-    if section.links.count() >= 10:
-        return JsonResponse({'status': 'error', 'message': 'Max 10 links per section allowed.'}, status=400)
-
-    max_order = section.links.order_by('-order').first()
-    new_order = (max_order.order + 1) if max_order else 0
+    # Limit check, order key and insert in one locked transaction (see OrderService.append_link)
+    try:
+        new_link = OrderService.append_link(request.user, section_id, name, url, color)
+    except Section.DoesNotExist:
+        return JsonResponse({'status': 'error', 'message': 'Section not found'}, status=404)
+    if new_link is None:
+        return JsonResponse({'status': 'error', 'message': f'Max {MAX_LINKS} links per section allowed.'}, status=400)
 
-    new_link = Link.objects.create(
-        section=section,
-        name=name,
-        url=url,
-        color=color if color else None,
-        order=new_order
-    )
+    link_data = {
+        'id': new_link.id,
+        'name': new_link.name,
+        'url': new_link.url,
+        'color': new_link.color
+    }
+    publish_from_request(request, 'link_added', {'section_id': new_link.section_id, 'link': link_data})
 
     return JsonResponse({
         'status': 'success',
-        'link': {
-            'id': new_link.id,
-            'name': new_link.name,
-            'url': new_link.url,
-            'color': new_link.color
-        }
+        'link': link_data
     })
 
 @login_required
 @require_POST
+@rate_limit('add_section')
 def add_section(request):
     data = json.loads(request.body)
     name = data.get('name')
@@ -130,51 +193,70 @@ def add_section(request):
     if not name:
         return JsonResponse({'status': 'error', 'message': 'Name is required'}, status=400)
 
-    # Find current page: Default, or first available
-    page = StartPage.objects.filter(user=request.user, is_default=True).first()
-    if not page:
-        page = StartPage.objects.filter(user=request.user).first()
-        
-    if not page:
+    # Current page (default, or first available), locked while the section is appended
+    new_section = OrderService.append_section(request.user, name)
+    if not new_section:
         return JsonResponse({'status': 'error', 'message': 'No startpage found'}, status=404)
 
-    max_order = page.sections.aggregate(models.Max('order'))['order__max']
-    new_order = (max_order + 1) if max_order is not None else 0
-
-    new_section = Section.objects.create(
-        page=page,
-        name=name,
-        order=new_order
-    )
+    section_data = {
+        'id': new_section.id,
+        'name': new_section.name
+    }
+    publish_from_request(request, 'section_added', {'page_id': new_section.page_id, 'section': section_data})
 
     return JsonResponse({
         'status': 'success',
-        'section': {
-            'id': new_section.id,
-            'name': new_section.name
-        }
+        'section': section_data
     })
 
 @login_required
 @require_POST
+@rate_limit('delete_item')
 def delete_item(request):
     data = json.loads(request.body)
     item_type = data.get('type')
     item_id = data.get('id')
     
+    # The services delete set-based and log the deletion
     if item_type == 'section':
         item = get_object_or_404(Section, id=item_id, page__user=request.user)
-        item.delete()
+        SectionService.delete_sections([item.id])
     elif item_type == 'link':
         item = get_object_or_404(Link, id=item_id, section__page__user=request.user)
-        item.delete()
+        SectionService.delete_links([item.id])
     else:
         return JsonResponse({'status': 'error', 'message': 'Invalid type'}, status=400)
-        
+
+    publish_from_request(request, 'item_deleted', {'type': item_type, 'id': int(item_id)})
     return JsonResponse({'status': 'success'})
 
 @login_required
 @require_POST
+@rate_limit('batch')
+def batch(request):
+    """
+    Applies {"ops": [...]} in order and in one transaction; each op is what the single-item
+    endpoints take plus "op" (add_section, add_link, save_item, delete_item, move_item).
+    Returns one result per op, each with its own status: ops that fail are left out and reported.
+    """
+    try:
+        ops = json.loads(request.body).get('ops')
+    except (ValueError, AttributeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON'}, status=400)
+
+    try:
+        with transaction.atomic():
+            results, events = run_batch(request.user, ops)
+    except BatchError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    for event_type, data in events:
+        publish_from_request(request, event_type, data)
+    return JsonResponse({'status': 'success', 'results': results})
+
+@login_required
+@require_POST
+@rate_limit('update_theme')
 def update_theme(request):
     data = json.loads(request.body)
     theme_id = data.get('theme_id')
@@ -186,11 +268,13 @@ def update_theme(request):
         theme = ColorScheme.objects.get(pk=theme_id)
         request.user.profile.theme = theme
         request.user.profile.save()
+        publish_from_request(request, 'theme_changed', {'is_dark': theme.is_dark, 'colors': theme.css_variables})
         return JsonResponse({'status': 'success'})
     except ColorScheme.DoesNotExist:
         return JsonResponse({'status': 'error', 'message': 'Theme not found'}, status=404)
     
 @login_required
+@use_replica
 def get_current_theme(request):
     try:
         profile = request.user.profile
@@ -210,4 +294,43 @@ def get_current_theme(request):
             }
         })
     except Exception as e:
-        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+@login_required
+@use_replica
+def list_pages(request):
+    """
+    The user's pages for the page switcher. Every page change is in the change log, so
+    the latest revision is the ETag and an unchanged list is answered with a 304.
+    """
+    etag = f'"pages-{request.user.username}-{ChangeLogService.latest_revision(request.user)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        pages = StartPage.objects.filter(user=request.user).order_by('-is_default', 'title').values('id', 'title', 'slug', 'is_default')
+        response = JsonResponse({'pages': [
+            {**page, 'url': reverse('startpages:startpage', kwargs={'username': request.user.username, 'slug': page['slug']})}
+            for page in pages
+        ]})
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@login_required
+def events(request):
+    """Server-Sent Events stream of the user's edits, used to keep other open tabs in sync."""
+    response = StreamingHttpResponse(event_stream(request.user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Tell nginx not to buffer the stream
+    # The stream never touches the database, don't hold a connection for its lifetime
+    connections.close_all()
+    return response
+
+@login_required
+def get_changes(request):
+    """Returns the sections, links and pages changed after ?since=<rev>, compacted."""
+    try:
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'since must be an integer revision'}, status=400)
+
+    return JsonResponse({'status': 'success', **ChangeLogService.changes_since(request.user, since)})
@@ -0,0 +1,225 @@
+# startpages/backup.py
+
+import gzip
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Table:
+    """One record type of the backup file. `references` maps foreign key columns to the record type they point to."""
+    type: str
+    model: str
+    fields: list
+    references: dict = field(default_factory=dict)
+    # Field identifying rows that already exist on restore: they are reused (themes) or skipped with all their data (users)
+    natural_key: str | None = None
+    reuse_existing: bool = False
+    # Values for columns that are not in the backup, as callables evaluated once per restore
+    defaults: dict = field(default_factory=dict)
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+
+def _global_settings_id():
+    return apps.get_model('startpages.GlobalSettings').load().pk
+
+
+# Dependency order: every record only references types written before it
+TABLES = [
+    Table('theme', 'startpages.ColorScheme', ['name', 'is_dark', 'css_variables', 'order'], natural_key='name', reuse_existing=True,
+          defaults={'settings_id': _global_settings_id}),
+    Table('user', 'auth.User', [
+        'username', 'email', 'password', 'first_name', 'last_name',
+        'is_active', 'is_staff', 'is_superuser', 'date_joined', 'last_login',
+    ], natural_key='username'),
+    Table('email', 'account.EmailAddress', ['user_id', 'email', 'verified', 'primary'], {'user_id': 'user'}),
+    Table('profile', 'startpages.Profile', ['user_id', 'avatar', 'theme_id'], {'user_id': 'user', 'theme_id': 'theme'}),
+    Table('page', 'startpages.StartPage', ['user_id', 'title', 'slug', 'is_default', 'share_token'], {'user_id': 'user'}),
+    Table('section', 'startpages.Section', ['page_id', 'name', 'order', 'link_count'], {'page_id': 'page'}),
+    Table('link', 'startpages.Link', [
+        'section_id', 'name', 'url', 'color', 'order', 'check_status', 'checked_at', 'latency_ms',
+    ], {'section_id': 'section'}),
+]
+
+
+def iter_rows(queryset, fields, chunk_size):
+    """
+    Keyset pagination by primary key: every chunk is an indexed range scan,
+    so memory stays constant and late chunks are as fast as early ones (unlike OFFSET).
+    """
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).order_by('pk').values('pk', *fields)[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1]['pk']
+        yield from rows
+
+
+def write_backup(path, chunk_size=5000, on_table=None):
+    """
+    Writes every table as gzip-compressed NDJSON, one {"type", "id", ...fields} object per line.
+    All tables are read in one transaction (REPEATABLE READ on Postgres, SQLite keeps its read
+    snapshot anyway), so edits made during the dump cannot leave links pointing at sections that
+    were not written.
+    """
+    connection = transaction.get_connection()
+    counts = {}
+    with transaction.atomic(), gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as out:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Has to come before the first query of the transaction
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+        out.write(json.dumps({'type': 'header', 'version': FORMAT_VERSION}) + '\n')
+        for table in TABLES:
+            count = 0
+            for row in iter_rows(table.get_model().objects.all(), table.fields, chunk_size):
+                row['type'] = table.type
+                row['id'] = row.pop('pk')
+                out.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n')
+                count += 1
+            counts[table.type] = count
+            if on_table:
+                on_table(table.type, count)
+    return counts
+
+
+def read_backup(path):
+    """Yields the records of a backup file one by one, after checking its header."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('type') != 'header' or header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Not a version {FORMAT_VERSION} startpages backup.")
+        for line in f:
+            yield json.loads(line)
+
+
+class Restore:
+    """
+    Loads a backup into the current database with batched bulk_create. Records get new
+    primary keys; an old -> new id map per referenced type rewrites the foreign keys.
+    Only users, pages, sections and themes are referenced, so links need no map at all.
+    Users that would collide with accounts already here are skipped with all their data:
+    the same username, or a verified email address of another account (see find_email_conflicts).
+    """
+
+    def __init__(self, batch_size=2000):
+        self.batch_size = batch_size
+        self.tables = {table.type: table for table in TABLES}
+        referenced = {ref for table in TABLES for ref in table.references.values()}
+        self.id_maps = {type_: {} for type_ in referenced}
+        self.created = Counter()
+        self.skipped = Counter()
+        self.defaults = {}
+        # Old user id -> the address that is already verified by another account
+        self.email_conflicts = {}
+        self.usernames = {}
+
+    @transaction.atomic
+    def run(self, path, on_table=None):
+        self.find_email_conflicts(path)
+        batch, batch_type = [], None
+        for record in read_backup(path):
+            if record['type'] != batch_type or len(batch) >= self.batch_size:
+                self.flush(batch_type, batch)
+                if record['type'] != batch_type and batch_type and on_table:
+                    on_table(batch_type, self.created[batch_type], self.skipped[batch_type])
+                batch, batch_type = [], record['type']
+            batch.append(record)
+        self.flush(batch_type, batch)
+        if batch_type and on_table:
+            on_table(batch_type, self.created[batch_type], self.skipped[batch_type])
+
+    def flush(self, type_, records):
+        if not records:
+            return
+        table = self.tables[type_]
+        model = table.get_model()
+        records = [record for record in records if self.remap(table, record)]
+        if type_ == 'user' and self.email_conflicts:
+            kept = [record for record in records if record['id'] not in self.email_conflicts]
+            self.skipped[type_] += len(records) - len(kept)
+            records = kept
+
+        if table.natural_key:
+            keys = [record[table.natural_key] for record in records]
+            existing = dict(model.objects.filter(**{f'{table.natural_key}__in': keys}).values_list(table.natural_key, 'pk'))
+            if table.reuse_existing and type_ in self.id_maps:
+                for record in records:
+                    if record[table.natural_key] in existing:
+                        self.id_maps[type_][record['id']] = existing[record[table.natural_key]]
+            new_records = [record for record in records if record[table.natural_key] not in existing]
+            if not table.reuse_existing:
+                self.skipped[type_] += len(records) - len(new_records)
+            records = new_records
+
+        if type_ == 'page':
+            self.resolve_page_conflicts(records)
+
+        if type_ not in self.defaults:
+            self.defaults[type_] = {name: default() for name, default in table.defaults.items()}
+        objects = model.objects.bulk_create([
+            model(**self.defaults[type_], **{name: record[name] for name in table.fields}) for record in records
+        ])
+        if type_ in self.id_maps:
+            self.id_maps[type_].update((record['id'], obj.pk) for record, obj in zip(records, objects))
+        self.created[type_] += len(objects)
+
+    def remap(self, table, record):
+        """Rewrites the record's foreign keys; False if a referenced row was skipped (so this one is too)."""
+        for column, ref in table.references.items():
+            if record[column] is None:
+                continue
+            new_id = self.id_maps[ref].get(record[column])
+            if new_id is None:
+                # Optional references (a profile's theme) are dropped, required ones skip the record
+                if table.get_model()._meta.get_field(column.removesuffix('_id')).null:
+                    record[column] = None
+                    continue
+                self.skipped[table.type] += 1
+                return False
+            record[column] = new_id
+        return True
+
+    def find_email_conflicts(self, path, chunk_size=1000):
+        """
+        Verified addresses are unique across accounts (allauth), so one that already belongs to another
+        account here would abort the whole restore at its INSERT. A first pass over the file finds the
+        users they belong to before anything is written; run() then skips them like existing usernames.
+        """
+        from allauth.account.models import EmailAddress
+        verified = {}
+        for record in read_backup(path):
+            if record['type'] == 'user':
+                self.usernames[record['id']] = record['username']
+            elif record['type'] == 'email' and record['verified']:
+                verified[record['email']] = record['user_id']
+
+        User = self.tables['user'].get_model()
+        emails = list(verified)
+        for start in range(0, len(emails), chunk_size):
+            taken = EmailAddress.objects.filter(email__in=emails[start:start + chunk_size], verified=True).values_list('email', flat=True)
+            self.email_conflicts.update((verified[email], email) for email in taken)
+        # Users that exist here (same username) are skipped anyway, their addresses are no conflict
+        existing = set(User.objects.filter(username__in=[self.usernames.get(user_id) for user_id in self.email_conflicts]).values_list('username', flat=True))
+        self.email_conflicts = {user_id: email for user_id, email in self.email_conflicts.items() if self.usernames.get(user_id) not in existing}
+
+    def resolve_page_conflicts(self, records):
+        """Slugs and share tokens are unique across all users, so they can collide with pages already in this database."""
+        from .models import StartPage
+        slugs = [record['slug'] for record in records]
+        taken = set(StartPage.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+        tokens = set(StartPage.objects.filter(share_token__in=[r['share_token'] for r in records if r['share_token']]).values_list('share_token', flat=True))
+        for record in records:
+            if record['slug'] in taken:
+                record['slug'] = StartPage.suffixed_slug(record['slug'])
+            if record['share_token'] in tokens:
+                record['share_token'] = None
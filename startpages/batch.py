@@ -0,0 +1,345 @@
+# startpages/batch.py
+
+from django.db import models, transaction
+from .models import Section, Link, StartPage, ChangeLogEntry, ORDER_GAP, MAX_LINKS
+from .services import OrderService, SectionService
+
+MAX_OPS = 100
+
+
+class BatchError(Exception):
+    """An operation that cannot be applied. It is skipped and reported, the batch goes on without it."""
+
+
+def run_batch(user, ops):
+    """
+    Applies `ops` in one transaction and returns (results, events) with one result per op.
+    An op that fails validation gets an error result and is left out, so one stale id does not
+    lose the other edits of the batch. Ops that depend on a failed one (through its ref) fail in turn.
+    """
+    if not isinstance(ops, list) or not ops:
+        raise BatchError('No operations given.')
+    if len(ops) > MAX_OPS:
+        raise BatchError(f'At most {MAX_OPS} operations per batch.')
+
+    edit = EditBatch(user)
+    with transaction.atomic():
+        results = edit.apply(ops)
+    return results, edit.events
+
+
+class EditBatch:
+    """
+    Applies an ordered list of editor operations (the same ones as the single-item API
+    endpoints) as one unit:
+
+    1. Every section and link id the operations mention, plus the sections those links are in,
+       is loaded with one query per table, filtered by owner, so ownership is checked once.
+       The sections are locked (FOR UPDATE) until the batch commits, so link limits and order
+       keys computed from them cannot be invalidated by a concurrent edit.
+    2. The operations are validated and applied in order to these objects in memory, in one
+       pass; ids that do not exist yet can be referred to by the `ref` of the add operation
+       that creates them. An operation checks everything before it changes anything, so one
+       that fails leaves the in-memory state as it was and gets an error result instead.
+    3. The result is written set-based: bulk_create, bulk_update, one DELETE per table
+       and one link count refresh, independent of the number of operations.
+
+    Call apply() inside a transaction, run_batch() does that for the API.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        # Keyed by database id, or by the client's ref for items created in this batch
+        self.sections = {}
+        self.links = {}
+        self.created = {'section': [], 'link': []}
+        self.changed = {'section': set(), 'link': set()}
+        self.deleted = {'section': set(), 'link': set()}
+        self.saved = {'section': set(), 'link': set()}
+        self.moves = []
+        self.page = None
+        self.events = []
+
+    def apply(self, ops):
+        self.load(ops)
+        results = []
+        for op in ops:
+            try:
+                handler = getattr(self, f"op_{op.get('op')}", None) if isinstance(op, dict) else None
+                if handler is None:
+                    raise BatchError('Unknown operation.')
+                results.append({'status': 'success', **(handler(op) or {})})
+            except BatchError as e:
+                results.append({'status': 'error', 'message': str(e)})
+        self.flush()
+        return self.resolve_refs(results)
+
+    # --- Loading -------------------------------------------------------------
+
+    @staticmethod
+    def _db_id(value):
+        """Database ids arrive as numbers or numeric strings (data-id attributes), refs as other strings."""
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            return int(value)
+        return None
+
+    def load(self, ops):
+        section_ids, link_ids = set(), set()
+        for op in ops:
+            if not isinstance(op, dict):
+                continue
+            ids = link_ids if op.get('type') == 'link' else section_ids
+            for key in ('id', 'prev_id', 'next_id'):
+                if self._db_id(op.get(key)) is not None and op.get('op') != 'add_link':
+                    ids.add(self._db_id(op[key]))
+            if self._db_id(op.get('section_id')) is not None:
+                section_ids.add(self._db_id(op['section_id']))
+
+        if section_ids:
+            self.sections = Section.objects.select_for_update(of=('self',)).filter(id__in=section_ids, page__user=self.user).in_bulk()
+        if link_ids:
+            self.links = Link.objects.filter(id__in=link_ids, section__page__user=self.user).in_bulk()
+            # The sections the links are in now: written back on save and move, and their counts change on move or delete
+            missing = {link.section_id for link in self.links.values()} - set(self.sections)
+            if missing:
+                self.sections.update(Section.objects.select_for_update(of=('self',)).filter(id__in=missing).in_bulk())
+
+        # Highest order key per section, so added links go after the existing ones
+        self.max_link_order = dict(
+            Link.objects.filter(section_id__in=list(self.sections)).order_by().values('section_id')
+            .annotate(m=models.Max('order')).values_list('section_id', 'm')
+        ) if any(op.get('op') == 'add_link' for op in ops if isinstance(op, dict)) else {}
+
+    def _key(self, value):
+        db_id = self._db_id(value)
+        return db_id if db_id is not None else value
+
+    def _get(self, item_type, value):
+        items = self.sections if item_type == 'section' else self.links
+        key = self._key(value)
+        if key is None or key not in items or key in self.deleted[item_type]:
+            raise BatchError(f'{item_type.capitalize()} not found.')
+        return key, items[key]
+
+    def _section_key(self, link):
+        return getattr(link, '_section_key', link.section_id)
+
+    def _link_count(self, section_key):
+        return sum(
+            1 for key, link in self.links.items()
+            if key not in self.deleted['link'] and self._section_key(link) == section_key
+        ) if isinstance(section_key, str) else self.sections[section_key].link_count
+
+    def _add_ref(self, item_type, op):
+        ref = op.get('ref')
+        if ref is not None and (not isinstance(ref, str) or ref.isdigit() or ref in self.sections or ref in self.links):
+            raise BatchError('Refs must be unique, non-numeric strings.')
+        return ref or f"_{item_type}{len(self.created[item_type])}"
+
+    # --- Operations ----------------------------------------------------------
+
+    def op_add_section(self, op):
+        name = op.get('name')
+        if not name:
+            raise BatchError('Name is required')
+        if self.page is None:
+            # Same page as the add_section endpoint: the default page, or the first one
+            # Locked like in OrderService.append_section, so concurrent adds get distinct order keys
+            self.page = StartPage.objects.select_for_update().filter(user=self.user).order_by('-is_default', 'id').first()
+            if not self.page:
+                raise BatchError('No startpage found')
+            self.next_section_order = (self.page.sections.aggregate(models.Max('order'))['order__max'] or 0) + ORDER_GAP
+
+        key = self._add_ref('section', op)
+        section = Section(page=self.page, name=name, order=self.next_section_order)
+        self.next_section_order += ORDER_GAP
+        self.sections[key] = section
+        self.created['section'].append(key)
+        return {'ref': key}
+
+    def op_add_link(self, op):
+        section_key, section = self._get('section', op.get('section_id'))
+        if self._link_count(section_key) >= MAX_LINKS:
+            raise BatchError(f'Max {MAX_LINKS} links per section allowed.')
+
+        orders = [link.order for key, link in self.links.items() if key not in self.deleted['link'] and self._section_key(link) == section_key]
+        last = max(orders + [self.max_link_order.get(section_key) or 0])
+        if not op.get('name') or not op.get('url'):
+            raise BatchError('Name and URL are required')
+        key = self._add_ref('link', op)
+        link = Link(name=op.get('name'), url=op.get('url'), color=op.get('color') or None, order=last + ORDER_GAP)
+        link._section_key = section_key
+        self.links[key] = link
+        self.created['link'].append(key)
+        self._count(section_key, +1)
+        return {'ref': key}
+
+    def op_save_item(self, op):
+        item_type = op.get('type')
+        if item_type not in ('section', 'link'):
+            raise BatchError('Invalid type')
+        key, item = self._get(item_type, op.get('id'))
+        if not op.get('name') or (item_type == 'link' and not op.get('url')):
+            raise BatchError('Name and URL are required' if item_type == 'link' else 'Name is required')
+        item.name = op.get('name')
+        if item_type == 'link':
+            if item.url != op.get('url'):
+                # The health check result belonged to the old URL
+                item.check_status = item.checked_at = item.latency_ms = None
+            item.url = op.get('url')
+            item.color = op.get('color') or None
+        self.saved[item_type].add(key)
+        if key not in self.created[item_type]:
+            self.changed[item_type].add(key)
+
+    def op_delete_item(self, op):
+        item_type = op.get('type')
+        if item_type not in ('section', 'link'):
+            raise BatchError('Invalid type')
+        key, item = self._get(item_type, op.get('id'))
+        self.deleted[item_type].add(key)
+        if item_type == 'link':
+            self._count(self._section_key(item), -1)
+        else:
+            # Its links go with it
+            for link_key, link in self.links.items():
+                if self._section_key(link) == key:
+                    self.deleted['link'].add(link_key)
+
+    def op_move_item(self, op):
+        item_type = op.get('type')
+        if item_type not in ('section', 'link'):
+            raise BatchError('Invalid type')
+        key, item = self._get(item_type, op.get('id'))
+        items = self.sections if item_type == 'section' else self.links
+
+        if item_type == 'link':
+            parent = self._get('section', op.get('section_id'))[0]
+            old_parent = self._section_key(item)
+            if parent != old_parent and self._link_count(parent) >= MAX_LINKS:
+                raise BatchError(f'Section cannot contain more than {MAX_LINKS} links.')
+        else:
+            parent = old_parent = item.page_id
+
+        parent_of = self._section_key if item_type == 'link' else (lambda section: section.page_id)
+        neighbours = []
+        for neighbour_id in (op.get('prev_id'), op.get('next_id')):
+            if neighbour_id in (None, ''):
+                neighbours.append(None)
+                continue
+            _, neighbour = self._get(item_type, neighbour_id)
+            if parent_of(neighbour) != parent:
+                raise BatchError('Neighbouring item not found.')
+            neighbours.append(neighbour)
+
+        if parent != old_parent:
+            self._count(old_parent, -1)
+            self._count(parent, +1)
+            item._section_key = parent
+
+        new_order = OrderService.order_between(*(n.order if n else None for n in neighbours))
+        if new_order is None:
+            # Out of precision between these two: respace the stored siblings once and retry
+            siblings = Link.objects.filter(section_id=parent) if item_type == 'link' else Section.objects.filter(page_id=parent)
+            for sibling_id, order in OrderService.rebalance(siblings.exclude(id=item.id)).items():
+                if sibling_id in items:
+                    items[sibling_id].order = order
+            new_order = OrderService.order_between(*(n.order if n else None for n in neighbours))
+
+        item.order = new_order
+        self.moves.append((item_type, key, op.get('prev_id'), op.get('next_id')))
+        if key not in self.created[item_type]:
+            self.changed[item_type].add(key)
+        return {'order': new_order}
+
+    def _count(self, section_key, delta):
+        # New sections (refs) are counted from self.links instead; the stored counts are refreshed after the writes
+        if not isinstance(section_key, str):
+            self.sections[section_key].link_count += delta
+
+    # --- Writing -------------------------------------------------------------
+
+    def flush(self):
+        deleted_sections = [key for key in self.deleted['section'] if not isinstance(key, str)]
+        deleted_links = [key for key in self.deleted['link'] if not isinstance(key, str)]
+
+        # 1. Creates: sections first, their new ids are needed by new links
+        new_sections = [self.sections[key] for key in self.created['section'] if key not in self.deleted['section']]
+        Section.objects.bulk_create(new_sections)
+        new_links = []
+        for key in self.created['link']:
+            if key in self.deleted['link']:
+                continue
+            link = self.links[key]
+            link.section_id = self.sections[link._section_key].id
+            new_links.append(link)
+        Link.objects.bulk_create(new_links)
+
+        # 2. Updates (moved links get their new section)
+        changed_sections = [self.sections[key] for key in self.changed['section'] if key not in self.deleted['section']]
+        changed_links = []
+        for key in self.changed['link'] - self.deleted['link']:
+            link = self.links[key]
+            link.section_id = self.sections[self._section_key(link)].id
+            changed_links.append(link)
+        Section.objects.bulk_update(changed_sections, ['name', 'order'])
+        Link.objects.bulk_update(changed_links, ['name', 'url', 'color', 'order', 'section', 'check_status', 'checked_at', 'latency_ms'])
+
+        # 3. Deletes (logged by the service) and one recount of every touched section
+        if deleted_sections:
+            SectionService.delete_sections(deleted_sections)
+        if deleted_links:
+            SectionService.delete_links(deleted_links)
+        touched = {section.id for section in self.sections.values() if section.id} - set(deleted_sections)
+        if new_links or changed_links or deleted_links:
+            Section.refresh_link_counts(touched)
+
+        for object_type, action, ids in (
+            (ChangeLogEntry.SECTION, ChangeLogEntry.CREATE, [s.id for s in new_sections]),
+            (ChangeLogEntry.LINK, ChangeLogEntry.CREATE, [l.id for l in new_links]),
+            (ChangeLogEntry.SECTION, ChangeLogEntry.UPDATE, [s.id for s in changed_sections]),
+            (ChangeLogEntry.LINK, ChangeLogEntry.UPDATE, [l.id for l in changed_links]),
+        ):
+            if ids:
+                ChangeLogEntry.record(self.user, object_type, ids, action)
+
+        # 4. Live-sync events, the same the single-item endpoints send (published by the view)
+        for section in new_sections:
+            self.events.append(('section_added', {'page_id': section.page_id, 'section': {'id': section.id, 'name': section.name}}))
+        for link in new_links:
+            self.events.append(('link_added', {'section_id': link.section_id, 'link': self._link_data(link)}))
+        for item_type, keys in self.saved.items():
+            for key in keys - self.deleted[item_type] - set(self.created[item_type]):
+                if item_type == 'section':
+                    self.events.append(('item_updated', {'type': 'section', 'id': self.sections[key].id, 'name': self.sections[key].name}))
+                else:
+                    self.events.append(('item_updated', {'type': 'link', **self._link_data(self.links[key])}))
+        for item_type, key, prev_id, next_id in self.moves:
+            items = self.sections if item_type == 'section' else self.links
+            if key in self.deleted[item_type] or key in self.created[item_type]:
+                continue
+            neighbour = lambda value: items[self._key(value)].id if value not in (None, '') else None
+            data = {'type': item_type, 'id': items[key].id, 'prev_id': neighbour(prev_id), 'next_id': neighbour(next_id)}
+            if item_type == 'link':
+                data['section_id'] = items[key].section_id
+            self.events.append(('item_moved', data))
+        for item_type, ids in (('section', deleted_sections), ('link', deleted_links)):
+            self.events.extend(('item_deleted', {'type': item_type, 'id': item_id}) for item_id in ids)
+
+    @staticmethod
+    def _link_data(link):
+        return {'id': link.id, 'name': link.name, 'url': link.url, 'color': link.color}
+
+    def resolve_refs(self, results):
+        """Adds the database id of every created item to its result."""
+        for result in results:
+            ref = result.get('ref')
+            if ref is None:
+                continue
+            item = self.sections.get(ref) if ref in self.created['section'] else self.links.get(ref)
+            result['id'] = item.id if item is not None else None
+            if item is not None and isinstance(item, Link):
+                result['link'] = self._link_data(item)
+            elif item is not None:
+                result['section'] = {'id': item.id, 'name': item.name}
+        return results
@@ -0,0 +1,168 @@
+# startpages/cache.py
+
+import pickle
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+# First byte of every stored payload, so compressed and plain values can live side by side
+RAW = b'\x00'
+ZLIB = b'\x01'
+
+METRIC_FIELDS = ('hits', 'misses', 'sets', 'deletes', 'get_us', 'set_us', 'read_bytes', 'raw_bytes', 'stored_bytes')
+# Per-process counters are added to the shared ones at most this often, so metrics cost no extra round trip per call
+METRICS_FLUSH_SECONDS = 10
+
+FAMILIES = {}
+
+
+def _metric_key(family, field):
+    return ':'.join([getattr(settings, 'NAME', 'startpages'), 'cachemetrics', family, field])
+
+
+class _Metrics:
+    """Counts per family in memory and adds them to shared cache counters (atomic INCRBY on Redis)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)
+        self._last_flush = time.monotonic()
+
+    def record(self, family, **values):
+        with self._lock:
+            self._pending[family].update(values)
+            due = time.monotonic() - self._last_flush >= METRICS_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._last_flush = time.monotonic()
+        backend = caches['default']
+        for family, values in pending.items():
+            for field, value in values.items():
+                if not value:
+                    continue
+                key = _metric_key(family, field)
+                backend.add(key, 0, None)
+                try:
+                    backend.incr(key, value)
+                except ValueError: # Evicted between add and incr
+                    backend.set(key, value, None)
+
+    def snapshot(self):
+        """Shared counters of every registered family, including this process' pending ones."""
+        self.flush()
+        keys = {_metric_key(family, field): (family, field) for family in FAMILIES for field in METRIC_FIELDS}
+        stored = caches['default'].get_many(list(keys))
+        result = {family: dict.fromkeys(METRIC_FIELDS, 0) for family in FAMILIES}
+        for key, value in stored.items():
+            family, field = keys[key]
+            result[family][field] = int(value)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+        caches['default'].delete_many([_metric_key(family, field) for family in FAMILIES for field in METRIC_FIELDS])
+
+
+metrics = _Metrics()
+
+
+class CacheFamily:
+    """
+    One namespaced group of cache keys ("settings", "pages", ...) with hit/miss, latency and size metrics.
+    Values are pickled here rather than by the backend; payloads of at least `compress_min_bytes`
+    are compressed with zlib level 1 (fast, still roughly 3-5x on HTML and JSON) when that saves space.
+
+        settings_cache = CacheFamily('settings')
+        settings_cache.set('global', obj)
+    """
+
+    def __init__(self, name, alias='default', compress_min_bytes=None):
+        if name in FAMILIES:
+            raise ValueError(f"Cache family '{name}' is already registered")
+        self.name = name
+        self.alias = alias
+        self.compress_min_bytes = (
+            compress_min_bytes if compress_min_bytes is not None else getattr(settings, 'CACHE_COMPRESS_MIN_BYTES', 1024)
+        )
+        FAMILIES[name] = self
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def make_key(self, key):
+        return f'{self.name}:{key}'
+
+    def dumps(self, value):
+        """Returns (payload, size of the plain pickle)."""
+        raw = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(raw) >= self.compress_min_bytes:
+            compressed = zlib.compress(raw, 1)
+            if len(compressed) < len(raw):
+                return ZLIB + compressed, len(raw)
+        return RAW + raw, len(raw)
+
+    @staticmethod
+    def loads(payload):
+        marker, body = payload[:1], payload[1:]
+        if marker == ZLIB:
+            body = zlib.decompress(body)
+        elif marker != RAW:
+            raise ValueError('Not a cache family payload')
+        return pickle.loads(body)
+
+    def get(self, key, default=None):
+        start = time.perf_counter()
+        payload = self.backend.get(self.make_key(key))
+        elapsed_us = int((time.perf_counter() - start) * 1_000_000)
+        if payload is None:
+            metrics.record(self.name, misses=1, get_us=elapsed_us)
+            return default
+        metrics.record(self.name, hits=1, get_us=elapsed_us, read_bytes=len(payload))
+        return self.loads(payload)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        payload, raw_size = self.dumps(value)
+        start = time.perf_counter()
+        self.backend.set(self.make_key(key), payload, timeout)
+        elapsed_us = int((time.perf_counter() - start) * 1_000_000)
+        metrics.record(self.name, sets=1, set_us=elapsed_us, raw_bytes=raw_size, stored_bytes=len(payload))
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT):
+        """`default` may be a callable, only called on a miss (like Django's cache.get_or_set)."""
+        value = self.get(key)
+        if value is None:
+            value = default() if callable(default) else default
+            if value is not None:
+                self.set(key, value, timeout)
+        return value
+
+    def delete(self, key):
+        self.backend.delete(self.make_key(key))
+        metrics.record(self.name, deletes=1)
+
+
+def family_stats():
+    """Derived per-family numbers, for the admin dashboard and `manage.py cache_stats`."""
+    stats = {}
+    for family, counts in metrics.snapshot().items():
+        reads = counts['hits'] + counts['misses']
+        stats[family] = {
+            **counts,
+            'hit_ratio': counts['hits'] / reads if reads else None,
+            'avg_get_ms': counts['get_us'] / reads / 1000 if reads else None,
+            'avg_set_ms': counts['set_us'] / counts['sets'] / 1000 if counts['sets'] else None,
+            'avg_value_bytes': counts['stored_bytes'] // counts['sets'] if counts['sets'] else None,
+            'saved_bytes': counts['raw_bytes'] - counts['stored_bytes'],
+            'saved_ratio': 1 - counts['stored_bytes'] / counts['raw_bytes'] if counts['raw_bytes'] else None,
+        }
+    return stats
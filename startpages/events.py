@@ -0,0 +1,112 @@
+# startpages/events.py
+
+import json
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+
+# Heartbeat comment interval, keeps proxies from closing an idle stream
+SSE_HEARTBEAT_SECONDS = 15
+# Streams are closed after this long; EventSource reconnects on its own
+SSE_MAX_STREAM_SECONDS = getattr(settings, 'SSE_MAX_STREAM_SECONDS', 300)
+
+
+def _channel(user_id):
+    return f"{getattr(settings, 'NAME', 'startpages')}:events:{user_id}"
+
+
+def uses_redis():
+    return 'django_redis' in settings.CACHES['default']['BACKEND']
+
+
+class _LocalBroker:
+    """In-process fan-out for development (runserver, LocMemCache), where Redis is not available."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = {}
+
+    def publish(self, channel, message):
+        with self._lock:
+            targets = list(self._queues.get(channel, ()))
+        for q in targets:
+            q.put(message)
+
+    def subscribe(self, channel):
+        q = queue.Queue()
+        with self._lock:
+            self._queues.setdefault(channel, set()).add(q)
+        return q
+
+    def unsubscribe(self, channel, q):
+        with self._lock:
+            self._queues.get(channel, set()).discard(q)
+
+
+_local_broker = _LocalBroker()
+
+
+def publish_event(user, event_type, data, origin=None):
+    """
+    Publishes a change event to every open tab of `user` once the current transaction commits.
+    `origin` is the X-Client-Id of the tab that made the change, so it can ignore its own echo.
+    """
+    message = json.dumps({'type': event_type, 'origin': origin, 'data': data})
+    channel = _channel(user.id)
+
+    def _send():
+        try:
+            if uses_redis():
+                from django_redis import get_redis_connection # pyright: ignore[reportMissingImports]
+                get_redis_connection('default').publish(channel, message)
+            else:
+                _local_broker.publish(channel, message)
+        except Exception as e:
+            # Live sync is best effort, never fail the edit because of it
+            print(f"Event publish error: {e}")
+
+    transaction.on_commit(_send)
+
+
+def publish_from_request(request, event_type, data):
+    publish_event(request.user, event_type, data, origin=request.headers.get('X-Client-Id'))
+
+
+def _format(message):
+    return f"data: {message}\n\n"
+
+
+def event_stream(user_id):
+    """Yields Server-Sent Events for one user until SSE_MAX_STREAM_SECONDS have passed."""
+    channel = _channel(user_id)
+    deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+
+    # Ask the browser to reconnect quickly once we close the stream
+    yield "retry: 2000\n\n"
+
+    if uses_redis():
+        from django_redis import get_redis_connection # pyright: ignore[reportMissingImports]
+        pubsub = get_redis_connection('default').pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(channel)
+        try:
+            while time.monotonic() < deadline:
+                msg = pubsub.get_message(timeout=SSE_HEARTBEAT_SECONDS)
+                if msg is None:
+                    yield ": ping\n\n"
+                    continue
+                payload = msg['data']
+                yield _format(payload.decode() if isinstance(payload, bytes) else payload)
+        finally:
+            pubsub.close()
+    else:
+        q = _local_broker.subscribe(channel)
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    yield _format(q.get(timeout=SSE_HEARTBEAT_SECONDS))
+                except queue.Empty:
+                    yield ": ping\n\n"
+        finally:
+            _local_broker.unsubscribe(channel, q)
@@ -0,0 +1,68 @@
+# startpages/linkcheck.py
+
+import asyncio
+import time
+from dataclasses import dataclass
+from django.conf import settings
+
+# Status stored for URLs that could not be reached at all (DNS, refused, timeout, TLS...)
+UNREACHABLE = 0
+
+# HEAD answers that often mean "this server does not do HEAD", not "this link is broken"
+RETRY_WITH_GET = {403, 404, 405, 406, 429, 500, 501, 503}
+
+
+@dataclass
+class CheckResult:
+    url: str
+    status: int
+    latency_ms: int | None
+
+
+async def _request(session, method, url):
+    start = time.monotonic()
+    # Only the status line and headers are needed, the body is never read
+    async with session.request(method, url, allow_redirects=True) as response:
+        return response.status, int((time.monotonic() - start) * 1000)
+
+
+async def _check(session, url):
+    try:
+        status, latency = await _request(session, 'HEAD', url)
+        if status in RETRY_WITH_GET:
+            status, latency = await _request(session, 'GET', url)
+        return CheckResult(url, status, latency)
+    except Exception:
+        # aiohttp raises a zoo of errors (ClientError, TimeoutError, ValueError for bad URLs...)
+        return CheckResult(url, UNREACHABLE, None)
+
+
+async def check_urls_async(urls, concurrency=100, per_host=4, timeout=10):
+    """
+    Checks every URL once, in no particular order. `concurrency` workers take the URLs one
+    by one, so at most that many requests (and coroutines) exist at a time however long the
+    list is; at most `per_host` of them go to the same host. Connections are pooled and kept
+    alive, so many links on one site reuse a handful of sockets.
+    """
+    # Import inside function, aiohttp is only needed by the link checker
+    import aiohttp # pyright: ignore[reportMissingImports]
+
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    headers = {'User-Agent': f"{getattr(settings, 'NAME', 'Startpages')} link checker"}
+    pending = iter(urls)
+    results = []
+
+    async def worker(session):
+        # The workers share one iterator, each takes the next URL when its last check is done
+        for url in pending:
+            results.append(await _check(session, url))
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=headers) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    return results
+
+
+def check_urls(urls, **kwargs):
+    """Synchronous entry point for management commands."""
+    return asyncio.run(check_urls_async(list(urls), **kwargs))
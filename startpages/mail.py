@@ -0,0 +1,182 @@
+# startpages/mail.py
+
+import smtplib
+import time
+from datetime import timedelta
+from email import message_from_bytes
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+from django.db import transaction
+from django.utils import timezone
+from .models import QueuedEmail
+
+# Claimed messages are skipped by other senders for this long, a crashed sender's claims expire after it
+CLAIM_SECONDS = 300
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Stores messages in the QueuedEmail table and returns at once; `manage.py send_queued_mail`
+    delivers them. Inside a transaction (a signup) the mail is only queued if that commits.
+    """
+
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            recipients = message.recipients()
+            if not recipients:
+                continue
+            rows.append(QueuedEmail(
+                from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+                recipients=recipients,
+                subject=str(message.subject)[:255],
+                # Same bytes the SMTP backend would send
+                message=message.message().as_bytes(linesep='\r\n'),
+            ))
+        try:
+            QueuedEmail.objects.bulk_create(rows)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(rows)
+
+
+class StoredMessage(EmailMessage):
+    """A queued message as an EmailMessage, for delivery backends other than SMTP (console, locmem, file)."""
+
+    def __init__(self, mail):
+        super().__init__(subject=mail.subject, from_email=mail.from_email, to=mail.recipients)
+        self.stored = message_from_bytes(bytes(mail.message))
+
+    def message(self, **kwargs):
+        return self.stored
+
+
+class PermanentError(Exception):
+    """The server rejected the message itself, retrying would not help."""
+
+
+class MailSender:
+    """
+    Drains the queue over one SMTP connection that stays open between messages and batches.
+    Sending is paced to EMAIL_QUEUE_RATE_PER_MINUTE; temporary failures are retried with
+    exponential backoff, up to EMAIL_QUEUE_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, stdout=None):
+        self.stdout = stdout
+        self.connection = None
+        self.max_attempts = getattr(settings, 'EMAIL_QUEUE_MAX_ATTEMPTS', 5)
+        self.interval = 60 / max(getattr(settings, 'EMAIL_QUEUE_RATE_PER_MINUTE', 60), 1)
+        # A batch must be sent well before its claim expires, whatever the rate limit
+        self.batch_size = max(1, min(getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 50), int(CLAIM_SECONDS / self.interval / 2)))
+        self.idle_seconds = getattr(settings, 'EMAIL_QUEUE_IDLE_SECONDS', 60)
+        self.last_sent = 0.0
+
+    def claim(self):
+        """Takes a batch of due messages; skip_locked lets several senders share the queue (no-op on SQLite)."""
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                QueuedEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=QueuedEmail.PENDING, next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')[:self.batch_size]
+            )
+            if batch:
+                QueuedEmail.objects.filter(id__in=[mail.id for mail in batch]).update(
+                    next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS)
+                )
+        return batch
+
+    def run_once(self, stopping=None):
+        """
+        Sends one batch; returns (sent, failed) counts. When `stopping` (a threading.Event) is set
+        it returns after the current message and hands the rest of the batch back to the queue.
+        """
+        sent = failed = 0
+        batch = self.claim()
+        for index, mail in enumerate(batch):
+            if stopping is not None and stopping.is_set():
+                QueuedEmail.objects.filter(id__in=[queued.id for queued in batch[index:]]).update(next_attempt_at=timezone.now())
+                break
+            if self.deliver(mail):
+                sent += 1
+            else:
+                failed += 1
+        return sent, failed
+
+    def deliver(self, mail):
+        # Rate limit: keep at least `interval` seconds between two messages
+        wait = self.last_sent + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            self.send(mail)
+        except PermanentError as e:
+            self.fail(mail, str(e), permanent=True)
+            return False
+        except (smtplib.SMTPException, OSError) as e:
+            # The connection may be half-dead after any error, open a fresh one for the next message
+            self.close()
+            self.fail(mail, f"{e.__class__.__name__}: {e}")
+            return False
+        finally:
+            self.last_sent = time.monotonic()
+        QueuedEmail.objects.filter(id=mail.id).update(status=QueuedEmail.SENT, sent_at=timezone.now(), attempts=mail.attempts + 1, last_error='')
+        return True
+
+    def send(self, mail):
+        if self.connection is None:
+            self.connection = get_connection(getattr(settings, 'EMAIL_QUEUE_DELIVERY_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'))
+            self.connection.open()
+        if not isinstance(self.connection, SMTPBackend):
+            # No SMTP transaction to drive by hand, the backend sends the stored message itself
+            if not self.connection.send_messages([StoredMessage(mail)]):
+                raise PermanentError(f"{self.connection.__class__.__name__} did not send the message")
+            return
+        try:
+            refused = self.connection.connection.sendmail(mail.from_email, mail.recipients, bytes(mail.message))
+        except smtplib.SMTPRecipientsRefused as e:
+            if all(500 <= code < 600 for code, _ in e.recipients.values()):
+                raise PermanentError(f"All recipients refused: {e.recipients}")
+            raise
+        except smtplib.SMTPResponseException as e:
+            # 5xx is a final answer about this message, 4xx (greylisting, rate limits) is worth a retry
+            if 500 <= e.smtp_code < 600:
+                raise PermanentError(f"{e.smtp_code} {e.smtp_error!r}")
+            raise
+        if refused:
+            self.log(f"Mail {mail.id}: some recipients refused: {refused}")
+
+    def fail(self, mail, error, permanent=False):
+        attempts = mail.attempts + 1
+        if permanent or attempts >= self.max_attempts:
+            QueuedEmail.objects.filter(id=mail.id).update(status=QueuedEmail.FAILED, attempts=attempts, last_error=error)
+            self.log(f"Mail {mail.id} failed permanently after {attempts} attempt(s): {error}")
+            return
+        # 30s, 1m, 2m, 4m, ... capped at an hour
+        delay = min(30 * 2 ** (attempts - 1), 3600)
+        QueuedEmail.objects.filter(id=mail.id).update(
+            attempts=attempts, last_error=error, next_attempt_at=timezone.now() + timedelta(seconds=delay)
+        )
+        self.log(f"Mail {mail.id} attempt {attempts} failed, retrying in {delay}s: {error}")
+
+    def close_if_idle(self):
+        """SMTP servers drop idle clients anyway (Gmail after a few minutes), so close first."""
+        if self.connection is not None and time.monotonic() - self.last_sent > self.idle_seconds:
+            self.close()
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
@@ -0,0 +1,90 @@
+# startpages/management/commands/benchmark_streaming.py
+
+import re
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from startpages.management.commands.benchmark_templates import create_benchmark_page, normalize
+
+# Everything before it is what the browser needs for the first screen: stylesheet, search bar, preview row
+FIRST_SCREEN_END = b'id="sections-grid"'
+
+
+def comparable(html):
+    """
+    Drops what legitimately differs between two renders: CSRF tokens are masked differently
+    every time, and django-browser-reload (DEBUG) only injects its script into buffered responses.
+    """
+    html = re.sub(r'<script src="[^"]*django-browser-reload[^>]*></script>', '', html)
+    return normalize(re.sub(r'(csrfmiddlewaretoken" value="|csrfToken = ")[^"]+', r'\1', html))
+
+
+class Command(BaseCommand):
+    help = 'Compares time to first byte, first screen and full page of the buffered and the streamed startpage on a generated page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', type=int, default=60, help='Sections on the generated page.')
+        parser.add_argument('--links', type=int, default=10, help='Links per section.')
+        parser.add_argument('--rounds', type=int, default=20, help='Requests per mode; medians are reported.')
+
+    def handle(self, *args, **options):
+        # 1. Generate a page inside a transaction that is rolled back afterwards
+        with transaction.atomic():
+            page = create_benchmark_page(options['sections'], options['links'], username='__streaming_benchmark__')
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(page.user)
+            url = reverse('startpages:startpage', args=[page.user.username, page.slug])
+
+            # 2. Parity: both modes must send the same page
+            bodies = {streaming: b''.join(self.fetch(client, url, streaming)) for streaming in (False, True)}
+            if comparable(bodies[False].decode()) != comparable(bodies[True].decode()):
+                transaction.set_rollback(True)
+                raise CommandError('The streamed page differs from the buffered one.')
+            self.stdout.write(self.style.SUCCESS('Output identical (after whitespace normalization).'))
+
+            # 3. Timing
+            results = {streaming: self.measure(client, url, streaming, options['rounds']) for streaming in (False, True)}
+            transaction.set_rollback(True)
+
+        link_total = options['sections'] * options['links']
+        self.stdout.write(f"{options['sections']} sections, {link_total} links, {len(bodies[False]) // 1024} KiB, {options['rounds']} rounds (median ms)")
+        self.stdout.write(f"{'':<10} {'first byte':>11} {'first screen':>13} {'full page':>10} {'chunks':>7}")
+        for streaming, label in ((False, 'buffered'), (True, 'streamed')):
+            r = results[streaming]
+            self.stdout.write(f"{label:<10} {r['ttfb']:>11.1f} {r['first_screen']:>13.1f} {r['total']:>10.1f} {r['chunks']:>7}")
+        buffered, streamed = results[False], results[True]
+        self.stdout.write(self.style.SUCCESS(
+            f"First byte {buffered['ttfb'] / streamed['ttfb']:.1f}x sooner, "
+            f"first screen {buffered['first_screen'] / streamed['first_screen']:.1f}x sooner when streamed."
+        ))
+
+    def fetch(self, client, url, streaming):
+        """Returns an iterator over the body chunks, as they would be written to the socket."""
+        with override_settings(STARTPAGE_STREAMING=streaming):
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} answered {response.status_code}.')
+        return iter(response.streaming_content) if response.streaming else iter([response.content])
+
+    def measure(self, client, url, streaming, rounds):
+        samples = {'ttfb': [], 'first_screen': [], 'total': []}
+        chunks = 0
+        for _ in range(rounds):
+            start = time.perf_counter()
+            body = self.fetch(client, url, streaming)
+            received, chunks = b'', 0
+            first_screen = None
+            for chunk in body:
+                if not chunks:
+                    samples['ttfb'].append(time.perf_counter() - start)
+                chunks += 1
+                received += chunk
+                if first_screen is None and FIRST_SCREEN_END in received:
+                    first_screen = time.perf_counter() - start
+            samples['total'].append(time.perf_counter() - start)
+            samples['first_screen'].append(first_screen if first_screen is not None else samples['total'][-1])
+        return {**{key: statistics.median(values) * 1000 for key, values in samples.items()}, 'chunks': chunks}
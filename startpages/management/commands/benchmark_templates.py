@@ -0,0 +1,105 @@
+# startpages/management/commands/benchmark_templates.py
+
+import re
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template.backends.jinja2 import Jinja2
+from django.template.loader import render_to_string
+from django.utils import timezone
+from startpages.models import StartPage, Section, Link, ORDER_GAP
+from startpages.rendering import render_cards, PREVIEW_COUNT
+
+
+def normalize(html):
+    """
+    Makes the two engines' output comparable: whitespace between and inside tags differs
+    (includes vs macros), and markupsafe spells the quote entities &#39; and &#34;
+    where Django writes &#x27; and &quot;.
+    """
+    html = html.replace('&#39;', '&#x27;').replace('&#34;', '&quot;')
+    html = re.sub(r'\s+', ' ', html)
+    return re.sub(r'>\s+<', '><', html).strip()
+
+
+def create_benchmark_page(section_count, link_count, username='__template_benchmark__'):
+    """A page with generated sections and links, for benchmarks that roll their transaction back."""
+    user = User.objects.create(username=username)
+    page = StartPage.objects.create(user=user, title='Benchmark')
+    sections = Section.objects.bulk_create([
+        Section(page=page, name=f"Section <{i}> & 'co'", order=(i + 1) * ORDER_GAP, link_count=link_count)
+        for i in range(section_count)
+    ])
+    Link.objects.bulk_create([
+        Link(
+            section=section,
+            name=f'Link {j} "quoted"',
+            url=f'https://example.com/{section.id}/{j}?a=1&b=2',
+            color='#ff0000' if j % 3 == 0 else None,
+            order=(j + 1) * ORDER_GAP,
+            # Some broken links, so the edit-mode badge is compared too
+            check_status=404 if j % 4 == 1 else 200,
+            checked_at=timezone.now(),
+        )
+        for section in sections for j in range(link_count)
+    ])
+    return page
+
+
+class Command(BaseCommand):
+    help = 'Compares output and render time of the Django and Jinja2 startpage cards on a generated page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', type=int, default=40, help='Sections on the generated page.')
+        parser.add_argument('--links', type=int, default=10, help='Links per section.')
+        parser.add_argument('--rounds', type=int, default=50, help='Renders per engine.')
+
+    def handle(self, *args, **options):
+        # The Jinja2 engine is built here as well, so the benchmark also runs with STARTPAGE_JINJA2 off
+        params = {key: value for key, value in settings.JINJA2_TEMPLATES.items() if key != 'BACKEND'}
+        engine = Jinja2(params)
+
+        # 1. Generate a page inside a transaction that is rolled back afterwards
+        with transaction.atomic():
+            page = create_benchmark_page(options['sections'], options['links'])
+            sections = list(page.sections.prefetch_related('links').all())
+
+            # 2. Parity: the Jinja2 macros must produce the same markup as the Django includes
+            django_html = self.render_django(sections)
+            jinja_html = render_cards(sections, engine)
+            for part in ('preview', 'grid'):
+                if normalize(django_html[part]) != normalize(jinja_html[part]):
+                    transaction.set_rollback(True)
+                    raise CommandError(f'Jinja2 output differs from the Django templates ({part}).')
+            self.stdout.write(self.style.SUCCESS('Output identical (after whitespace normalization).'))
+
+            # 3. Timing
+            django_time = self.time(lambda: self.render_django(sections), options['rounds'])
+            jinja_time = self.time(lambda: render_cards(sections, engine), options['rounds'])
+
+            transaction.set_rollback(True)
+
+        link_total = options['sections'] * options['links']
+        self.stdout.write(f"{options['sections']} sections, {link_total} links, {options['rounds']} rounds")
+        self.stdout.write(f"  Django templates: {django_time * 1000:8.2f} ms per render")
+        self.stdout.write(f"  Jinja2 macros:    {jinja_time * 1000:8.2f} ms per render")
+        self.stdout.write(self.style.SUCCESS(f"  Speedup: {django_time / jinja_time:.1f}x"))
+
+    def render_django(self, sections):
+        # Same includes as startpage.html, relative to the page template
+        preview = ''.join(
+            render_to_string('components/cards/_section.html', {'section': sec, 'is_preview': True})
+            for sec in sections[:PREVIEW_COUNT]
+        )
+        grid = ''.join(render_to_string('components/cards/_section.html', {'section': sec}) for sec in sections)
+        return {'preview': preview, 'grid': grid}
+
+    def time(self, func, rounds):
+        func() # Warm up template caches
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - start) / rounds
@@ -0,0 +1,38 @@
+# startpages/management/commands/cache_stats.py
+
+from django.core.management.base import BaseCommand
+from startpages.cache import family_stats, metrics
+
+
+def _format(value, spec, suffix=''):
+    return '-' if value is None else f'{value:{spec}}{suffix}'
+
+
+class Command(BaseCommand):
+    help = 'Shows hit ratio, latency, value size and compression savings per cache family (summed over all processes).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clears the counters after showing them.')
+
+    def handle(self, *args, **options):
+        # 1. Counters of every family registered at import time
+        stats = family_stats()
+        if not stats:
+            self.stdout.write('No cache families registered.')
+            return
+
+        self.stdout.write(
+            f"{'family':<16} {'hits':>9} {'misses':>9} {'hit %':>7} {'get ms':>8} {'set ms':>8} {'avg size':>9} {'saved vs pickle':>18}"
+        )
+        for family, row in sorted(stats.items()):
+            self.stdout.write(
+                f"{family:<16} {row['hits']:>9} {row['misses']:>9} {_format(row['hit_ratio'], '.1%'):>7} "
+                f"{_format(row['avg_get_ms'], '.2f'):>8} {_format(row['avg_set_ms'], '.2f'):>8} "
+                f"{_format(row['avg_value_bytes'], 'd', ' B'):>9} "
+                f"{row['saved_bytes']:>9} B ({_format(row['saved_ratio'], '.0%')})"
+            )
+
+        # 2. Optionally start a new measurement window
+        if options['reset']:
+            metrics.reset()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
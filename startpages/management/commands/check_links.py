@@ -0,0 +1,82 @@
+# startpages/management/commands/check_links.py
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from startpages.linkcheck import check_urls
+from startpages.models import Link
+
+UPDATE_BATCH_SIZE = 1000
+# Due links per round of checking and storing
+CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Checks every distinct link URL (asyncio, pooled connections) and stores status, check time and latency on the links.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-hours', type=int, default=24, help='Only check links not checked in this many hours (0 = all).')
+        parser.add_argument('--concurrency', type=int, default=100, help='Maximum requests in flight.')
+        parser.add_argument('--per-host', type=int, default=4, help='Maximum concurrent requests to one host.')
+        parser.add_argument('--timeout', type=float, default=10, help='Seconds per request.')
+        parser.add_argument('--url', action='append', default=[], help='Check only this URL and print the result (nothing is stored). Repeatable.')
+
+    def handle(self, *args, **options):
+        check_options = {
+            'concurrency': options['concurrency'],
+            'per_host': options['per_host'],
+            'timeout': options['timeout'],
+        }
+
+        if options['url']:
+            for result in check_urls(options['url'], **check_options):
+                self.stdout.write(f"{result.status:>3}  {result.latency_ms if result.latency_ms is not None else '-':>6} ms  {result.url}")
+            return
+
+        # Links are due when unchecked or checked before the cutoff, so every chunk stored drops out of the due set
+        started = timezone.now()
+        cutoff = started - timedelta(hours=options['stale_hours'])
+        due = Link.objects.filter(Q(checked_at__isnull=True) | Q(checked_at__lt=cutoff))
+
+        start = time.monotonic()
+        checked = stored = broken = 0
+        last_id = 0
+        while True:
+            # 1. The next chunk of due links, by id, and the distinct URLs they use
+            chunk = list(due.filter(id__gt=last_id).order_by('id').values_list('id', 'url')[:CHUNK_SIZE])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            urls = {url for _, url in chunk}
+
+            # 2. Check each URL once, however many links point to it
+            results = {result.url: result for result in check_urls(urls, **check_options)}
+
+            # 3. Store the results on every due link with these URLs, also those in later chunks,
+            #    so a URL is checked once per run. Committed per chunk: a crash only loses the current one
+            checked_at = timezone.now()
+            matching = due.filter(url__in=urls).order_by('id').values_list('id', 'url')
+            while True:
+                # Stored links are no longer due, so the next page starts after them
+                page = list(matching[:UPDATE_BATCH_SIZE])
+                if not page:
+                    break
+                Link.objects.bulk_update([
+                    Link(id=link_id, check_status=results[url].status, latency_ms=results[url].latency_ms, checked_at=checked_at)
+                    for link_id, url in page
+                ], ['check_status', 'latency_ms', 'checked_at'])
+                stored += len(page)
+
+            checked += len(results)
+            broken += sum(1 for result in results.values() if result.status == 0 or result.status >= 400)
+            self.stdout.write(f"Checked {checked} distinct URLs ({stored} links)...")
+
+        if not checked:
+            self.stdout.write(self.style.SUCCESS('No links due for a check.'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} URLs ({stored} links) in {time.monotonic() - start:.1f}s, {broken} broken."
+        ))
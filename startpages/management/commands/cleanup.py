@@ -0,0 +1,54 @@
+# startpages/management/commands/cleanup.py
+
+from datetime import timedelta
+from django.contrib.sessions.models import Session
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+from allauth.account import app_settings as account_settings # pyright: ignore[reportMissingImports]
+from allauth.account.models import EmailConfirmation # pyright: ignore[reportMissingImports]
+from startpages.models import QueuedEmail
+from startpages.services import CleanupService
+
+class Command(BaseCommand):
+    help = 'Deletes expired sessions, stale email confirmations, orphaned avatar files and delivered queued mail in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per DELETE (default 1000).')
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to sleep between batches (default 0.1).')
+        parser.add_argument('--avatar-grace-hours', type=int, default=24, help='Keep unreferenced avatars younger than this.')
+        parser.add_argument('--sent-mail-days', type=int, default=7, help='Keep delivered queued mail for this many days.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch = {'batch_size': options['batch_size'], 'pause': options['pause']}
+        dry_run = options['dry_run']
+
+        # 1. Expired sessions (what clearsessions does, without one long DELETE)
+        sessions = Session.objects.filter(expire_date__lt=now)
+        count = sessions.count() if dry_run else CleanupService.delete_in_batches(sessions, **batch)
+        self.stdout.write(f"Sessions: {count} expired row(s) {'to delete' if dry_run else 'deleted'}.")
+
+        # 2. Email confirmations past allauth's expiry
+        expired_before = now - timedelta(days=account_settings.EMAIL_CONFIRMATION_EXPIRE_DAYS)
+        confirmations = EmailConfirmation.objects.filter(created__lt=expired_before)
+        count = confirmations.count() if dry_run else CleanupService.delete_in_batches(confirmations, **batch)
+        self.stdout.write(f"Email confirmations: {count} stale row(s) {'to delete' if dry_run else 'deleted'}.")
+
+        # 3. Avatar files no profile points to anymore (replaced or removed avatars)
+        files, reclaimed = 0, 0
+        for name, size in CleanupService.orphaned_avatars(grace=timedelta(hours=options['avatar_grace_hours'])):
+            if not dry_run:
+                default_storage.delete(name)
+            files += 1
+            reclaimed += size
+        self.stdout.write(f"Avatars: {files} orphaned file(s), {filesizeformat(reclaimed)} {'to reclaim' if dry_run else 'reclaimed'}.")
+
+        # 4. Delivered mail from the queue (failed messages stay for inspection in the admin)
+        sent_mail = QueuedEmail.objects.filter(status=QueuedEmail.SENT, sent_at__lt=now - timedelta(days=options['sent_mail_days']))
+        count = sent_mail.count() if dry_run else CleanupService.delete_in_batches(sent_mail, **batch)
+        self.stdout.write(f"Queued mail: {count} delivered message(s) {'to delete' if dry_run else 'deleted'}.")
+
+        self.stdout.write(self.style.SUCCESS('Cleanup finished.'))
@@ -0,0 +1,110 @@
+# startpages/management/commands/fast_boot.py
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+FINGERPRINT_FILE = '.boot_fingerprint.json'
+
+# Directories that feed tailwind and collectstatic, relative to BASE_DIR
+STATIC_INPUT_DIRS = [
+    'templates',
+    'static',
+    'theme/templates',
+    'theme/static_src',
+]
+
+SKIPPED_DIRS = {'node_modules', '__pycache__', '.git'}
+
+
+def fingerprint_static_inputs(base_dir):
+    """
+    Hashes the content of every file tailwind or collectstatic reads, together
+    with the Django version and INSTALLED_APPS (app static files change with them).
+    """
+    digest = hashlib.sha256()
+    digest.update(django.get_version().encode())
+    digest.update('\n'.join(settings.INSTALLED_APPS).encode())
+
+    for rel_dir in STATIC_INPUT_DIRS:
+        root = Path(base_dir) / rel_dir
+        if not root.exists():
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            # Sort in place so the walk order (and thus the hash) is stable
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS)
+            for filename in sorted(filenames):
+                path = Path(dirpath) / filename
+                digest.update(str(path.relative_to(base_dir)).encode())
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(65536), b''):
+                        digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS):
+    """Returns the list of (app_label, name) migrations not yet applied."""
+    connection = connections[database]
+    executor = MigrationExecutor(connection)
+    targets = executor.loader.graph.leaf_nodes()
+    plan = executor.migration_plan(targets)
+    return [(migration.app_label, migration.name) for migration, backwards in plan]
+
+
+class Command(BaseCommand):
+    help = 'Prepares the container for serving: migrates and rebuilds static files only when their inputs changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild static files even if the fingerprint matches.')
+        parser.add_argument('--skip-migrate', action='store_true', help='Do not check or apply migrations.')
+        parser.add_argument('--skip-static', action='store_true', help='Do not check or rebuild static files.')
+
+    def handle(self, *args, **options):
+        # 1. Migrations: only run the (slow) migrate command when something is pending
+        if not options['skip_migrate']:
+            pending = pending_migrations()
+            if pending:
+                self.stdout.write(f"Applying {len(pending)} pending migration(s)...")
+                call_command('migrate', interactive=False, verbosity=1)
+            else:
+                self.stdout.write(self.style.SUCCESS('Migrations up to date. Skipping migrate.'))
+
+        if options['skip_static']:
+            return
+
+        # 2. Static files: compare the input fingerprint with the one stored next to the collected files
+        static_root = Path(settings.STATIC_ROOT)
+        fingerprint_path = static_root / FINGERPRINT_FILE
+        current = fingerprint_static_inputs(settings.BASE_DIR)
+
+        stored = None
+        if fingerprint_path.exists():
+            try:
+                stored = json.loads(fingerprint_path.read_text()).get('static')
+            except (ValueError, OSError):
+                stored = None
+
+        # A wiped static volume also loses the fingerprint file, so this forces a rebuild
+        if stored == current and not options['force']:
+            self.stdout.write(self.style.SUCCESS('Static inputs unchanged. Skipping tailwind build and collectstatic.'))
+            return
+
+        self.stdout.write('Static inputs changed. Compiling tailwind...')
+        call_command('tailwind', 'build')
+
+        self.stdout.write('Collecting static files...')
+        call_command('collectstatic', interactive=False, clear=True, verbosity=0)
+
+        # collectstatic --clear wipes the directory, so write the fingerprint afterwards
+        static_root.mkdir(parents=True, exist_ok=True)
+        fingerprint_path.write_text(json.dumps({'static': current}))
+        self.stdout.write(self.style.SUCCESS('Static files rebuilt.'))
@@ -0,0 +1,17 @@
+# startpages/management/commands/prune_changelog.py
+
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from startpages.services import ChangeLogService
+
+class Command(BaseCommand):
+    help = 'Deletes change-log entries older than --days. Clients that synced before then do a full reload.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ChangeLogService.RETENTION_DAYS, help=f'Keep entries of the last N days (default {ChangeLogService.RETENTION_DAYS}).')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted = ChangeLogService.prune(cutoff)
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} change-log entries older than {cutoff:%Y-%m-%d %H:%M}.'))
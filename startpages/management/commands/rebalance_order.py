@@ -0,0 +1,13 @@
+# startpages/management/commands/rebalance_order.py
+
+from django.core.management.base import BaseCommand
+from startpages.models import Section, Link
+from startpages.services import OrderService
+
+class Command(BaseCommand):
+    help = 'Respaces the order keys of sections and links whose neighbours have run out of room.'
+
+    def handle(self, *args, **options):
+        pages = OrderService.rebalance_crowded(Section, 'page_id')
+        sections = OrderService.rebalance_crowded(Link, 'section_id')
+        self.stdout.write(self.style.SUCCESS(f'Rebalanced sections on {pages} page(s) and links in {sections} section(s).'))
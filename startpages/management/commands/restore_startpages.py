@@ -0,0 +1,33 @@
+# startpages/management/commands/restore_startpages.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from startpages.backup import Restore
+
+
+class Command(BaseCommand):
+    help = 'Loads a backup_startpages file into this database in one transaction. Existing users (same username, or a verified email of another account) are skipped with their data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Backup file written by backup_startpages.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk INSERT.')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+
+        def report(type_, created, skipped):
+            self.stdout.write(f"  {type_:<10} {created:>10} created" + (f", {skipped} skipped" if skipped else ''))
+
+        restore = Restore(batch_size=options['batch_size'])
+        self.stdout.write(f"Restoring {options['path']}...")
+        try:
+            restore.run(options['path'], on_table=report)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Restore failed, nothing was written: {e}")
+
+        for user_id, email in restore.email_conflicts.items():
+            self.stdout.write(self.style.WARNING(f"  Skipped user {restore.usernames[user_id]}: {email} is verified by another account here."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {sum(restore.created.values())} records in {time.monotonic() - start:.1f}s."
+        ))
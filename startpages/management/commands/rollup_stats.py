@@ -0,0 +1,43 @@
+# startpages/management/commands/rollup_stats.py
+
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from startpages.services import StatsService
+
+class Command(BaseCommand):
+    help = 'Fills the daily statistics table. Without options only the days since the last rollup are computed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Backfill: recompute the last N days (up to yesterday).')
+        parser.add_argument('--since', help='Backfill: recompute every day from this date (YYYY-MM-DD) up to yesterday.')
+
+    def handle(self, *args, **options):
+        yesterday = StatsService.yesterday()
+
+        if options['days'] or options['since']:
+            if options['since']:
+                try:
+                    day = date.fromisoformat(options['since'])
+                except ValueError:
+                    raise CommandError('--since must be a date like 2026-01-31.')
+            else:
+                day = yesterday - timedelta(days=options['days'] - 1)
+
+            # Activity comes from the change log, days it no longer fully covers are left as they are
+            first_complete_day = StatsService.first_complete_day()
+            count = skipped = 0
+            while day <= yesterday:
+                if StatsService.rollup_day(day, first_complete_day) is None:
+                    skipped += 1
+                else:
+                    count += 1
+                day += timedelta(days=1)
+            if skipped:
+                self.stdout.write(self.style.WARNING(
+                    f'Skipped {skipped} day(s) before {first_complete_day}: their change log has been pruned, the stored rows were kept.'
+                ))
+            self.stdout.write(self.style.SUCCESS(f'Recomputed statistics for {count} day(s).'))
+            return
+
+        rows = StatsService.rollup_pending()
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {len(rows)} new day(s).'))
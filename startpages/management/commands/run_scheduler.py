@@ -0,0 +1,125 @@
+# startpages/management/commands/run_scheduler.py
+
+import signal
+import threading
+import time
+import traceback
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from startpages.scheduler import (
+    load_jobs, jitter_delay, claim_run, lock_running, unlock_running, record_metrics, get_metrics,
+)
+
+# Longest sleep between checks, keeps shutdown and clock changes responsive
+MAX_SLEEP_SECONDS = 30
+
+
+class Command(BaseCommand):
+    help = 'Runs the jobs in settings.SCHEDULED_JOBS on their cron schedules inside one long-lived Django process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help='Show the registered jobs and their next run, then exit.')
+        parser.add_argument('--status', action='store_true', help='Show the run metrics of every job, then exit.')
+        parser.add_argument('--run', metavar='JOB', help='Run one job now (still respecting the overlap lock), then exit.')
+
+    def handle(self, *args, **options):
+        self.jobs = load_jobs()
+        now = timezone.now()
+        for job in self.jobs:
+            job.schedule_next(now)
+
+        if options['list']:
+            for job in self.jobs:
+                self.stdout.write(f"{job.name:<20} {str(job.schedule):<16} next {timezone.localtime(job.next_run):%Y-%m-%d %H:%M}  {job.command} {' '.join(job.args)}")
+            return
+
+        if options['status']:
+            for job in self.jobs:
+                metrics = get_metrics(job)
+                if not metrics:
+                    self.stdout.write(f"{job.name:<20} never ran")
+                    continue
+                average = metrics['total_seconds'] / metrics['runs']
+                self.stdout.write(
+                    f"{job.name:<20} {metrics['last_status']:<7} last {metrics['last_started'][:16]} ({metrics['last_seconds']}s), "
+                    f"{metrics['runs']} runs, {metrics['failures']} failed, avg {average:.1f}s, max {metrics['max_seconds']:.1f}s"
+                )
+            return
+
+        if options['run']:
+            job = next((job for job in self.jobs if job.name == options['run']), None)
+            if not job:
+                raise CommandError(f"Unknown job '{options['run']}'.")
+            self.run_job(job)
+            return
+
+        self.loop()
+
+    def loop(self):
+        # 1. Graceful shutdown: finish the running job, then exit
+        self.stopping = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.request_stop)
+
+        self.stdout.write(self.style.SUCCESS(f"Scheduler started with {len(self.jobs)} job(s)."))
+        for job in self.jobs:
+            self.stdout.write(f"  {job.name}: '{job.schedule}', next run {timezone.localtime(job.next_run):%Y-%m-%d %H:%M}")
+
+        while not self.stopping.is_set():
+            # 2. Run every job that is due, in order of its scheduled time
+            now = timezone.now()
+            for job in sorted(self.jobs, key=lambda job: job.next_run):
+                if self.stopping.is_set() or job.next_run > now:
+                    break
+                slot = job.next_run
+                job.schedule_next(now)
+
+                # Jitter spreads jobs due at the same minute; the slot claim makes sure
+                # only one replica runs this occurrence
+                if self.stopping.wait(jitter_delay(job)):
+                    break
+                if not claim_run(job, slot):
+                    self.stdout.write(f"[{job.name}] {slot:%H:%M} run already claimed by another scheduler.")
+                    continue
+                self.run_job(job)
+
+            # 3. Sleep until the next job is due
+            next_run = min((job.next_run for job in self.jobs), default=None)
+            wait = (next_run - timezone.now()).total_seconds() if next_run else MAX_SLEEP_SECONDS
+            self.stopping.wait(min(max(wait, 0.1), MAX_SLEEP_SECONDS))
+
+        self.stdout.write(self.style.SUCCESS('Scheduler stopped.'))
+
+    def request_stop(self, signum, frame):
+        self.stdout.write(self.style.WARNING(f"Received signal {signum}, stopping after the current job..."))
+        self.stopping.set()
+
+    def run_job(self, job):
+        token = lock_running(job)
+        if not token:
+            self.stdout.write(self.style.WARNING(f"[{job.name}] Previous run still in progress. Skipping."))
+            return
+
+        started_at = timezone.now()
+        start = time.monotonic()
+        status, error = 'ok', ''
+        self.stdout.write(f"[{job.name}] Starting.")
+        try:
+            # The process lives for days, don't reuse connections the database already dropped
+            close_old_connections()
+            call_command(job.command, *job.args, stdout=self.stdout, stderr=self.stderr)
+        except Exception as e:
+            status, error = 'failed', f"{e.__class__.__name__}: {e}"
+            self.stdout.write(self.style.ERROR(f"[{job.name}] Failed: {error}"))
+            self.stderr.write(traceback.format_exc())
+        finally:
+            close_old_connections()
+            unlock_running(job, token)
+
+        duration = time.monotonic() - start
+        record_metrics(job, started_at, duration, status, error)
+        style = self.style.SUCCESS if status == 'ok' else self.style.ERROR
+        self.stdout.write(style(f"[{job.name}] Finished ({status}) in {duration:.1f}s. Next run {timezone.localtime(job.next_run):%Y-%m-%d %H:%M}."))
@@ -6,7 +6,8 @@ from django.template.loader import render_to_string
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.conf import settings as django_settings
-from startpages.models import GlobalSettings
+from startpages.models import GlobalSettings, DailyStats
+from startpages.services import StatsService
 from datetime import timedelta
 
 class Command(BaseCommand):
@@ -20,6 +21,9 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Could not load GlobalSettings: {e}'))
             return
 
+        # Keep the statistics rollup current, also when the mail itself is disabled
+        StatsService.rollup_pending()
+
         if not settings.DAILY_MAIL_ACTIVE:
             self.stdout.write(self.style.WARNING('Daily Mail is disabled in GlobalSettings. Skipping.'))
             return
@@ -34,31 +38,40 @@ class Command(BaseCommand):
         
         # Get start of yesterday (00:00:00)
         yesterday_midnight = today_midnight - timedelta(days=1)
+
+        # Yesterday's counters come from the rollup table (filled above), not from the big tables
+        stats = DailyStats.objects.get(date=yesterday_midnight.date())
         
         context = {
             # Date format: "12 January"
             'date': yesterday_midnight.strftime('%d %B'),
+            'stats': stats,
+            'stats_rows': [
+                ('Active users', stats.active_users),
+                ('Edits', stats.edits),
+                ('Pages created', stats.pages_created),
+                ('Sections created', stats.sections_created),
+                ('Links created', stats.links_created),
+            ],
             'include_registrations': settings.DAILY_MAIL_INCLUDE_REGISTRATIONS,
             'registrations': [],
-            'registrations_count': 0,
+            'registrations_count': stats.new_users,
         }
 
         # Track if there is any content to send
-        has_updates = False
+        has_updates = stats.edits > 0
 
         # 3. Gather Registrations
         if settings.DAILY_MAIL_INCLUDE_REGISTRATIONS:
-            # Filter for: Yesterday 00:00 <= date_joined < Today 00:00
-            new_users = User.objects.filter(
-                date_joined__gte=yesterday_midnight,
-                date_joined__lt=today_midnight
-            ).order_by('-date_joined')
-            
-            count = new_users.count()
-            context['registrations'] = new_users
-            context['registrations_count'] = count
-            
+            count = stats.new_users
+
             if count > 0:
+                # Only the list itself is queried, and only when there is something to list
+                # Filter for: Yesterday 00:00 <= date_joined < Today 00:00
+                context['registrations'] = User.objects.filter(
+                    date_joined__gte=yesterday_midnight,
+                    date_joined__lt=today_midnight
+                ).order_by('-date_joined')
                 has_updates = True
             
             self.stdout.write(f"Reporting on date: {context['date']}")
@@ -0,0 +1,76 @@
+# startpages/management/commands/send_queued_mail.py
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.conf import settings
+from startpages.mail import MailSender
+from startpages.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    help = 'Delivers the mail queued by QueuedEmailBackend over one persistent SMTP connection, with retries and rate limiting.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send everything that is due, then exit.')
+        parser.add_argument('--status', action='store_true', help='Show the queue size per status, then exit.')
+        parser.add_argument('--retry-failed', action='store_true', help='Queue permanently failed messages again, then exit.')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            for status, label in QueuedEmail.STATUSES:
+                self.stdout.write(f"{label:<8} {QueuedEmail.objects.filter(status=status).count()}")
+            return
+
+        if options['retry_failed']:
+            count = QueuedEmail.objects.filter(status=QueuedEmail.FAILED).update(status=QueuedEmail.PENDING, attempts=0)
+            self.stdout.write(self.style.SUCCESS(f"{count} message(s) queued again."))
+            return
+
+        sender = MailSender(stdout=self.stdout)
+        try:
+            if options['once']:
+                self.drain(sender)
+            else:
+                self.loop(sender)
+        finally:
+            sender.close()
+
+    def drain(self, sender):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = sender.run_once()
+            if not sent and not failed:
+                break
+            total_sent += sent
+            total_failed += failed
+        self.stdout.write(self.style.SUCCESS(f"Sent {total_sent} message(s), {total_failed} failed attempt(s)."))
+
+    def loop(self, sender):
+        # 1. Graceful shutdown: finish the current message, then exit
+        self.stopping = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.request_stop)
+        poll = getattr(settings, 'EMAIL_QUEUE_POLL_SECONDS', 2)
+        self.stdout.write(self.style.SUCCESS(f"Mail sender started, polling every {poll}s."))
+
+        while not self.stopping.is_set():
+            # 2. Send what is due; a full batch means there may be more, so don't sleep
+            close_old_connections()
+            sent, failed = sender.run_once(self.stopping)
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} message(s), {failed} failed attempt(s).")
+            if sent + failed >= sender.batch_size:
+                continue
+
+            # 3. Idle: drop the SMTP connection before the server does, then wait
+            sender.close_if_idle()
+            self.stopping.wait(poll)
+
+        self.stdout.write(self.style.SUCCESS('Mail sender stopped.'))
+
+    def request_stop(self, signum, frame):
+        self.stdout.write(self.style.WARNING(f"Received signal {signum}, stopping after the current message..."))
+        self.stopping.set()
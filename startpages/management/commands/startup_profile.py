@@ -0,0 +1,79 @@
+# startpages/management/commands/startup_profile.py
+
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, so nothing this process already imported skews the numbers
+BOOT_SCRIPT = """
+import time
+start = time.perf_counter()
+import django
+django.setup()
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def run_boot(importtime=False):
+    """Boots Django in a subprocess; returns (milliseconds for django.setup(), stderr)."""
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', BOOT_SCRIPT]
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'project.settings')}
+    result = subprocess.run(command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise CommandError(f"Boot failed:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Sums the self time of every imported module per top-level package.
+    Lines look like "import time:       412 |       1337 |   django.conf".
+    """
+    packages = defaultdict(lambda: {'self_us': 0, 'modules': 0})
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _cumulative, name = line[len('import time:'):].split('|', 2)
+        package = packages[name.strip().split('.')[0]]
+        package['self_us'] += int(self_us)
+        package['modules'] += 1
+    return packages
+
+
+class Command(BaseCommand):
+    help = 'Reports the per-package import time of a fresh Django boot and fails if django.setup() exceeds the budget.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Timed boots; the median is compared with the budget.')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list in the import breakdown.')
+        parser.add_argument('--budget-ms', type=float, default=None, help='Overrides settings.STARTUP_BUDGET_MS.')
+
+    def handle(self, *args, **options):
+        budget = options['budget_ms'] if options['budget_ms'] is not None else getattr(settings, 'STARTUP_BUDGET_MS', 1500)
+
+        # 1. Import breakdown (-X importtime slows the boot down, so it is not used for the timing)
+        _, stderr = run_boot(importtime=True)
+        packages = parse_importtime(stderr)
+        total_us = sum(package['self_us'] for package in packages.values())
+
+        self.stdout.write(f"{'package':<30} {'modules':>8} {'ms':>9} {'share':>7}")
+        ranked = sorted(packages.items(), key=lambda item: item[1]['self_us'], reverse=True)
+        for name, package in ranked[:options['top']]:
+            self.stdout.write(
+                f"{name:<30} {package['modules']:>8} {package['self_us'] / 1000:>9.1f} {package['self_us'] / total_us:>7.1%}"
+            )
+        self.stdout.write(f"{'total':<30} {sum(p['modules'] for p in packages.values()):>8} {total_us / 1000:>9.1f}")
+
+        # 2. Boot time without instrumentation
+        timings = [run_boot()[0] for _ in range(max(options['runs'], 1))]
+        boot_ms = statistics.median(timings)
+        self.stdout.write(f"\ndjango.setup(): {boot_ms:.0f} ms median of {len(timings)} (min {min(timings):.0f}, max {max(timings):.0f}), budget {budget:.0f} ms")
+
+        if boot_ms > budget:
+            raise CommandError(f"Boot time {boot_ms:.0f} ms exceeds the budget of {budget:.0f} ms.")
+        self.stdout.write(self.style.SUCCESS('Boot time within budget.'))
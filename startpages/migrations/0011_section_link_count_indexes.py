@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_link_counts(apps, schema_editor):
+    Section = apps.get_model('startpages', 'Section')
+    Link = apps.get_model('startpages', 'Link')
+    counts = Link.objects.filter(section=models.OuterRef('pk')).order_by().values('section').annotate(
+        c=models.Count('id')
+    ).values('c')
+    Section.objects.update(link_count=Coalesce(models.Subquery(counts), 0))
+
+
+def keep_single_default_page(apps, schema_editor):
+    # The new constraint fails if a user still has several default pages, keep the lowest id
+    StartPage = apps.get_model('startpages', 'StartPage')
+    keep_ids = StartPage.objects.filter(is_default=True).values('user').annotate(keep=models.Min('id')).values('keep')
+    StartPage.objects.filter(is_default=True).exclude(id__in=keep_ids).update(is_default=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startpages', '0010_alter_colorscheme_options_colorscheme_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='link_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Maintained by Link signals'),
+        ),
+        migrations.RunPython(backfill_link_counts, migrations.RunPython.noop),
+        migrations.RunPython(keep_single_default_page, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(fields=['section', 'order'], name='link_section_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['page', 'order'], name='section_page_order_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='startpage',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('user',), name='startpage_one_default_per_user'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:38
+
+from django.db import migrations, models
+
+ORDER_GAP = 1024.0
+
+
+def spread_orders(apps, schema_editor):
+    # Dense 0..n positions become (n + 1) * ORDER_GAP, leaving room to insert between siblings
+    for model_name in ('Section', 'Link'):
+        model = apps.get_model('startpages', model_name)
+        model.objects.update(order=(models.F('order') + 1) * ORDER_GAP)
+
+
+def compact_orders(apps, schema_editor):
+    for model_name in ('Section', 'Link'):
+        model = apps.get_model('startpages', model_name)
+        model.objects.update(order=models.F('order') / ORDER_GAP - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startpages', '0011_section_link_count_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='link',
+            name='order',
+            field=models.FloatField(default=0, help_text='Lower numbers appear first'),
+        ),
+        migrations.AlterField(
+            model_name='section',
+            name='order',
+            field=models.FloatField(default=0, help_text='Lower numbers appear first'),
+        ),
+        migrations.RunPython(spread_orders, compact_orders),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startpages', '0013_changelogentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='startpage',
+            name='share_token',
+            field=models.CharField(blank=True, editable=False, help_text='Set when the page is shared publicly (read-only)', max_length=64, null=True, unique=True),
+        ),
+    ]
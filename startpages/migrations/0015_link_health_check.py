@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startpages', '0014_startpage_share_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='check_status',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text='HTTP status of the last check, 0 if unreachable', null=True),
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='checked_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startpages', '0015_link_health_check'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0, help_text='Users who edited a page that day')),
+                ('edits', models.PositiveIntegerField(default=0, help_text='Change log entries that day')),
+                ('pages_created', models.PositiveIntegerField(default=0)),
+                ('sections_created', models.PositiveIntegerField(default=0)),
+                ('links_created', models.PositiveIntegerField(default=0)),
+                ('theme_usage', models.JSONField(default=dict, help_text='Theme name -> number of profiles, when the row was computed')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Statistics',
+                'verbose_name_plural': 'Daily Statistics',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-19 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startpages', '0016_dailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='globalsettings',
+            name='SIGNUP_TEMPLATE_PAGE',
+            field=models.ForeignKey(blank=True, help_text='If set, every new user starts with a copy of this page as their default startpage.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='startpages.startpage'),
+        ),
+    ]
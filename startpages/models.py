@@ -1,12 +1,21 @@
 # startpages/models.py
 
-from django.db import models
+import secrets
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import slugify
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
-from coloraide import Color # pyright: ignore[reportMissingImports]
+from .cache import CacheFamily
+
+settings_cache = CacheFamily('settings')
+
+# Spacing between the fractional order keys of sections and links (see OrderService)
+ORDER_GAP = 1024.0
+# Enforced by OrderService.append_link and every endpoint that moves links between sections
+MAX_LINKS = 10
 
 NTFY_PRIORITIES = [
     ('max', 'Max'),
@@ -29,23 +38,32 @@ class GlobalSettings(models.Model):
     
     DAILY_MAIL_ACTIVE = models.BooleanField(default=True, help_text="If active, daily mails are enabled.")
     DAILY_MAIL_INCLUDE_REGISTRATIONS = models.BooleanField(default=True, help_text="If active, daily mails include registrations.")
+
+    SIGNUP_TEMPLATE_PAGE = models.ForeignKey(
+        'StartPage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="If set, every new user starts with a copy of this page as their default startpage."
+    )
     
     def save(self, *args, **kwargs):
         self.pk = 1 # Force singleton
         super().save(*args, **kwargs)
-        cache.set('global_settings', self)
+        settings_cache.set('global', self)
 
     def delete(self, *args, **kwargs):
         pass # Prevent deletion
     
     @classmethod
     def load(cls):
-        if cache.get('global_settings') is None:
+        obj = settings_cache.get('global')
+        if obj is None:
             obj, created = cls.objects.get_or_create(pk=1)
             if not created:
-                cache.set('global_settings', obj)
-            return obj
-        return cache.get('global_settings')
+                settings_cache.set('global', obj)
+        return obj
 
     def __str__(self):
         return "Global Settings"
@@ -78,6 +96,9 @@ class ColorScheme(models.Model):
                 '--color-primary-400'
             ]
 
+        # Import inside function, coloraide is only needed for the theme previews (admin, profile)
+        from coloraide import Color # pyright: ignore[reportMissingImports]
+
         hex_colors = []
         for var_name in variable_names:
             oklch_value = self.css_variables.get(var_name, 'black')
@@ -108,6 +129,16 @@ class Profile(models.Model):
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+
+@receiver(post_save, sender=User)
+def create_starter_page(sender, instance, created, **kwargs):
+    if created:
+        # By id, the cached settings may still point to a page deleted since
+        template = StartPage.objects.filter(id=GlobalSettings.load().SIGNUP_TEMPLATE_PAGE_id).first()
+        if template:
+            # Import inside function to avoid circular dependency
+            from .services import StartPageService
+            StartPageService.clone_page(template, instance, is_default=True)
         
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
@@ -134,20 +165,71 @@ class StartPage(models.Model):
     title = models.CharField(max_length=100, default="My Startpage")
     slug = models.SlugField(unique=True, editable=False, max_length=255)
     is_default = models.BooleanField(default=False)
+    share_token = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False, help_text="Set when the page is shared publicly (read-only)")
 
     class Meta:
         unique_together = ('user', 'title')
         verbose_name = "Start Page"
         verbose_name_plural = "Start Pages"
+        constraints = [
+            # At most one default page per user; also serves as the index for the default-page lookup
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(is_default=True),
+                name='startpage_one_default_per_user',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_default = instance.is_default
+        instance._loaded_title = instance.__dict__.get('title')
+        return instance
         
     def save(self, *args, **kwargs):
-        if self.title:
+        # The slug follows the title, so it is only derived again when the title changes
+        if not self.title or (self.slug and self.title == getattr(self, '_loaded_title', None)):
+            self._save(*args, **kwargs)
+        else:
+            # Slugs are unique across all users. Copies of one page (e.g. the signup template) collide
+            # on the plain slug; the insert is tried in a savepoint and retried once with a random suffix
             self.slug = slugify(self.title)
-            
-        if self.is_default:
-            StartPage.objects.filter(user=self.user, is_default=True).exclude(id=self.id).update(is_default=False)
-            
-        super().save(*args, **kwargs)
+            try:
+                with transaction.atomic():
+                    self._save(*args, **kwargs)
+            except IntegrityError:
+                if not StartPage.objects.filter(slug=self.slug).exclude(id=self.id).exists():
+                    raise
+                self.slug = self.suffixed_slug(self.slug)
+                self._save(*args, **kwargs)
+        self._loaded_title = self.title
+
+    def _save(self, *args, **kwargs):
+        # Only demote the previous default when this page becomes the default
+        becomes_default = self.is_default and not getattr(self, '_loaded_is_default', False)
+
+        if becomes_default:
+            with transaction.atomic():
+                StartPage.objects.filter(user=self.user, is_default=True).exclude(id=self.id).update(is_default=False)
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+
+        self._loaded_is_default = self.is_default
+
+    @staticmethod
+    def suffixed_slug(slug):
+        return f"{slug}-{secrets.token_hex(3)}"
+
+    def enable_sharing(self):
+        """Gives the page an unguessable public token. Calling it again rotates the token."""
+        self.share_token = secrets.token_urlsafe(24)
+        self.save(update_fields=['share_token'])
+
+    def disable_sharing(self):
+        self.share_token = None
+        self.save(update_fields=['share_token'])
           
     def __str__(self):
         return self.title
@@ -155,10 +237,24 @@ class StartPage(models.Model):
 class Section(models.Model):
     page = models.ForeignKey(StartPage, related_name='sections', on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
-    order = models.PositiveIntegerField(default=0, help_text="Lower numbers appear first")
+    order = models.FloatField(default=0, help_text="Lower numbers appear first")
+    link_count = models.PositiveIntegerField(default=0, editable=False, help_text="Maintained by Link signals")
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['page', 'order'], name='section_page_order_idx'),
+        ]
+
+    @staticmethod
+    def refresh_link_counts(section_ids):
+        """Recounts links for the given sections (for bulk updates that bypass signals)."""
+        counts = Link.objects.filter(section=models.OuterRef('pk')).order_by().values('section').annotate(
+            c=models.Count('id')
+        ).values('c')
+        Section.objects.filter(id__in=section_ids).update(
+            link_count=Coalesce(models.Subquery(counts), 0)
+        )
 
     def __str__(self):
         return f"{self.name} ({self.page.title})"
@@ -168,10 +264,135 @@ class Link(models.Model):
     name = models.CharField(max_length=100)
     url = models.URLField(max_length=500)
     color = models.CharField(max_length=7, null=True, blank=True, help_text="Hex color code")
-    order = models.PositiveIntegerField(default=0, help_text="Lower numbers appear first")
+    order = models.FloatField(default=0, help_text="Lower numbers appear first")
+
+    # Filled in by the check_links command (startpages/linkcheck.py)
+    check_status = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, help_text="HTTP status of the last check, 0 if unreachable")
+    checked_at = models.DateTimeField(null=True, blank=True, editable=False)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['section', 'order'], name='link_section_order_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets a save through the ORM (the admin change form) notice a move to another section; None if deferred
+        instance._loaded_section_id = instance.__dict__.get('section_id')
+        return instance
+
+    @property
+    def is_broken(self):
+        return self.check_status is not None and (self.check_status == 0 or self.check_status >= 400)
+
+    def __str__(self):
+        return self.name
+
+@receiver(post_save, sender=Link)
+def update_section_link_count(sender, instance, created, raw=False, **kwargs):
+    previous_section_id = getattr(instance, '_loaded_section_id', None)
+    instance._loaded_section_id = instance.section_id
+    if raw or (not created and previous_section_id in (None, instance.section_id)):
+        return
+    if not created:
+        Section.objects.filter(id=previous_section_id, link_count__gt=0).update(link_count=models.F('link_count') - 1)
+    Section.objects.filter(id=instance.section_id).update(link_count=models.F('link_count') + 1)
+
+@receiver(post_delete, sender=Link)
+def decrement_section_link_count(sender, instance, **kwargs):
+    Section.objects.filter(id=instance.section_id, link_count__gt=0).update(link_count=models.F('link_count') - 1)
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of page edits per user. The id doubles as the revision number
+    clients pass to /api/changes/?since=<rev> to fetch only what changed.
+    Deleting a page or section implies its children were deleted too.
+    """
+    PAGE, SECTION, LINK = 'page', 'section', 'link'
+    OBJECT_TYPES = [(PAGE, 'Page'), (SECTION, 'Section'), (LINK, 'Link')]
+
+    CREATE, UPDATE, DELETE = 'create', 'update', 'delete'
+    ACTIONS = [(CREATE, 'Create'), (UPDATE, 'Update'), (DELETE, 'Delete')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='changes')
+    object_type = models.CharField(max_length=10, choices=OBJECT_TYPES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='changelog_user_rev_idx'),
+        ]
+
+    @classmethod
+    def record(cls, user, object_type, object_ids, action):
+        """Logs one action for several objects with a single INSERT."""
+        if isinstance(object_ids, int):
+            object_ids = [object_ids]
+        user_id = user if isinstance(user, int) else user.id
+        cls.objects.bulk_create([
+            cls(user_id=user_id, object_type=object_type, object_id=int(object_id), action=action)
+            for object_id in object_ids
+        ])
+
+        # Every logged edit can change a publicly shared page of this user
+        from .sharing import purge_shared_pages
+        purge_shared_pages(user_id)
+
+    def __str__(self):
+        return f"r{self.id} {self.action} {self.object_type} {self.object_id}"
+
+class DailyStats(models.Model):
+    """
+    One row per day, filled by StatsService.rollup_day with a few aggregated queries.
+    Reports read these rows instead of scanning users, pages and links.
+    """
+    date = models.DateField(unique=True)
+    new_users = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0, help_text="Users who edited a page that day")
+    edits = models.PositiveIntegerField(default=0, help_text="Change log entries that day")
+    pages_created = models.PositiveIntegerField(default=0)
+    sections_created = models.PositiveIntegerField(default=0)
+    links_created = models.PositiveIntegerField(default=0)
+    theme_usage = models.JSONField(default=dict, help_text="Theme name -> number of profiles, when the row was computed")
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = "Daily Statistics"
+        verbose_name_plural = "Daily Statistics"
+
+    def __str__(self):
+        return f"Statistics {self.date}"
+
+class QueuedEmail(models.Model):
+    """
+    Outgoing mail written by QueuedEmailBackend (startpages/mail.py) and delivered by
+    `manage.py send_queued_mail`. The message is stored as the final MIME bytes, so the
+    sender needs no templates or user data, only an SMTP connection.
+    """
+    PENDING, SENT, FAILED = 'pending', 'sent', 'failed'
+    STATUSES = [(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255, blank=True)
+    message = models.BinaryField()
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='queuedemail_due_idx'),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
@@ -0,0 +1,141 @@
+# startpages/ratelimit.py
+
+import math
+import threading
+import time
+from functools import wraps
+from django.conf import settings
+from django.http import JsonResponse
+from .events import uses_redis
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Checks and consumes one token from every bucket in KEYS atomically.
+# ARGV holds (capacity, refill per second) per key. Returns the seconds to wait, "0" if allowed.
+TOKEN_BUCKET_LUA = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) + tonumber(now_t[2]) / 1000000
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local data = redis.call('HMGET', key, 'tokens', 'ts')
+    local t = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    t = math.min(capacity, t + math.max(0, now - ts) * rate)
+    if t < 1 then
+        wait = math.max(wait, (1 - t) / rate)
+    end
+    tokens[i] = t
+end
+if wait == 0 then
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[2 * i - 1])
+        local rate = tonumber(ARGV[2 * i])
+        redis.call('HSET', key, 'tokens', tokens[i] - 1, 'ts', now)
+        redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    end
+end
+return tostring(wait)
+"""
+
+
+def parse_rate(rate):
+    """'30/m' or '5/5m' -> (capacity, tokens refilled per second)."""
+    count, period = rate.split('/')
+    unit = period[-1]
+    multiplier = int(period[:-1]) if len(period) > 1 else 1
+    seconds = multiplier * PERIODS[unit]
+    return int(count), int(count) / seconds
+
+
+class _LocalBuckets:
+    """Per-process token buckets for development and tests (no Redis)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, keys, limits):
+        now = time.monotonic()
+        with self._lock:
+            wait = 0
+            tokens = []
+            for key, (capacity, rate) in zip(keys, limits):
+                t, ts = self._buckets.get(key, (capacity, now))
+                t = min(capacity, t + (now - ts) * rate)
+                if t < 1:
+                    wait = max(wait, (1 - t) / rate)
+                tokens.append(t)
+            if wait == 0:
+                for key, t in zip(keys, tokens):
+                    self._buckets[key] = (t - 1, now)
+            return wait
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+local_buckets = _LocalBuckets()
+_redis_script = None
+
+
+def _take_redis(keys, limits):
+    global _redis_script
+    from django_redis import get_redis_connection # pyright: ignore[reportMissingImports]
+    if _redis_script is None:
+        _redis_script = get_redis_connection('default').register_script(TOKEN_BUCKET_LUA)
+    args = [value for limit in limits for value in limit]
+    return float(_redis_script(keys=keys, args=args))
+
+
+def client_ip(request):
+    """
+    Every proxy in front of Django appends the address it got the request from to X-Forwarded-For.
+    With RATE_LIMIT_TRUSTED_PROXIES of them (the bundled nginx, plus e.g. a TLS terminator in front
+    of it) the client is the entry the outermost one added; anything before it is sent by the client.
+    """
+    trusted = getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 1)
+    forwarded = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    if trusted and forwarded:
+        return forwarded[-min(trusted, len(forwarded))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def rate_limit(name):
+    """
+    Throttles a view with two token buckets, one per user and one per client IP.
+    Limits come from settings.RATE_LIMITS[name] (or 'default') as (per user, per IP) rates.
+    Over the limit the view answers 429 with a Retry-After header.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if not getattr(settings, 'RATE_LIMITS_ENABLED', True):
+                return view_func(request, *args, **kwargs)
+
+            rates = settings.RATE_LIMITS.get(name, settings.RATE_LIMITS['default'])
+            prefix = f"{getattr(settings, 'NAME', 'startpages')}:rl:{name}"
+            keys, limits = [], []
+            if request.user.is_authenticated:
+                keys.append(f"{prefix}:u:{request.user.id}")
+                limits.append(parse_rate(rates[0]))
+            keys.append(f"{prefix}:ip:{client_ip(request)}")
+            limits.append(parse_rate(rates[1]))
+
+            try:
+                wait = _take_redis(keys, limits) if uses_redis() else local_buckets.take(keys, limits)
+            except Exception as e:
+                # Fail open: an unreachable Redis must not take the editor down
+                print(f"Rate limit error: {e}")
+                wait = 0
+
+            if wait > 0:
+                response = JsonResponse({'status': 'error', 'message': 'Too many requests, slow down.'}, status=429)
+                response['Retry-After'] = str(math.ceil(wait))
+                return response
+            return view_func(request, *args, **kwargs)
+        return _wrapped
+    return decorator
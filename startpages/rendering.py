@@ -0,0 +1,90 @@
+# startpages/rendering.py
+
+import contextvars
+from itertools import islice
+from django.conf import settings
+from django.template import engines
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+CARDS_TEMPLATE = 'startpages/section_cards.html'
+PREVIEW_COUNT = 5
+
+STARTPAGE_TEMPLATE = 'startpages/pages/startpage.html'
+# Rendered in place of the sections grid, the streamed page is split around it
+GRID_MARKER = mark_safe('<!-- startpage:sections-grid -->')
+
+
+def cards_engine():
+    """The Jinja2 engine for the startpage cards, or None when STARTPAGE_JINJA2 is off."""
+    if not getattr(settings, 'STARTPAGE_JINJA2', False):
+        return None
+    return engines['jinja2']
+
+
+def streaming_enabled():
+    return getattr(settings, 'STARTPAGE_STREAMING', False)
+
+
+def render_cards(sections, engine):
+    """
+    Renders the preview row and the full grid of section cards with Jinja2 macros.
+    `sections` is evaluated once (links prefetched) and sliced in Python for the preview,
+    instead of the extra LIMIT query `sections|slice` costs in the Django template.
+    """
+    sections = list(sections)
+    template = engine.get_template(CARDS_TEMPLATE)
+    return {
+        'preview': mark_safe(template.render({'sections': sections[:PREVIEW_COUNT], 'is_preview': True})),
+        'grid': mark_safe(template.render({'sections': sections, 'is_preview': False})),
+    }
+
+
+def _grid_renderer(engine):
+    """Returns a function rendering the grid cards of a list of sections, with Jinja2 macros or the Django include."""
+    if engine:
+        template = engine.get_template(CARDS_TEMPLATE)
+        return lambda sections: template.render({'sections': sections, 'is_preview': False})
+    template = get_template('components/cards/_section.html')
+    return lambda sections: ''.join(template.render({'section': section}) for section in sections)
+
+
+def stream_startpage(request, page, engine=None, chunk_size=None):
+    """
+    Renders the startpage as an iterator of HTML chunks for a StreamingHttpResponse:
+    1. Everything up to the sections grid: <head> with the stylesheet, search bar and preview row.
+       It is rendered right away, before the response starts, so template errors still give
+       a normal error page and the CSRF cookie and consumed messages make it into the headers.
+    2. The grid, `chunk_size` sections at a time: each chunk is one query for the sections
+       and one for their links, rendered and sent before the next one is loaded.
+    3. The rest of the page.
+    """
+    chunk_size = max(chunk_size or getattr(settings, 'STARTPAGE_STREAM_CHUNK_SECTIONS', 10), PREVIEW_COUNT)
+    sections = page.sections.prefetch_related('links').iterator(chunk_size=chunk_size)
+    first = list(islice(sections, chunk_size))
+
+    context = {'page': page, 'sections': first, 'grid_marker': GRID_MARKER}
+    if engine:
+        preview = engine.get_template(CARDS_TEMPLATE).render({'sections': first[:PREVIEW_COUNT], 'is_preview': True})
+        context['cards'] = {'preview': mark_safe(preview)}
+    head, tail = render_to_string(STARTPAGE_TEMPLATE, context, request).split(GRID_MARKER)
+    render_grid = _grid_renderer(engine)
+
+    def chunks():
+        yield head
+        yield render_grid(first)
+        while batch := list(islice(sections, chunk_size)):
+            yield render_grid(batch)
+        yield tail
+
+    # The chunks are produced after the view returned; run them in the view's context,
+    # so @use_replica still applies to the queries of later chunks
+    return _run_in_context(chunks(), contextvars.copy_context())
+
+
+def _run_in_context(iterator, context):
+    while True:
+        try:
+            yield context.run(next, iterator)
+        except StopIteration:
+            return
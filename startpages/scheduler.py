@@ -0,0 +1,206 @@
+# startpages/scheduler.py
+
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .events import uses_redis
+
+# Compare-and-delete, so a job only ever releases its own lock
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_field(spec, low, high):
+    values = set()
+    for part in spec.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/')
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(v) for v in part.split('-'))
+        else:
+            start = end = int(part)
+        if start < low or end > high or step < 1:
+            raise ValueError(f"Cron field '{spec}' is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Cron:
+    """
+    Five-field cron expression ("minute hour day month weekday", weekday 0 = Sunday)
+    supporting *, numbers, ranges, lists and /steps, evaluated in the project's TIME_ZONE.
+    As in standard cron, when both day and weekday are restricted (do not start with *),
+    a day matches if either does: "0 0 1 * 1" runs on the 1st and on every Monday.
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(spec, low, high) for spec, (low, high) in zip(fields, FIELD_RANGES)
+        )
+        self.either_day = not fields[2].startswith('*') and not fields[4].startswith('*')
+
+    def matches_day(self, day):
+        day_matches = day.day in self.days
+        weekday_matches = (day.weekday() + 1) % 7 in self.weekdays
+        return (day_matches or weekday_matches) if self.either_day else (day_matches and weekday_matches)
+
+    def next_after(self, moment):
+        """First matching minute strictly after `moment` (aware datetime)."""
+        # Walk in local wall-clock time, so "0 3 * * *" stays at 03:00 across DST changes
+        candidate = timezone.localtime(moment).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        # A year of minutes covers every valid expression
+        for _ in range(366 * 24 * 60):
+            if candidate.month not in self.months or not self.matches_day(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return timezone.make_aware(candidate)
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+    def __str__(self):
+        return self.expression
+
+
+@dataclass
+class Job:
+    name: str
+    schedule: Cron
+    command: str
+    args: list = field(default_factory=list)
+    # Random delay before each run, spreads the load of many jobs (and replicas) due at the same minute
+    jitter: int = 0
+    # Upper bound of one run; the overlap lock expires after this so a crashed runner cannot block the job forever
+    timeout: int = 3600
+    next_run: datetime | None = None
+
+    def schedule_next(self, now):
+        self.next_run = self.schedule.next_after(now)
+
+
+def load_jobs():
+    """Builds the jobs registered in settings.SCHEDULED_JOBS."""
+    jobs = []
+    for name, conf in getattr(settings, 'SCHEDULED_JOBS', {}).items():
+        jobs.append(Job(
+            name=name,
+            schedule=Cron(conf['schedule']),
+            command=conf.get('command', name),
+            args=list(conf.get('args', [])),
+            jitter=conf.get('jitter', 0),
+            timeout=conf.get('timeout', 3600),
+        ))
+    return jobs
+
+
+def jitter_delay(job):
+    return random.uniform(0, job.jitter) if job.jitter else 0
+
+
+def _key(*parts):
+    return ':'.join([getattr(settings, 'NAME', 'startpages'), 'scheduler', *parts])
+
+
+class _LocalLocks:
+    """Lock fallback without Redis (development), only safe with a single scheduler process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held = {}
+
+    def acquire(self, key, token, ttl):
+        now = time.monotonic()
+        with self._lock:
+            holder = self._held.get(key)
+            if holder and holder[1] > now:
+                return False
+            self._held[key] = (token, now + ttl)
+            return True
+
+    def release(self, key, token):
+        with self._lock:
+            if self._held.get(key, (None,))[0] == token:
+                del self._held[key]
+
+
+_local_locks = _LocalLocks()
+
+
+def acquire_lock(key, ttl):
+    """Returns a token if the lock was taken, None if someone else holds it."""
+    token = uuid.uuid4().hex
+    if uses_redis():
+        from django_redis import get_redis_connection # pyright: ignore[reportMissingImports]
+        if get_redis_connection('default').set(key, token, nx=True, ex=max(int(ttl), 1)):
+            return token
+        return None
+    return token if _local_locks.acquire(key, token, ttl) else None
+
+
+def release_lock(key, token):
+    if uses_redis():
+        from django_redis import get_redis_connection # pyright: ignore[reportMissingImports]
+        get_redis_connection('default').eval(RELEASE_LOCK_LUA, 1, key, token)
+    else:
+        _local_locks.release(key, token)
+
+
+def claim_run(job, slot):
+    """
+    Claims one scheduled occurrence for this replica. Every replica computes the same
+    slot, only the first claim wins, so a job runs once per slot however many schedulers run.
+    """
+    return acquire_lock(_key(job.name, 'slot', slot.strftime('%Y%m%d%H%M')), max(job.timeout, 24 * 3600)) is not None
+
+
+def lock_running(job):
+    """Overlap prevention: held while the job runs, expires after job.timeout if the runner dies."""
+    return acquire_lock(_key(job.name, 'running'), job.timeout)
+
+
+def unlock_running(job, token):
+    release_lock(_key(job.name, 'running'), token)
+
+
+def record_metrics(job, started_at, duration, status, error=''):
+    """Keeps per-job run metrics in the cache (shown by run_scheduler --status)."""
+    key = _key('metrics', job.name)
+    metrics = cache.get(key) or {'runs': 0, 'failures': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+    metrics['runs'] += 1
+    metrics['failures'] += status != 'ok'
+    metrics['total_seconds'] += duration
+    metrics['max_seconds'] = max(metrics['max_seconds'], duration)
+    metrics.update({
+        'last_started': timezone.localtime(started_at).isoformat(),
+        'last_seconds': round(duration, 3),
+        'last_status': status,
+        'last_error': error[:500],
+    })
+    cache.set(key, metrics, None)
+    return metrics
+
+
+def get_metrics(job):
+    return cache.get(_key('metrics', job.name))
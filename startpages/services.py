@@ -1,10 +1,529 @@
 # startpages/services.py
 
 import json
-from django.db import transaction
-from .models import StartPage, Section, Link
+import os
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.db import connection, models, transaction
+from django.utils import timezone
+from .models import settings_cache, GlobalSettings, StartPage, Section, Link, ChangeLogEntry, DailyStats, Profile, ORDER_GAP, MAX_LINKS
+
+class OrderService:
+    """
+    Sections and links are ordered by a fractional key. New items are placed
+    ORDER_GAP after the last sibling, and moving an item sets its key to the
+    midpoint of its new neighbours, so only the moved row is written.
+    """
+    # Below this distance between neighbours the siblings get respaced
+    MIN_GAP = 1e-6
+
+    @staticmethod
+    def order_between(prev_order, next_order):
+        """Returns a key between two neighbours (None = list edge), or None if there is no room left."""
+        if prev_order is None and next_order is None:
+            return ORDER_GAP
+        if prev_order is None:
+            return next_order - ORDER_GAP
+        if next_order is None:
+            return prev_order + ORDER_GAP
+        if next_order - prev_order < OrderService.MIN_GAP:
+            return None
+        return (prev_order + next_order) / 2
+
+    @staticmethod
+    def rebalance(queryset):
+        """Respaces the given siblings to multiples of ORDER_GAP, keeping their current order."""
+        model = queryset.model
+        items = list(queryset.order_by('order', 'id'))
+        for index, item in enumerate(items):
+            item.order = (index + 1) * ORDER_GAP
+        model.objects.bulk_update(items, ['order'])
+
+        if items:
+            # Every respaced key changed, so synced clients need all of them
+            object_type, owner = (ChangeLogEntry.SECTION, 'page__user_id') if model is Section else (ChangeLogEntry.LINK, 'section__page__user_id')
+            user_id = model.objects.filter(id=items[0].id).values_list(owner, flat=True).first()
+            ChangeLogEntry.record(user_id, object_type, [item.id for item in items], ChangeLogEntry.UPDATE)
+        return {item.id: item.order for item in items}
+
+    @staticmethod
+    def move(item, siblings, prev_id=None, next_id=None, **extra_fields):
+        """
+        Moves `item` between the siblings with ids prev_id and next_id (either may be None
+        for the start or end of the list) and saves only that row.
+        `siblings` is the queryset of items sharing the (new) parent.
+        """
+        neighbour_ids = [i for i in (prev_id, next_id) if i is not None]
+        orders = dict(siblings.filter(id__in=neighbour_ids).values_list('id', 'order'))
+        if len(orders) != len(neighbour_ids):
+            raise ValueError("Neighbouring item not found.")
+
+        new_order = OrderService.order_between(orders.get(prev_id), orders.get(next_id))
+        if new_order is None:
+            # Out of precision between these two: respace the whole list once and retry
+            orders = OrderService.rebalance(siblings.exclude(id=item.id))
+            new_order = OrderService.order_between(orders.get(prev_id), orders.get(next_id))
+
+        type(item).objects.filter(id=item.id).update(order=new_order, **extra_fields)
+        item.order = new_order
+        return new_order
+
+    @staticmethod
+    @transaction.atomic
+    def append_link(user, section_id, name, url, color=None):
+        """
+        Adds a link after the last one of a section in one short transaction of two statements:
+        1. A conditional UPDATE claims one of the MAX_LINKS slots of the section. It takes the
+           section's row lock and re-checks the limit after waiting for it, so concurrent adds
+           line up behind each other and can never overfill the section.
+        2. INSERT ... SELECT places the link ORDER_GAP after the highest order key. It runs after
+           the lock, so it sees the links of adds that committed before and never reuses a key.
+        Returns the new Link, or None if the section is full. Raises Section.DoesNotExist if
+        the section does not exist or belongs to someone else.
+        """
+        section_table, link_table, page_table = (connection.ops.quote_name(model._meta.db_table) for model in (Section, Link, StartPage))
+        q = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {section_table} SET {q('link_count')} = {q('link_count')} + 1 "
+                f"WHERE {q('id')} = %s AND {q('link_count')} < %s "
+                f"AND {q('page_id')} IN (SELECT {q('id')} FROM {page_table} WHERE {q('user_id')} = %s)",
+                [section_id, MAX_LINKS, user.id],
+            )
+            if not cursor.rowcount:
+                if not Section.objects.filter(id=section_id, page__user=user).exists():
+                    raise Section.DoesNotExist
+                return None
+            cursor.execute(
+                f"INSERT INTO {link_table} ({q('section_id')}, {q('name')}, {q('url')}, {q('color')}, {q('order')}) "
+                f"SELECT %s, %s, %s, %s, COALESCE(MAX({q('order')}), 0) + %s FROM {link_table} WHERE {q('section_id')} = %s "
+                f"RETURNING {q('id')}, {q('order')}",
+                [section_id, name, url, color or None, ORDER_GAP, section_id],
+            )
+            link_id, order = cursor.fetchone()
+
+        ChangeLogEntry.record(user, ChangeLogEntry.LINK, link_id, ChangeLogEntry.CREATE)
+        return Link(id=link_id, section_id=section_id, name=name, url=url, color=color or None, order=order)
+
+    @staticmethod
+    @transaction.atomic
+    def append_section(user, name):
+        """
+        Adds a section after the last one of the user's default page (or first page). Selecting
+        the page FOR UPDATE serializes concurrent adds, so the INSERT ... SELECT of the next order
+        key sees every section added before it. Returns the new Section, or None without a page.
+        """
+        page = StartPage.objects.select_for_update().filter(user=user).order_by('-is_default', 'id').first()
+        if not page:
+            return None
+        section_table = connection.ops.quote_name(Section._meta.db_table)
+        q = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {section_table} ({q('page_id')}, {q('name')}, {q('order')}, {q('link_count')}) "
+                f"SELECT %s, %s, COALESCE(MAX({q('order')}), 0) + %s, 0 FROM {section_table} WHERE {q('page_id')} = %s "
+                f"RETURNING {q('id')}, {q('order')}",
+                [page.id, name, ORDER_GAP, page.id],
+            )
+            section_id, order = cursor.fetchone()
+
+        ChangeLogEntry.record(user, ChangeLogEntry.SECTION, section_id, ChangeLogEntry.CREATE)
+        return Section(id=section_id, page=page, name=name, order=order)
+
+    @staticmethod
+    def rebalance_crowded(model, parent_field):
+        """Respaces every sibling list whose closest neighbours are nearer than MIN_GAP. Returns the count."""
+        crowded = set()
+        last_parent, last_order = None, None
+        rows = model.objects.order_by(parent_field, 'order').values_list(parent_field, 'order')
+        for parent_id, order in rows.iterator(chunk_size=5000):
+            if parent_id == last_parent and order - last_order < OrderService.MIN_GAP:
+                crowded.add(parent_id)
+            last_parent, last_order = parent_id, order
+
+        for parent_id in crowded:
+            with transaction.atomic():
+                OrderService.rebalance(model.objects.select_for_update().filter(**{parent_field: parent_id}))
+        return len(crowded)
+
+class SectionService:
+    """
+    Set-based bulk operations on the page -> section -> link tree, used by the views and admin actions.
+    Deletes use one DELETE per table, skipping the ORM collector and per-row signals.
+    """
+
+    @staticmethod
+    def _record_by_owner(rows, object_type, action):
+        # rows: (object id, owner user id)
+        by_user = {}
+        for object_id, user_id in rows:
+            by_user.setdefault(user_id, []).append(object_id)
+        for user_id, ids in by_user.items():
+            ChangeLogEntry.record(user_id, object_type, ids, action)
+
+    @staticmethod
+    @transaction.atomic
+    def move_sections(section_ids, target_page):
+        """Appends the sections (with their links) to the end of target_page, keeping their relative order."""
+        sections = list(Section.objects.filter(id__in=section_ids).order_by('order', 'id').values_list('id', 'page__user_id'))
+        max_order = target_page.sections.aggregate(models.Max('order'))['order__max'] or 0
+        moved = [Section(id=section_id, page_id=target_page.id, order=max_order + (index + 1) * ORDER_GAP)
+                 for index, (section_id, user_id) in enumerate(sections)]
+        Section.objects.bulk_update(moved, ['page', 'order'])
+
+        SectionService._record_by_owner([row for row in sections if row[1] != target_page.user_id], ChangeLogEntry.SECTION, ChangeLogEntry.DELETE)
+        ChangeLogEntry.record(target_page.user_id, ChangeLogEntry.SECTION, [row[0] for row in sections], ChangeLogEntry.UPDATE)
+        return len(moved)
+
+    @staticmethod
+    @transaction.atomic
+    def clone_sections(section_ids, target_page=None):
+        """
+        Copies sections and all their links, appended to target_page (default: each section's own page).
+        Uses a fixed number of statements regardless of how many links are copied.
+        """
+        originals = list(Section.objects.filter(id__in=section_ids).select_related('page').order_by('page_id', 'order', 'id'))
+        max_orders = dict(Section.objects.filter(page_id__in={target_page.id} if target_page else {s.page_id for s in originals})
+                          .values('page_id').annotate(m=models.Max('order')).values_list('page_id', 'm'))
+
+        copies = []
+        for original in originals:
+            page_id = target_page.id if target_page else original.page_id
+            max_orders[page_id] = max_orders.get(page_id, 0) + ORDER_GAP
+            copies.append(Section(page_id=page_id, name=original.name, order=max_orders[page_id], link_count=original.link_count))
+        Section.objects.bulk_create(copies)
+
+        new_ids = {original.id: copy.id for original, copy in zip(originals, copies)}
+        links = [
+            Link(section_id=new_ids[link.section_id], name=link.name, url=link.url, color=link.color, order=link.order)
+            for link in Link.objects.filter(section_id__in=new_ids.keys())
+        ]
+        Link.objects.bulk_create(links, batch_size=1000)
+
+        owner = dict(StartPage.objects.filter(id__in={c.page_id for c in copies}).values_list('id', 'user_id'))
+        section_owner = {c.id: owner[c.page_id] for c in copies}
+        SectionService._record_by_owner(section_owner.items(), ChangeLogEntry.SECTION, ChangeLogEntry.CREATE)
+        SectionService._record_by_owner([(link.id, section_owner[link.section_id]) for link in links], ChangeLogEntry.LINK, ChangeLogEntry.CREATE)
+        return len(copies)
+
+    @staticmethod
+    @transaction.atomic
+    def delete_sections(section_ids):
+        """Deletes sections and their links with two DELETE statements, skipping the ORM collector and per-row signals."""
+        rows = list(Section.objects.filter(id__in=section_ids).values_list('id', 'page__user_id'))
+        ids = [row[0] for row in rows]
+        Link.objects.filter(section_id__in=ids)._raw_delete(Link.objects.db)
+        deleted = Section.objects.filter(id__in=ids)._raw_delete(Section.objects.db)
+        SectionService._record_by_owner(rows, ChangeLogEntry.SECTION, ChangeLogEntry.DELETE)
+        return deleted
+
+    @staticmethod
+    @transaction.atomic
+    def delete_pages(page_ids):
+        """
+        Deletes pages with their sections and links in three DELETE statements.
+        Logs one page deletion per page (children are implied), before the rows are gone,
+        so shared-page purges can still find the pages' share tokens.
+        """
+        rows = list(StartPage.objects.filter(id__in=page_ids).values_list('id', 'user_id'))
+        ids = [row[0] for row in rows]
+        SectionService._record_by_owner(rows, ChangeLogEntry.PAGE, ChangeLogEntry.DELETE)
+        SectionService._release_signup_template(ids)
+
+        sections = Section.objects.filter(page_id__in=ids).values('id')
+        Link.objects.filter(section_id__in=sections)._raw_delete(Link.objects.db)
+        Section.objects.filter(page_id__in=ids)._raw_delete(Section.objects.db)
+        return StartPage.objects.filter(id__in=ids)._raw_delete(StartPage.objects.db)
+
+    @staticmethod
+    def _release_signup_template(page_ids):
+        # Raw deletes skip on_delete=SET_NULL, so clear the signup template reference by hand
+        if GlobalSettings.objects.filter(SIGNUP_TEMPLATE_PAGE__in=page_ids).update(SIGNUP_TEMPLATE_PAGE=None):
+            settings_cache.delete('global')
+
+    @staticmethod
+    @transaction.atomic
+    def delete_users(user_ids):
+        """
+        Deletes accounts. The page tree and change log, by far the biggest parts of an account,
+        go set-based first; the ORM then only has to collect the few remaining related rows.
+        """
+        from .sharing import purge_share_tokens
+        purge_share_tokens(list(StartPage.objects.filter(user_id__in=user_ids, share_token__isnull=False).values_list('share_token', flat=True)))
+
+        pages = StartPage.objects.filter(user_id__in=user_ids).values('id')
+        SectionService._release_signup_template(pages)
+        sections = Section.objects.filter(page_id__in=pages).values('id')
+        Link.objects.filter(section_id__in=sections)._raw_delete(Link.objects.db)
+        Section.objects.filter(page_id__in=pages)._raw_delete(Section.objects.db)
+        StartPage.objects.filter(user_id__in=user_ids)._raw_delete(StartPage.objects.db)
+        ChangeLogEntry.objects.filter(user_id__in=user_ids)._raw_delete(ChangeLogEntry.objects.db)
+        return User.objects.filter(id__in=user_ids).delete()[1].get(User._meta.label, 0)
+
+    @staticmethod
+    @transaction.atomic
+    def delete_links(link_ids):
+        """Deletes links with one DELETE statement and recounts the affected sections once."""
+        rows = list(Link.objects.filter(id__in=link_ids).values_list('id', 'section_id', 'section__page__user_id'))
+        deleted = Link.objects.filter(id__in=[row[0] for row in rows])._raw_delete(Link.objects.db)
+        Section.refresh_link_counts({row[1] for row in rows})
+        SectionService._record_by_owner([(row[0], row[2]) for row in rows], ChangeLogEntry.LINK, ChangeLogEntry.DELETE)
+        return deleted
+
+class ChangeLogService:
+    # prune_changelog keeps this many days by default, StatsService relies on it
+    RETENTION_DAYS = 30
+
+    # Model, owner lookup and current-state fields sent for every changed object
+    FIELDS = {
+        ChangeLogEntry.PAGE: (StartPage, 'user', ['id', 'title', 'slug', 'is_default']),
+        ChangeLogEntry.SECTION: (Section, 'page__user', ['id', 'page_id', 'name', 'order']),
+        ChangeLogEntry.LINK: (Link, 'section__page__user', ['id', 'section_id', 'name', 'url', 'color', 'order']),
+    }
+
+    @staticmethod
+    def latest_revision(user):
+        return ChangeLogEntry.objects.filter(user=user).order_by('-id').values_list('id', flat=True).first() or 0
+
+    @staticmethod
+    def changes_since(user, since):
+        """
+        Returns the compacted changes after revision `since`: the current state of every
+        object that was created or updated, and the ids of deleted objects. An object
+        created and deleted inside the window is left out entirely.
+        Returns {'reset': True} when the log no longer reaches back to `since`.
+        """
+        oldest = ChangeLogEntry.objects.order_by('id').values_list('id', flat=True).first()
+        if since <= 0 or oldest is None or since < oldest - 1:
+            # Pruned past this revision (or a fresh client): the client must reload the full page
+            return {'reset': True, 'rev': ChangeLogService.latest_revision(user)}
+
+        entries = ChangeLogEntry.objects.filter(user=user, id__gt=since).order_by('id').values_list(
+            'id', 'object_type', 'object_id', 'action'
+        )
+
+        first_action, last_action = {}, {}
+        rev = since
+        for entry_id, object_type, object_id, action in entries:
+            key = (object_type, object_id)
+            first_action.setdefault(key, action)
+            last_action[key] = action
+            rev = entry_id
+
+        changed = {object_type: set() for object_type in ChangeLogService.FIELDS}
+        deleted = {object_type: set() for object_type in ChangeLogService.FIELDS}
+        for key, action in last_action.items():
+            object_type, object_id = key
+            if action == ChangeLogEntry.DELETE:
+                if first_action[key] != ChangeLogEntry.CREATE:
+                    deleted[object_type].add(object_id)
+            else:
+                changed[object_type].add(object_id)
+
+        result = {'reset': False, 'rev': rev}
+        for object_type, (model, owner, fields) in ChangeLogService.FIELDS.items():
+            rows = []
+            if changed[object_type]:
+                rows = list(model.objects.filter(id__in=changed[object_type], **{owner: user}).values(*fields))
+            # Rows that are gone were removed with their parent (cascade): report them as deleted,
+            # unless they were also created inside the window
+            missing = changed[object_type] - {row['id'] for row in rows}
+            deleted[object_type] |= {i for i in missing if first_action[(object_type, i)] != ChangeLogEntry.CREATE}
+            result[f'{object_type}s'] = rows
+        result['deleted'] = {object_type: sorted(ids) for object_type, ids in deleted.items()}
+        return result
+
+    @staticmethod
+    def prune(older_than, batch_size=5000):
+        """Deletes log entries created before `older_than` in small batches. Returns the number deleted."""
+        total = 0
+        while True:
+            ids = list(ChangeLogEntry.objects.filter(created_at__lt=older_than).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return total
+            total += ChangeLogEntry.objects.filter(id__in=ids).delete()[0]
+
+class StatsService:
+    """
+    Daily rollups for reporting. Page, section and link activity comes from the change log,
+    so days can only be (re)computed while their log entries have not been pruned.
+    """
+
+    @staticmethod
+    def day_bounds(day):
+        """Start and end of a calendar day in the project's TIME_ZONE."""
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+
+    @staticmethod
+    def yesterday():
+        return timezone.localdate() - timedelta(days=1)
+
+    @staticmethod
+    def first_complete_day():
+        """
+        The first day whose change log is complete. prune_changelog deletes by age, so nothing is
+        missing since the oldest retained entry, nor inside the retention period.
+        """
+        complete_since = timezone.now() - timedelta(days=ChangeLogService.RETENTION_DAYS)
+        oldest = ChangeLogEntry.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        if oldest is not None and oldest < complete_since:
+            complete_since = oldest
+        day = timezone.localtime(complete_since).date()
+        # A day that starts before it may have lost its first hours
+        return day if StatsService.day_bounds(day)[0] >= complete_since else day + timedelta(days=1)
+
+    @staticmethod
+    def rollup_day(day, first_complete_day=None):
+        """
+        Computes (or recomputes) the statistics row of one day. Returns None without touching
+        the row for days before first_complete_day(): their activity would come out as zeros.
+        """
+        if day < (first_complete_day or StatsService.first_complete_day()):
+            return None
+        start, end = StatsService.day_bounds(day)
+
+        # One aggregated pass over the day's slice of the change log (created_at is indexed)
+        created = lambda object_type: models.Count('id', filter=models.Q(object_type=object_type, action=ChangeLogEntry.CREATE))
+        activity = ChangeLogEntry.objects.filter(created_at__gte=start, created_at__lt=end).aggregate(
+            edits=models.Count('id'),
+            active_users=models.Count('user', distinct=True),
+            pages_created=created(ChangeLogEntry.PAGE),
+            sections_created=created(ChangeLogEntry.SECTION),
+            links_created=created(ChangeLogEntry.LINK),
+        )
+
+        new_users = User.objects.filter(date_joined__gte=start, date_joined__lt=end).count()
+        theme_usage = {
+            row['theme__name']: row['count']
+            for row in Profile.objects.filter(theme__isnull=False).values('theme__name').annotate(count=models.Count('id'))
+        }
+
+        stats, _ = DailyStats.objects.update_or_create(
+            date=day,
+            defaults={**activity, 'new_users': new_users, 'theme_usage': theme_usage},
+        )
+        return stats
+
+    @staticmethod
+    def rollup_pending(until=None):
+        """Rolls up every day after the last stored row, up to and including `until` (default: yesterday)."""
+        until = until or StatsService.yesterday()
+        last = DailyStats.objects.order_by('-date').values_list('date', flat=True).first()
+        day = last + timedelta(days=1) if last else until
+
+        first_complete_day = StatsService.first_complete_day()
+        rows = []
+        while day <= until:
+            row = StatsService.rollup_day(day, first_complete_day)
+            if row is not None:
+                rows.append(row)
+            day += timedelta(days=1)
+        return rows
+
+class CleanupService:
+    """Housekeeping that deletes in small batches, so no single statement holds locks for long."""
+
+    @staticmethod
+    def delete_in_batches(queryset, batch_size=1000, pause=0.1):
+        """
+        Deletes the rows of `queryset` walking the primary key (keyset pagination, no OFFSET),
+        one short transaction per batch with a pause in between. Returns the number of rows deleted.
+        """
+        model = queryset.model
+        total, last_pk = 0, None
+        while True:
+            batch = queryset.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return total
+            total += model.objects.filter(pk__in=pks).delete()[0]
+            last_pk = pks[-1]
+            if pause:
+                time.sleep(pause)
+
+    @staticmethod
+    def orphaned_avatars(grace=timedelta(hours=24)):
+        """
+        Yields (name, size) of files in MEDIA_ROOT/avatars/ that no profile references.
+        Files younger than `grace` are skipped, they may belong to an upload still being saved.
+        """
+        from django.core.files.storage import default_storage
+        upload_dir = Profile._meta.get_field('avatar').upload_to.rstrip('/')
+        if not default_storage.exists(upload_dir):
+            return
+
+        referenced = set(Profile.objects.exclude(avatar='').exclude(avatar__isnull=True).values_list('avatar', flat=True))
+        cutoff = timezone.now() - grace
+        _, files = default_storage.listdir(upload_dir)
+        for filename in files:
+            name = os.path.join(upload_dir, filename).replace(os.sep, '/')
+            if name in referenced or default_storage.get_modified_time(name) > cutoff:
+                continue
+            yield name, default_storage.size(name)
 
 class StartPageService:
+    @staticmethod
+    def unique_title(user, title):
+        """`title`, or "title (2)", "title (3)"... if the user already has a page with that title."""
+        taken = set(StartPage.objects.filter(user=user, title__startswith=title).values_list('title', flat=True))
+        candidate, n = title, 1
+        while candidate in taken:
+            n += 1
+            candidate = f"{title} ({n})"
+        return candidate
+
+    @staticmethod
+    @transaction.atomic
+    def clone_page(page, user, title=None, is_default=False):
+        """
+        Copies a page with its whole section/link tree for `user` in a fixed number of statements:
+        one bulk INSERT ... RETURNING for the sections, INSERT ... SELECT for the links (the bulk of
+        the tree, never loaded into Python) and the change log.
+        """
+        new_page = StartPage.objects.create(user=user, title=StartPageService.unique_title(user, title or page.title), is_default=is_default)
+
+        originals = list(page.sections.order_by('id').values_list('id', 'name', 'order', 'link_count'))
+        # bulk_create returns the objects it was given with their ids (RETURNING), so every copy is
+        # paired with its original by position, whatever order the database hands out the ids in
+        copies = Section.objects.bulk_create([
+            Section(page=new_page, name=name, order=order, link_count=link_count) for _, name, order, link_count in originals
+        ])
+        mapping = [(original[0], copy.id) for original, copy in zip(originals, copies)]
+
+        section_table, link_table, log_table = (connection.ops.quote_name(model._meta.db_table) for model in (Section, Link, ChangeLogEntry))
+        q = connection.ops.quote_name
+        now = timezone.now()
+
+        with connection.cursor() as cursor:
+            if mapping:
+                cursor.execute(
+                    f"INSERT INTO {link_table} ({q('section_id')}, {q('name')}, {q('url')}, {q('color')}, {q('order')}, "
+                    f"{q('check_status')}, {q('checked_at')}, {q('latency_ms')}) "
+                    f"SELECT CASE l.{q('section_id')} {' '.join(['WHEN %s THEN %s'] * len(mapping))} END, "
+                    f"l.{q('name')}, l.{q('url')}, l.{q('color')}, l.{q('order')}, "
+                    f"l.{q('check_status')}, l.{q('checked_at')}, l.{q('latency_ms')} "
+                    f"FROM {link_table} l WHERE l.{q('section_id')} IN (SELECT {q('id')} FROM {section_table} WHERE {q('page_id')} = %s)",
+                    [value for pair in mapping for value in pair] + [page.id],
+                )
+
+            # Change log entries for the copied rows, also without a round trip per row
+            for object_type, select in (
+                (ChangeLogEntry.SECTION, f"SELECT {q('id')} FROM {section_table} WHERE {q('page_id')} = %s"),
+                (ChangeLogEntry.LINK, f"SELECT {q('id')} FROM {link_table} WHERE {q('section_id')} IN (SELECT {q('id')} FROM {section_table} WHERE {q('page_id')} = %s)"),
+            ):
+                cursor.execute(
+                    f"INSERT INTO {log_table} ({q('user_id')}, {q('object_type')}, {q('object_id')}, {q('action')}, {q('created_at')}) "
+                    f"SELECT %s, %s, ids.{q('id')}, %s, %s FROM ({select}) ids",
+                    [user.id, object_type, ChangeLogEntry.CREATE, now, new_page.id],
+                )
+
+        ChangeLogEntry.record(user, ChangeLogEntry.PAGE, new_page.id, ChangeLogEntry.CREATE)
+        return new_page
+
     @staticmethod
     def export_to_json(page):
         data = {
@@ -40,6 +559,7 @@ class StartPageService:
                     is_default=is_first
                 )
                 
+                section_ids, link_ids = [], []
                 sections = data.get('sections', [])
                 for sec in sections:
                     new_section = Section.objects.create(
@@ -47,16 +567,22 @@ class StartPageService:
                         name=sec.get('name', 'Untitled Section'),
                         order=sec.get('order', 0)
                     )
+                    section_ids.append(new_section.id)
                     
                     links = sec.get('links', [])
                     for link in links:
-                        Link.objects.create(
+                        new_link = Link.objects.create(
                             section=new_section,
                             name=link.get('name', 'Link'),
                             url=link.get('url', '#'),
                             color=link.get('color'),
                             order=link.get('order', 0)
                         )
+                        link_ids.append(new_link.id)
+
+                ChangeLogEntry.record(user, ChangeLogEntry.PAGE, page.id, ChangeLogEntry.CREATE)
+                ChangeLogEntry.record(user, ChangeLogEntry.SECTION, section_ids, ChangeLogEntry.CREATE)
+                ChangeLogEntry.record(user, ChangeLogEntry.LINK, link_ids, ChangeLogEntry.CREATE)
             return True, page.title
         except json.JSONDecodeError:
             return False, "Invalid JSON format."
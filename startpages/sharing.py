@@ -0,0 +1,107 @@
+# startpages/sharing.py
+
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import connections, transaction
+from django.urls import reverse
+
+# How long nginx or a CDN may serve a shared page without asking Django again
+SHARE_CACHE_SECONDS = getattr(settings, 'SHARE_CACHE_SECONDS', 300)
+# The purger waits this long after the first submission for more to arrive
+PURGE_COALESCE_SECONDS = 0.5
+
+
+def shared_page_etag(page):
+    """
+    ETag of a shared page. Every edit of the owner is logged in the change log,
+    so the owner's latest revision changes whenever the page content can have changed.
+    """
+    from .services import ChangeLogService
+    return f'"{page.id}-{ChangeLogService.latest_revision(page.user_id)}"'
+
+
+def shared_page_path(token):
+    return reverse('startpages:shared_startpage', kwargs={'token': token})
+
+
+class SharePurger:
+    """
+    Sends the purge requests from a daemon thread, so neither the request nor its commit waits
+    for nginx / the CDN. Submissions are collected for PURGE_COALESCE_SECONDS and purged together:
+    the change log entries of one transaction (a batch or a clone logs several) and bursts of
+    edits cost one token query and one purge per shared page.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, user_ids=(), tokens=()):
+        self.queue.put((set(user_ids), set(tokens)))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='share-purger', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            time.sleep(PURGE_COALESCE_SECONDS)
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.purge(set().union(*(user_ids for user_ids, _ in batch)), set().union(*(tokens for _, tokens in batch)))
+            except Exception as e:
+                print(f"Share purge error: {e}")
+            finally:
+                # This thread's own connection, it would otherwise stay open between rounds
+                connections.close_all()
+                for _ in batch:
+                    self.queue.task_done()
+
+    def purge(self, user_ids, tokens):
+        purge_urls = getattr(settings, 'SHARE_PURGE_URLS', [])
+        if not purge_urls:
+            return
+        if user_ids:
+            from .models import StartPage
+            tokens |= set(StartPage.objects.filter(user_id__in=user_ids, share_token__isnull=False).values_list('share_token', flat=True))
+
+        # Import inside function, requests is only needed when purging is configured
+        import requests # pyright: ignore[reportMissingModuleSource]
+        method = getattr(settings, 'SHARE_PURGE_METHOD', 'PURGE')
+        for template in purge_urls:
+            for token in tokens:
+                try:
+                    requests.request(method, template.format(path=shared_page_path(token).lstrip('/')), timeout=2)
+                except requests.exceptions.RequestException as e:
+                    # The cache entry then simply expires after SHARE_CACHE_SECONDS
+                    print(f"Share purge error: {e}")
+
+
+purger = SharePurger()
+
+
+def purge_share_tokens(tokens):
+    """
+    Asks nginx / the CDN to drop its cached copies of the given share links once the
+    current transaction commits. Does nothing unless SHARE_PURGE_URLS is configured.
+    """
+    if getattr(settings, 'SHARE_PURGE_URLS', []) and tokens:
+        tokens = list(tokens)
+        transaction.on_commit(lambda: purger.submit(tokens=tokens))
+
+
+def purge_shared_pages(user_id):
+    """
+    Purges every shared page of a user once the transaction commits (called for each change log entry).
+    Costs no query here, the purger looks the tokens up for all the users it collected.
+    """
+    if getattr(settings, 'SHARE_PURGE_URLS', []):
+        transaction.on_commit(lambda: purger.submit(user_ids=[user_id]))
@@ -1,3 +1,667 @@
-from django.test import TestCase
+# startpages/tests.py
 
-# Create your tests here.
+import json
+import os
+import re
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from allauth.account.models import EmailAddress
+from django.conf import settings
+from project.db_router import PIN_COOKIE, PrimaryReplicaRouter, ReplicaPinningMiddleware, use_replica
+from django.contrib.auth.models import User
+from django.core import mail as django_mail
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .backup import Restore, write_backup
+from .mail import MailSender, QueuedEmailBackend
+from .models import StartPage, Section, Link, ChangeLogEntry, DailyStats, GlobalSettings, QueuedEmail, ORDER_GAP, MAX_LINKS
+from .ratelimit import client_ip, local_buckets
+from .scheduler import Cron
+from .services import OrderService, StartPageService, StatsService, ChangeLogService
+from .sharing import purger, shared_page_path
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    """Local stand-in for nginx / the CDN and for linked sites; records every request it gets."""
+
+    def __init__(self):
+        self.requests = []
+        # Path -> status, or (method, path) -> status; everything else answers 200
+        self.statuses = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self):
+                server.requests.append((self.command, self.path))
+                self.send_response(server.statuses.get((self.command, self.path), server.statuses.get(self.path, 200)))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            do_GET = do_HEAD = do_PURGE = respond
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Minimal local SMTP server. Recipients containing "later" get 451 (temporary),
+    "reject" gets 550 (permanent); accepted messages are recorded.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        self.messages = []
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(f'{line}\r\n'.encode())
+
+            def handle(self):
+                self.reply('220 stub')
+                recipients = []
+                for line in self.rfile:
+                    command = line.decode().strip()
+                    verb = command[:4].upper()
+                    if verb in ('EHLO', 'HELO', 'RSET', 'NOOP'):
+                        self.reply('250 ok')
+                    elif verb == 'MAIL':
+                        recipients = []
+                        self.reply('250 ok')
+                    elif verb == 'RCPT':
+                        if 'reject' in command:
+                            self.reply('550 no such user')
+                        elif 'later' in command:
+                            self.reply('451 try again later')
+                        else:
+                            recipients.append(command.split(':', 1)[1].strip('<> '))
+                            self.reply('250 ok')
+                    elif verb == 'DATA':
+                        self.reply('354 go ahead')
+                        data = b''.join(iter(self.rfile.readline, b'.\r\n'))
+                        server.messages.append((recipients, data))
+                        self.reply('250 queued')
+                    elif verb == 'QUIT':
+                        self.reply('221 bye')
+                        return
+                    else:
+                        self.reply('500 unknown command')
+
+        super().__init__(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class EditorTestCase(TestCase):
+    """A logged-in user with one page of two sections, the first with two links."""
+
+    def setUp(self):
+        local_buckets.reset()
+        self.user = User.objects.create_user('editor', 'editor@example.com', 'password')
+        self.page = StartPage.objects.create(user=self.user, title='Home', is_default=True)
+        self.s1 = Section.objects.create(page=self.page, name='One', order=ORDER_GAP)
+        self.s2 = Section.objects.create(page=self.page, name='Two', order=2 * ORDER_GAP)
+        self.l1 = Link.objects.create(section=self.s1, name='A', url='https://a.example', order=ORDER_GAP)
+        self.l2 = Link.objects.create(section=self.s1, name='B', url='https://b.example', order=2 * ORDER_GAP)
+        self.client.force_login(self.user)
+
+    def post(self, url, data):
+        return self.client.post(url, json.dumps(data), content_type='application/json')
+
+    def assertLinkCountsStored(self):
+        for section in Section.objects.filter(page__user=self.user):
+            self.assertEqual(section.link_count, section.links.count(), f"Stored link_count of {section.name}")
+
+
+class StartpageETagTests(EditorTestCase):
+    def test_rename_changes_the_etag(self):
+        etag = self.client.get(reverse('startpages:startpage', args=[self.user.username])).get('ETag')
+        self.assertIsNotNone(etag)
+        url = reverse('startpages:startpage', args=['renamed'])
+        User.objects.filter(id=self.user.id).update(username='renamed')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class LinkCountTests(EditorTestCase):
+    def test_saving_a_link_into_another_section(self):
+        # What the admin change form does
+        self.l1.section = self.s2
+        self.l1.save()
+        self.l2.name = 'Renamed'
+        self.l2.save()
+        self.assertLinkCountsStored()
+
+    def test_saves_need_no_extra_query(self):
+        link = Link.objects.get(id=self.l1.id)
+        link.name = 'Renamed'
+        with self.assertNumQueries(1):
+            link.save()
+        link.section_id = self.s2.id
+        with self.assertNumQueries(3):
+            link.save()
+        self.assertLinkCountsStored()
+
+    def test_move_item_between_sections(self):
+        response = self.post('/api/move-item/', {'type': 'link', 'id': self.l1.id, 'section_id': self.s2.id})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertLinkCountsStored()
+
+    def test_move_item_does_not_count_below_zero(self):
+        Section.objects.filter(id=self.s1.id).update(link_count=0)
+        self.post('/api/move-item/', {'type': 'link', 'id': self.l1.id, 'section_id': self.s2.id})
+        self.assertEqual(Section.objects.get(id=self.s1.id).link_count, 0)
+
+
+class AdminBulkActionTests(EditorTestCase):
+    def setUp(self):
+        super().setUp()
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        self.dropped = [Section.objects.create(page=self.page, name=f'Drop {i}', order=(3 + i) * ORDER_GAP) for i in range(5)]
+        self.url = '/admin/startpages/section/?q=Drop'
+
+    def test_select_all_is_passed_through_the_confirmation(self):
+        # "Select all" on a filtered changelist: only the rows of the current page are posted as ids
+        selection = {'action': 'delete_sections', 'select_across': '1', '_selected_action': [self.dropped[0].id]}
+        response = self.client.post(self.url, {**selection, 'index': '0'})
+        self.assertContains(response, 'name="select_across" value="1"')
+        self.assertContains(response, '5 sections selected')
+
+        response = self.client.post(self.url, {**selection, 'apply': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Section.objects.filter(name__startswith='Drop').exists())
+        self.assertEqual(set(Section.objects.values_list('name', flat=True)), {'One', 'Two'})
+
+    def test_checked_rows_only(self):
+        selection = {'action': 'delete_sections', 'select_across': '0', '_selected_action': [self.dropped[0].id, self.dropped[1].id]}
+        response = self.client.post(self.url, {**selection, 'index': '0'})
+        self.assertContains(response, '2 sections selected')
+        self.client.post(self.url, {**selection, 'apply': 'yes'})
+        self.assertEqual(Section.objects.filter(name__startswith='Drop').count(), 3)
+
+    def test_delete_confirmation_shows_counts(self):
+        # The confirmation page counts the tree instead of listing every section and link
+        Link.objects.bulk_create(Link(section=self.dropped[0], name=f'L{i}', url='https://x.example', order=i) for i in range(50))
+        response = self.client.get(f'/admin/startpages/startpage/{self.page.id}/delete/')
+        self.assertContains(response, '7 sections')
+        self.assertContains(response, '52 links')
+        self.assertNotContains(response, 'L49')
+        response = self.client.get(f'/admin/auth/user/{self.user.id}/delete/')
+        self.assertContains(response, '1 Start Pages')
+        self.client.post(f'/admin/startpages/startpage/{self.page.id}/delete/', {'post': 'yes'})
+        self.assertFalse(Link.objects.filter(section__page=self.page).exists())
+
+
+class BatchTests(EditorTestCase):
+    def batch(self, *ops):
+        response = self.post('/api/batch/', {'ops': list(ops)})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_save_link_in_unmentioned_section(self):
+        self.batch({'op': 'save_item', 'type': 'link', 'id': self.l1.id, 'name': 'Renamed', 'url': 'https://c.example', 'color': ''})
+        self.l1.refresh_from_db()
+        self.assertEqual((self.l1.name, self.l1.url, self.l1.section_id), ('Renamed', 'https://c.example', self.s1.id))
+
+    def test_move_link_updates_both_counts(self):
+        self.batch({'op': 'move_item', 'type': 'link', 'id': self.l1.id, 'section_id': self.s2.id})
+        self.l1.refresh_from_db()
+        self.assertEqual(self.l1.section_id, self.s2.id)
+        self.assertLinkCountsStored()
+
+    def test_delete_link_updates_count(self):
+        self.batch({'op': 'delete_item', 'type': 'link', 'id': self.l2.id})
+        self.assertFalse(Link.objects.filter(id=self.l2.id).exists())
+        self.assertLinkCountsStored()
+
+    def test_add_then_move_and_delete(self):
+        self.batch(
+            {'op': 'add_link', 'ref': 'new', 'section_id': self.s2.id, 'name': 'N', 'url': 'https://n.example'},
+            {'op': 'move_item', 'type': 'link', 'id': self.l1.id, 'section_id': self.s2.id, 'prev_id': 'new'},
+            {'op': 'delete_item', 'type': 'link', 'id': self.l2.id},
+        )
+        self.assertEqual(list(self.s2.links.values_list('name', flat=True)), ['N', 'A'])
+        self.assertLinkCountsStored()
+
+    def test_failed_op_does_not_lose_the_others(self):
+        data = self.batch(
+            {'op': 'save_item', 'type': 'section', 'id': 999999, 'name': 'Gone'},
+            {'op': 'save_item', 'type': 'section', 'id': self.s1.id, 'name': 'Kept'},
+            {'op': 'add_link', 'section_id': self.s1.id, 'name': 'No URL'},
+        )
+        self.assertEqual([result['status'] for result in data['results']], ['error', 'success', 'error'])
+        self.s1.refresh_from_db()
+        self.assertEqual(self.s1.name, 'Kept')
+        self.assertEqual(self.s1.links.count(), 2)
+
+    def test_failed_ops_are_skipped_in_one_pass(self):
+        # Failing ops do not make the batch load and apply again
+        def queries(failing):
+            ops = [{'op': 'save_item', 'type': 'section', 'id': self.s1.id, 'name': 'Kept'}]
+            ops += [{'op': 'save_item', 'type': 'section', 'id': self.s2.id, 'name': ''}] * failing
+            with CaptureQueriesContext(connection) as captured:
+                self.batch(*ops)
+            return len(captured)
+        self.assertEqual(queries(1), queries(20))
+
+    def test_failed_move_changes_nothing(self):
+        data = self.batch(
+            {'op': 'move_item', 'type': 'link', 'id': self.l1.id, 'section_id': self.s2.id, 'next_id': 999999},
+            {'op': 'save_item', 'type': 'link', 'id': self.l1.id, 'name': 'Renamed', 'url': 'https://c.example', 'color': ''},
+        )
+        self.assertEqual([result['status'] for result in data['results']], ['error', 'success'])
+        self.l1.refresh_from_db()
+        self.assertEqual((self.l1.name, self.l1.section_id), ('Renamed', self.s1.id))
+        self.assertLinkCountsStored()
+
+    def test_ops_on_a_new_section_use_its_ref(self):
+        data = self.batch(
+            {'op': 'add_section', 'ref': 'ref-1', 'name': 'New'},
+            {'op': 'add_link', 'ref': 'ref-2', 'section_id': 'ref-1', 'name': 'N', 'url': 'https://n.example'},
+            {'op': 'move_item', 'type': 'link', 'id': self.l1.id, 'section_id': 'ref-1', 'next_id': 'ref-2'},
+        )
+        section = Section.objects.get(id=data['results'][0]['id'])
+        self.assertEqual(list(section.links.values_list('name', flat=True)), ['A', 'N'])
+        self.assertEqual(data['results'][1]['link']['name'], 'N')
+        self.assertLinkCountsStored()
+
+    def test_ops_depending_on_a_failed_add_fail_too(self):
+        Link.objects.bulk_create(Link(section=self.s2, name=str(i), url='https://x.example', order=i) for i in range(10))
+        Section.refresh_link_counts([self.s2.id])
+        data = self.batch(
+            {'op': 'add_link', 'ref': 'ref-1', 'section_id': self.s2.id, 'name': 'N', 'url': 'https://n.example'},
+            {'op': 'delete_item', 'type': 'link', 'id': 'ref-1'},
+            {'op': 'delete_item', 'type': 'link', 'id': self.l1.id},
+        )
+        self.assertEqual([result['status'] for result in data['results']], ['error', 'error', 'success'])
+        self.assertFalse(Link.objects.filter(id=self.l1.id).exists())
+        self.assertLinkCountsStored()
+
+
+class ClonePageTests(EditorTestCase):
+    @staticmethod
+    def tree(page):
+        return [
+            (section.name, section.order, section.link_count, [
+                (link.name, link.url, link.color, link.order) for link in section.links.order_by('order')
+            ])
+            for section in page.sections.order_by('order')
+        ]
+
+    def test_clone_copies_the_tree(self):
+        # Ids that are neither contiguous nor in display order: a section of another page in between,
+        # and a section added last that is shown first
+        other = StartPage.objects.create(user=self.user, title='Other')
+        Section.objects.create(page=other, name='Elsewhere', order=ORDER_GAP)
+        s3 = Section.objects.create(page=self.page, name='Three', order=ORDER_GAP // 2)
+        Link.objects.create(section=s3, name='C', url='https://c.example', color='#ff0000', order=ORDER_GAP)
+        Link.objects.create(section=self.s2, name='D', url='https://d.example', order=ORDER_GAP)
+        copier = User.objects.create_user('copier', 'copier@example.com', 'password')
+
+        clone = StartPageService.clone_page(self.page, copier)
+
+        self.assertEqual(clone.user, copier)
+        self.assertEqual(self.tree(clone), self.tree(self.page))
+        self.assertEqual(Link.objects.filter(section__page=clone).count(), 4)
+
+    def test_clone_of_an_empty_page(self):
+        empty = StartPage.objects.create(user=self.user, title='Empty')
+        self.assertEqual(self.tree(StartPageService.clone_page(empty, self.user)), [])
+
+    def test_signup_copies_get_their_own_slug(self):
+        global_settings = GlobalSettings.load()
+        global_settings.SIGNUP_TEMPLATE_PAGE = self.page
+        global_settings.save()
+        for i in range(3):
+            User.objects.create_user(f'new{i}', f'new{i}@example.com', 'password')
+        slugs = list(StartPage.objects.filter(title='Home').values_list('slug', flat=True))
+        self.assertEqual(len(set(slugs)), 4)
+        self.assertTrue(all(slug.startswith('home') for slug in slugs))
+
+    def test_slug_follows_the_title_only(self):
+        with self.assertNumQueries(1):
+            self.page.save()
+        self.page.title = 'Work'
+        self.page.save()
+        self.assertEqual(self.page.slug, 'work')
+
+
+class StatsRollupTests(EditorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pruned_day = timezone.localdate() - timedelta(days=ChangeLogService.RETENTION_DAYS + 5)
+        DailyStats.objects.create(date=self.pruned_day, edits=7)
+
+    def test_pruned_days_are_not_overwritten(self):
+        self.assertIsNone(StatsService.rollup_day(self.pruned_day))
+        self.assertEqual(DailyStats.objects.get(date=self.pruned_day).edits, 7)
+        self.assertIsNotNone(StatsService.rollup_day(StatsService.yesterday()))
+
+    def test_days_since_the_oldest_entry_are_complete(self):
+        ChangeLogEntry.record(self.user, ChangeLogEntry.SECTION, self.s1.id, ChangeLogEntry.UPDATE)
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=ChangeLogService.RETENTION_DAYS + 10))
+        self.assertEqual(StatsService.rollup_day(self.pruned_day).edits, 0)
+
+    def test_command_reports_skipped_days(self):
+        out = StringIO()
+        call_command('rollup_stats', days=ChangeLogService.RETENTION_DAYS + 10, stdout=out)
+        self.assertIn('Skipped', out.getvalue())
+        self.assertEqual(DailyStats.objects.get(date=self.pruned_day).edits, 7)
+
+
+class BackupTests(EditorTestCase):
+    def test_restore_skips_users_whose_verified_email_is_taken(self):
+        EmailAddress.objects.create(user=self.user, email='editor@example.com', verified=True, primary=True)
+        second = User.objects.create_user('second', 'second@example.com', 'password')
+        EmailAddress.objects.create(user=second, email='second@example.com', verified=True, primary=True)
+        Section.objects.create(page=StartPage.objects.create(user=second, title='Second'), name='Theirs', order=ORDER_GAP)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'backup.ndjson.gz')
+        write_backup(path)
+
+        # Renamed here, so both backup users look new; only the editor's verified address is still taken
+        User.objects.filter(id=self.user.id).update(username='editor-renamed')
+        EmailAddress.objects.filter(user=second).delete()
+        User.objects.filter(id=second.id).update(username='second-renamed')
+
+        restore = Restore()
+        restore.run(path)
+
+        self.assertEqual(list(restore.email_conflicts.values()), ['editor@example.com'])
+        self.assertFalse(User.objects.filter(username='editor').exists())
+        restored = User.objects.get(username='second')
+        self.assertEqual(EmailAddress.objects.get(user=restored).email, 'second@example.com')
+        self.assertEqual(list(Section.objects.filter(page__user=restored).values_list('name', flat=True)), ['Theirs'])
+        self.assertEqual(restore.skipped['section'], 2)
+
+
+class MailSenderTests(TestCase):
+    def setUp(self):
+        self.smtp = StubSMTPServer()
+        self.addCleanup(self.smtp.stop)
+        overrides = override_settings(
+            EMAIL_QUEUE_DELIVERY_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.smtp.server_address[1], EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='', EMAIL_QUEUE_RATE_PER_MINUTE=60000,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def queue(self, *recipients):
+        QueuedEmailBackend().send_messages([
+            EmailMessage(f'To {recipient}', 'Body', 'noreply@example.com', [recipient]) for recipient in recipients
+        ])
+        return {mail.recipients[0]: mail for mail in QueuedEmail.objects.all()}
+
+    def test_delivery_retry_and_failure(self):
+        queued = self.queue('ok@example.com', 'later@example.com', 'reject@example.com')
+        sender = MailSender()
+        self.addCleanup(sender.close)
+
+        self.assertEqual(sender.run_once(), (1, 2))
+        self.assertEqual([recipients for recipients, _ in self.smtp.messages], [['ok@example.com']])
+        self.assertIn(b'Subject: To ok@example.com', self.smtp.messages[0][1])
+
+        ok, later, reject = (QueuedEmail.objects.get(id=queued[address].id) for address in ('ok@example.com', 'later@example.com', 'reject@example.com'))
+        self.assertEqual((ok.status, ok.attempts), (QueuedEmail.SENT, 1))
+        # 4xx: kept for a retry after the backoff
+        self.assertEqual((later.status, later.attempts), (QueuedEmail.PENDING, 1))
+        self.assertIn('451', later.last_error)
+        self.assertGreater(later.next_attempt_at, timezone.now() + timedelta(seconds=20))
+        # 5xx: final
+        self.assertEqual((reject.status, reject.attempts), (QueuedEmail.FAILED, 1))
+        self.assertIn('550', reject.last_error)
+
+        # Nothing is due until the backoff has passed
+        self.assertEqual(sender.run_once(), (0, 0))
+        QueuedEmail.objects.filter(id=later.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(sender.run_once(), (0, 1))
+        self.assertEqual(QueuedEmail.objects.get(id=later.id).attempts, 2)
+
+    def test_other_delivery_backends(self):
+        self.queue('ok@example.com')
+        with override_settings(EMAIL_QUEUE_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            sender = MailSender()
+            self.assertEqual(sender.run_once(), (1, 0))
+        self.assertEqual(len(django_mail.outbox), 1)
+        self.assertIn(b'Subject: To ok@example.com', django_mail.outbox[0].message().as_bytes())
+        self.assertEqual(QueuedEmail.objects.get().status, QueuedEmail.SENT)
+
+    def test_stops_between_messages(self):
+        self.queue('a@example.com', 'b@example.com', 'c@example.com')
+        sender = MailSender()
+        self.addCleanup(sender.close)
+        stopping = threading.Event()
+        deliver = sender.deliver
+
+        def deliver_then_stop(mail):
+            stopping.set()
+            return deliver(mail)
+        sender.deliver = deliver_then_stop
+
+        self.assertEqual(sender.run_once(stopping), (1, 0))
+        # The rest of the claimed batch is due again at once, not after the claim expires
+        self.assertEqual(QueuedEmail.objects.filter(status=QueuedEmail.PENDING, next_attempt_at__lte=timezone.now()).count(), 2)
+
+
+class SharePurgeTests(TransactionTestCase):
+    def setUp(self):
+        local_buckets.reset()
+        self.cdn = StubHTTPServer()
+        self.addCleanup(self.cdn.stop)
+        self.user = User.objects.create_user('sharer', 'sharer@example.com', 'password')
+        self.page = StartPage.objects.create(user=self.user, title='Home', is_default=True)
+        self.page.enable_sharing()
+        self.section = Section.objects.create(page=self.page, name='One', order=ORDER_GAP)
+        self.client.force_login(self.user)
+
+    def test_batch_purges_each_shared_page_once(self):
+        with override_settings(SHARE_PURGE_URLS=[self.cdn.url + '/{path}']):
+            response = self.client.post('/api/batch/', json.dumps({'ops': [
+                {'op': 'add_section', 'ref': 'new', 'name': 'Two'},
+                {'op': 'add_link', 'section_id': 'new', 'name': 'N', 'url': 'https://n.example'},
+                {'op': 'save_item', 'type': 'section', 'id': self.section.id, 'name': 'Renamed'},
+            ]}), content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            purger.queue.join()
+        self.assertEqual(self.cdn.requests, [('PURGE', shared_page_path(self.page.share_token))])
+
+    def test_refresh_hits_the_public_cache_key(self):
+        # Both nginx locations key the cache by $uri only, so the refresh request (sent to another
+        # host name) replaces the entry public requests read as long as the paths match
+        with open(settings.BASE_DIR / 'nginx' / 'default.conf') as conf:
+            self.assertEqual(set(re.findall(r'proxy_cache_key (.+);', conf.read())), {'$uri'})
+
+        public_path = reverse('startpages:shared_startpage', kwargs={'token': self.page.share_token})
+        self.assertEqual(self.client.get(public_path).status_code, 200)
+        with override_settings(SHARE_PURGE_URLS=[self.cdn.url + '/{path}'], SHARE_PURGE_METHOD='GET'):
+            purger.purge(set(), {self.page.share_token})
+        self.assertEqual(self.cdn.requests, [('GET', public_path)])
+
+
+class CronTests(SimpleTestCase):
+    def next_runs(self, expression, start, count=4):
+        moment, runs = timezone.make_aware(start), []
+        for _ in range(count):
+            moment = Cron(expression).next_after(moment)
+            runs.append(timezone.localtime(moment).strftime('%Y-%m-%d %a %H:%M'))
+        return runs
+
+    def test_day_and_weekday_restricted_match_either(self):
+        # 2026-10-19 is a Monday
+        self.assertEqual(self.next_runs('0 0 1 * 1', datetime(2026, 10, 19, 12, 0)), [
+            '2026-10-26 Mon 00:00', '2026-11-01 Sun 00:00', '2026-11-02 Mon 00:00', '2026-11-09 Mon 00:00',
+        ])
+
+    def test_only_weekday_restricted(self):
+        self.assertEqual(self.next_runs('30 6 * * 0', datetime(2026, 10, 19, 12, 0), 2), ['2026-10-25 Sun 06:30', '2026-11-01 Sun 06:30'])
+
+    def test_only_day_restricted(self):
+        self.assertEqual(self.next_runs('0 3 31 * *', datetime(2026, 10, 19, 12, 0), 2), ['2026-10-31 Sat 03:00', '2026-12-31 Thu 03:00'])
+
+
+@mock.patch('project.db_router.replica_configured', return_value=True)
+class ReplicaRoutingTests(SimpleTestCase):
+    def routed_view(self, request):
+        """A @use_replica view reporting where its reads and writes would go."""
+        router = PrimaryReplicaRouter()
+
+        @use_replica
+        def view(request):
+            return HttpResponse(f'{router.db_for_read(StartPage)} {router.db_for_write(StartPage)}')
+        return view(request).content.decode()
+
+    def test_get_reads_from_the_replica(self, _):
+        self.assertEqual(self.routed_view(RequestFactory().get('/')), 'replica default')
+
+    def test_post_stays_on_the_primary(self, _):
+        self.assertEqual(self.routed_view(RequestFactory().post('/')), 'default default')
+
+    def test_pinned_client_reads_from_the_primary(self, _):
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.routed_view(request), 'default default')
+
+    def test_outside_replica_views(self, _):
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(StartPage), 'default')
+
+    def test_writes_pin_the_client(self, _):
+        middleware = ReplicaPinningMiddleware(lambda request: HttpResponse())
+        self.assertIn(PIN_COOKIE, middleware(RequestFactory().post('/')).cookies)
+        self.assertNotIn(PIN_COOKIE, middleware(RequestFactory().get('/')).cookies)
+
+
+@override_settings(RATE_LIMITS_ENABLED=True, RATE_LIMITS={'default': ('60/m', '240/m'), 'batch': ('3/m', '100/m')})
+class RateLimitTests(EditorTestCase):
+    def test_429_after_the_user_limit(self):
+        op = {'op': 'save_item', 'type': 'section', 'id': self.s1.id, 'name': 'Again'}
+        for _ in range(3):
+            self.assertEqual(self.post('/api/batch/', {'ops': [op]}).status_code, 200)
+        response = self.post('/api/batch/', {'ops': [op]})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+        # Buckets are per user: someone else on another address is not affected
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.client.force_login(other)
+        response = self.client.post('/api/batch/', json.dumps({'ops': [op]}), content_type='application/json', REMOTE_ADDR='10.0.0.2')
+        self.assertNotEqual(response.status_code, 429)
+
+
+
+    @override_settings(RATE_LIMIT_TRUSTED_PROXIES=2)
+    def test_client_behind_two_proxies(self):
+        # client (spoofed first entry) -> TLS proxy 203.0.113.9 -> nginx -> Django
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 198.51.100.7, 203.0.113.9', REMOTE_ADDR='172.18.0.5')
+        self.assertEqual(client_ip(request), '198.51.100.7')
+        with override_settings(RATE_LIMIT_TRUSTED_PROXIES=1):
+            self.assertEqual(client_ip(request), '203.0.113.9')
+        # Fewer hops than proxies: the first entry is all there is
+        self.assertEqual(client_ip(RequestFactory().get('/', HTTP_X_FORWARDED_FOR='198.51.100.7')), '198.51.100.7')
+
+
+class AppendLinkLimitTests(TransactionTestCase):
+    def test_concurrent_adds_never_overfill_a_section(self):
+        user = User.objects.create_user('racer', 'racer@example.com', 'password')
+        page = StartPage.objects.create(user=user, title='Home', is_default=True)
+        section = Section.objects.create(page=page, name='Full soon', order=ORDER_GAP)
+        start = threading.Barrier(MAX_LINKS + 5)
+        results = []
+
+        def add(index):
+            start.wait()
+            try:
+                for _ in range(100):
+                    try:
+                        results.append(OrderService.append_link(user, section.id, f'Link {index}', 'https://example.com'))
+                        return
+                    except OperationalError:
+                        # SQLite answers a competing writer with "database is locked" instead of waiting for the row lock
+                        time.sleep(0.01)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=add, args=(index,)) for index in range(MAX_LINKS + 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(1 for link in results if link is not None), MAX_LINKS)
+        self.assertEqual(results.count(None), 5)
+        section.refresh_from_db()
+        self.assertEqual((section.link_count, section.links.count()), (MAX_LINKS, MAX_LINKS))
+        self.assertEqual(len(set(section.links.values_list('order', flat=True))), MAX_LINKS)
+
+
+class CheckLinksTests(EditorTestCase):
+    def test_statuses_are_stored(self):
+        site = StubHTTPServer()
+        self.addCleanup(site.stop)
+        site.statuses = {'/missing': 404, ('HEAD', '/no-head'): 405}
+        with socket.socket() as closed:
+            closed.bind(('127.0.0.1', 0))
+            unreachable = f'http://127.0.0.1:{closed.getsockname()[1]}/'
+
+        Link.objects.filter(id=self.l1.id).update(url=site.url + '/ok')
+        Link.objects.filter(id=self.l2.id).update(url=site.url + '/missing')
+        Link.objects.create(section=self.s2, name='Same URL', url=site.url + '/ok', order=ORDER_GAP)
+        Link.objects.create(section=self.s2, name='GET only', url=site.url + '/no-head', order=2 * ORDER_GAP)
+        Link.objects.create(section=self.s2, name='Down', url=unreachable, order=3 * ORDER_GAP)
+
+        call_command('check_links', stale_hours=0, timeout=5, stdout=StringIO())
+
+        statuses = dict(Link.objects.values_list('name', 'check_status'))
+        self.assertEqual(statuses, {'A': 200, 'B': 404, 'Same URL': 200, 'GET only': 200, 'Down': 0})
+        self.assertTrue(Link.objects.get(name='Down').is_broken)
+        # One request per distinct URL, HEAD first and GET only where HEAD was refused
+        self.assertEqual(sorted(site.requests), sorted([
+            ('HEAD', '/ok'), ('HEAD', '/missing'), ('GET', '/missing'), ('HEAD', '/no-head'), ('GET', '/no-head'),
+        ]))
+
+    def test_chunks_check_each_url_once(self):
+        site = StubHTTPServer()
+        self.addCleanup(site.stop)
+        Link.objects.update(url=site.url + '/shared')
+        for i in range(5):
+            Link.objects.create(section=self.s2, name=f'Own {i}', url=f'{site.url}/own{i}', order=i * ORDER_GAP)
+
+        with mock.patch('startpages.management.commands.check_links.CHUNK_SIZE', 2), \
+                mock.patch('startpages.management.commands.check_links.UPDATE_BATCH_SIZE', 2):
+            call_command('check_links', stale_hours=0, timeout=5, concurrency=2, stdout=StringIO())
+
+        self.assertEqual(set(Link.objects.values_list('check_status', flat=True)), {200})
+        self.assertEqual(sorted(site.requests), sorted([('HEAD', '/shared')] + [('HEAD', f'/own{i}') for i in range(5)]))
@@ -18,6 +18,8 @@ urlpatterns = [
     path('profile/page/<int:page_id>/edit/', views.edit_startpage, name='edit_startpage'),
     path('profile/page/<int:page_id>/delete/', views.delete_startpage, name='delete_startpage'),
     path('profile/page/<int:page_id>/export/', views.export_startpage, name='export_startpage'),
+    path('profile/page/<int:page_id>/share/', views.share_startpage, name='share_startpage'),
+    path('profile/page/<int:page_id>/duplicate/', views.duplicate_startpage, name='duplicate_startpage'),
     path('profile/set-default/<int:page_id>/', views.set_default_page, name='set_default_page'),
     path('profile/update-info/', views.update_personal_info, name='update_personal_info'),
     path('profile/connections/', views.manage_social_connections, name='manage_social'),
@@ -26,14 +28,21 @@ urlpatterns = [
     # API Endpoints
     path('api/update-section-order/', api.update_section_order, name='update_section_order'),
     path('api/update-link-order/', api.update_link_order, name='update_link_order'),
-    path('api/get-item-details/', api.get_item_details, name='get_item_details'),
+    path('api/move-item/', api.move_item, name='move_item'),
     path('api/save-item-details/', api.save_item_details, name='save_item_details'),
     path('api/add-link/', api.add_link, name='add_link'),
     path('api/add-section/', api.add_section, name='add_section'),
     path('api/delete-item/', api.delete_item, name='delete_item'),
+    path('api/batch/', api.batch, name='batch'),
     path('api/update-theme/', api.update_theme, name='update_theme'),
     path('api/get-theme/', api.get_current_theme, name='get_current_theme'),
+    path('api/pages/', api.list_pages, name='list_pages'),
+    path('api/events/', api.events, name='events'),
+    path('api/changes/', api.get_changes, name='get_changes'),
     
+    # Public share links (cacheable, no session)
+    path('s/<str:token>/', views.shared_startpage, name='shared_startpage'),
+
     # User specific page
     path('<str:username>/', views.startpage, name='startpage'),
     path('<str:username>/<slug:slug>/', views.startpage, name='startpage')
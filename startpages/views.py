@@ -1,19 +1,27 @@
+import hashlib
 import json
 from django.shortcuts import render, redirect, get_object_or_404, reverse
 from django.contrib import messages
+from django.contrib.messages import get_messages
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from .models import StartPage, Profile, ColorScheme
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from .models import StartPage, Profile, ColorScheme, ChangeLogEntry
 from .forms import UsernameChangeForm
-from .services import StartPageService
+from .services import StartPageService, SectionService, ChangeLogService
+from .rendering import cards_engine, render_cards, streaming_enabled, stream_startpage
+from .sharing import SHARE_CACHE_SECONDS, shared_page_etag, purge_share_tokens
 from django.core.exceptions import PermissionDenied
 from django.http import Http404
 from allauth.socialaccount.models import SocialAccount # pyright: ignore[reportMissingImports]
+from project.db_router import use_replica
 
 def index(request):
     return render(request, 'startpages/pages/index.html')
 
 @login_required
+@use_replica
 def startpage(request, username=None, slug=None): 
     page = None
     if username and request.user.username.lower() != username.lower():
@@ -31,12 +39,69 @@ def startpage(request, username=None, slug=None):
             
     if not page:
         raise Http404("No StartPage found for this user.")
+
+    # Conditional GET: an unchanged page answers 304 before any section or link is loaded.
+    # This keeps revalidating prefetched pages (page switcher) cheap. Not while messages are pending.
+    etag = None if get_messages(request) else _startpage_etag(request, page)
+    if etag:
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
     
-    sections = page.sections.prefetch_related('links').all()
-    context = {'page': page, 'sections': sections}
-    return render(request, 'startpages/pages/startpage.html', context)
+    # Optional fast path: the cards are rendered with Jinja2 macros (STARTPAGE_JINJA2)
+    engine = cards_engine()
+
+    if streaming_enabled():
+        # Head, search bar and preview row go out first, the sections grid follows in chunks (STARTPAGE_STREAMING)
+        response = StreamingHttpResponse(stream_startpage(request, page, engine), content_type='text/html; charset=utf-8')
+        # nginx would otherwise buffer the whole body and undo the early flush
+        response['X-Accel-Buffering'] = 'no'
+    else:
+        sections = page.sections.prefetch_related('links').all()
+        context = {'page': page, 'sections': sections}
+        if engine:
+            context['cards'] = render_cards(sections, engine)
+        response = render(request, 'startpages/pages/startpage.html', context)
+
+    if etag:
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def _startpage_etag(request, page):
+    """
+    Content revision of the page for this browser: the owner's latest change log entry,
+    plus what else ends up in the HTML (username and avatar in the header, the session's CSRF secret).
+    Renames and avatar changes write no change log entry, so they are hashed in here.
+    """
+    avatar = request.user.profile.avatar.name or ''
+    version = hashlib.sha256(f"{request.user.username}|{avatar}|{request.META.get('CSRF_COOKIE', '')}".encode()).hexdigest()[:12]
+    return f'"{page.id}-{ChangeLogService.latest_revision(request.user)}-{version}"'
+
+def shared_startpage(request, token):
+    """
+    Public, read-only view of a shared page. It never touches the session, so the
+    response is the same for everyone and nginx / a CDN can cache it.
+    """
+    page = get_object_or_404(StartPage.objects.only('id', 'user_id', 'title', 'is_default', 'share_token'), share_token=token)
+
+    # Cheap revalidation: answer 304 before loading any sections or links
+    etag = shared_page_etag(page)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        sections = page.sections.prefetch_related('links').all()
+        # Rendered without the request, so no user, CSRF token or messages end up in the cached HTML
+        response = HttpResponse(render_to_string('startpages/pages/shared_startpage.html', {'page': page, 'sections': sections}))
+        response['ETag'] = etag
+
+    # Browsers always revalidate, shared caches may serve it for SHARE_CACHE_SECONDS
+    patch_cache_control(response, public=True, max_age=0, s_maxage=SHARE_CACHE_SECONDS)
+    return response
 
 @login_required
+@use_replica
 def profile(request):
     startpages = StartPage.objects.filter(user=request.user).order_by('-is_default', 'title')
     google_accounts = request.user.socialaccount_set.filter(provider='google')
@@ -87,21 +152,52 @@ def create_startpage(request):
         if title:
             is_first = not StartPage.objects.filter(user=request.user).exists()
             new_page = StartPage.objects.create(user=request.user, title=title, is_default=is_first)
+            ChangeLogEntry.record(request.user, ChangeLogEntry.PAGE, new_page.id, ChangeLogEntry.CREATE)
             messages.success(request, f'Startpage "{title}" created!')
             return redirect('startpages:startpage', username=request.user.username, slug=new_page.slug)
         else:
             messages.error(request, 'Title is required.')
     return redirect(reverse('startpages:profile') + '?tab=startpages')
 
+def _default_page_ids(user, exclude):
+    """Ids of the user's current default page(s) that lose the flag when `exclude` becomes default."""
+    return list(StartPage.objects.filter(user=user, is_default=True).exclude(id=exclude.id).values_list('id', flat=True))
+
 @login_required
 def set_default_page(request, page_id):
     page = get_object_or_404(StartPage, id=page_id, user=request.user)
-    StartPage.objects.filter(user=request.user, is_default=True).update(is_default=False)
+    changed_ids = _default_page_ids(request.user, exclude=page) + [page.id]
     page.is_default = True
     page.save()
+    ChangeLogEntry.record(request.user, ChangeLogEntry.PAGE, changed_ids, ChangeLogEntry.UPDATE)
     messages.success(request, f'{page.title} is now your default startpage.')
     return redirect(reverse('startpages:profile') + '?tab=startpages')
 
+@login_required
+def share_startpage(request, page_id):
+    if request.method == 'POST':
+        page = get_object_or_404(StartPage, id=page_id, user=request.user)
+        old_token = page.share_token
+        if request.POST.get('action') == 'disable':
+            page.disable_sharing()
+            messages.success(request, f'"{page.title}" is no longer shared.')
+        else:
+            page.enable_sharing()
+            messages.success(request, f'Share link for "{page.title}" created.')
+        # The old link stops working, drop it from the caches too
+        if old_token:
+            purge_share_tokens([old_token])
+        ChangeLogEntry.record(request.user, ChangeLogEntry.PAGE, page.id, ChangeLogEntry.UPDATE)
+    return redirect(reverse('startpages:profile') + '?tab=startpages')
+
+@login_required
+def duplicate_startpage(request, page_id):
+    if request.method == 'POST':
+        page = get_object_or_404(StartPage, id=page_id, user=request.user)
+        copy = StartPageService.clone_page(page, request.user, title=f"{page.title} (copy)")
+        messages.success(request, f'Startpage "{copy.title}" created.')
+    return redirect(reverse('startpages:profile') + '?tab=startpages')
+
 @login_required
 def edit_startpage(request, page_id):
     if request.method == 'POST':
@@ -109,12 +205,14 @@ def edit_startpage(request, page_id):
         new_title = request.POST.get('title')
         is_default = request.POST.get('is_default') == 'on'
         
+        changed_ids = [page.id]
         if new_title:
             page.title = new_title
         if is_default:
-            StartPage.objects.filter(user=request.user, is_default=True).update(is_default=False)
+            changed_ids += _default_page_ids(request.user, exclude=page)
             page.is_default = True
         page.save()
+        ChangeLogEntry.record(request.user, ChangeLogEntry.PAGE, changed_ids, ChangeLogEntry.UPDATE)
         messages.success(request, 'Startpage updated.')
     return redirect(reverse('startpages:profile') + '?tab=startpages')
 
@@ -124,12 +222,14 @@ def delete_startpage(request, page_id):
         page = get_object_or_404(StartPage, id=page_id, user=request.user)
         was_default = page.is_default
         title = page.title
-        page.delete()
+        # Set-based: three DELETEs instead of loading every section and link (logs the page deletion too)
+        SectionService.delete_pages([page.id])
         if was_default:
             next_page = StartPage.objects.filter(user=request.user).first()
             if next_page:
                 next_page.is_default = True
                 next_page.save()
+                ChangeLogEntry.record(request.user, ChangeLogEntry.PAGE, next_page.id, ChangeLogEntry.UPDATE)
         messages.success(request, f'Startpage "{title}" deleted.')
     return redirect(reverse('startpages:profile') + '?tab=startpages')
 
@@ -4,12 +4,82 @@ function getCsrfToken() {
         ?.split('=')[1];
 }
 
+// Identifies this tab, so it can skip the live-sync echo of its own edits
+export const CLIENT_ID = (crypto.randomUUID ? crypto.randomUUID() : String(Math.random()).slice(2));
+
 const headers = () => ({
     'Content-Type': 'application/json',
-    'X-CSRFToken': getCsrfToken()
+    'X-CSRFToken': getCsrfToken(),
+    'X-Client-Id': CLIENT_ID
 });
 
+// Editor operations are queued for a moment and sent together to /api/batch/,
+// which applies them in order in one transaction. Each call still gets its own result:
+// the server skips and reports an op that fails and applies the others.
+const FLUSH_DELAY = 150;
+const MAX_BATCH = 100;
+let queue = [];
+let flushTimer = null;
+let sending = Promise.resolve();
+
+// Items added here are known by a ref (their placeholder's data-id) until the server assigns the id.
+// Ops of the same batch may use the ref directly, later batches get the id substituted.
+let refCounter = 0;
+const resolvedRefs = new Map();
+const ID_FIELDS = ['id', 'prev_id', 'next_id', 'section_id'];
+
+const newRef = () => `ref-${++refCounter}`;
+
+function withResolvedRefs(op) {
+    const resolved = { ...op };
+    ID_FIELDS.forEach(field => {
+        if (resolvedRefs.has(resolved[field])) resolved[field] = resolvedRefs.get(resolved[field]);
+    });
+    return resolved;
+}
+
+function send(pending) {
+    return fetch('/api/batch/', {
+        method: 'POST', headers: headers(), keepalive: true,
+        // Refs are substituted at send time, once the batches before this one have been answered
+        body: JSON.stringify({ ops: pending.map(p => withResolvedRefs(p.op)) })
+    })
+        // Error pages (500, 502 from the proxy) are not JSON
+        .then(res => res.json().catch(() => ({ status: 'error', message: `Server error (${res.status}).` })))
+        .then(data => pending.forEach((p, i) => {
+            const result = data.status === 'success'
+                ? data.results[i]
+                // The whole request was refused (invalid, rate limited), so every op in it reports the error
+                : { status: 'error', message: data.message || 'Request failed.' };
+            if (result.status === 'success' && p.op.ref) resolvedRefs.set(p.op.ref, result.id);
+            p.resolve(result);
+        }))
+        .catch(err => pending.forEach(p => p.reject(err)));
+}
+
+export function flushQueue() {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    while (queue.length) {
+        const pending = queue.splice(0, MAX_BATCH);
+        // One batch at a time, so the server sees the operations in the order they were made
+        sending = sending.then(() => send(pending));
+    }
+    return sending;
+}
+
+function enqueue(op) {
+    return new Promise((resolve, reject) => {
+        queue.push({ op, resolve, reject });
+        if (queue.length >= MAX_BATCH) flushQueue();
+        else if (!flushTimer) flushTimer = setTimeout(flushQueue, FLUSH_DELAY);
+    });
+}
+
+window.addEventListener('pagehide', flushQueue);
+
 export const API = {
+    newRef,
     updateSectionOrder: (ids) => {
         return fetch('/api/update-section-order/', {
             method: 'POST', headers: headers(), body: JSON.stringify({ ids })
@@ -20,29 +90,11 @@ export const API = {
             method: 'POST', headers: headers(), body: JSON.stringify({ section_id: sectionId, link_ids: linkIds })
         });
     },
-    getItem: (type, id) => {
-        return fetch(`/api/get-item-details/?type=${type}&id=${id}`).then(res => res.json());
-    },
-    saveItem: (data) => {
-        return fetch('/api/save-item-details/', {
-            method: 'POST', headers: headers(), body: JSON.stringify(data)
-        }).then(res => res.json());
-    },
-    addLink: (data) => {
-        return fetch('/api/add-link/', {
-            method: 'POST', headers: headers(), body: JSON.stringify(data)
-        }).then(res => res.json());
-    },
-    addSection: (name) => {
-        return fetch('/api/add-section/', {
-            method: 'POST', headers: headers(), body: JSON.stringify({ name })
-        }).then(res => res.json());
-    },
-    deleteItem: (type, id) => {
-        return fetch('/api/delete-item/', {
-            method: 'POST', headers: headers(), body: JSON.stringify({ type, id })
-        }).then(res => res.json());
-    },
+    moveItem: (data) => enqueue({ op: 'move_item', ...data }),
+    saveItem: (data) => enqueue({ op: 'save_item', ...data }),
+    addLink: (data, ref) => enqueue({ op: 'add_link', ref, ...data }),
+    addSection: (name, ref) => enqueue({ op: 'add_section', ref, name }),
+    deleteItem: (type, id) => enqueue({ op: 'delete_item', type, id }),
     updateTheme: (themeId) => {
         return fetch('/api/update-theme/', {
             method: 'POST', headers: headers(), body: JSON.stringify({ theme_id: themeId })
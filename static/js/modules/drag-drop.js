@@ -4,6 +4,18 @@ import { UI } from './ui.js';
 let sectionSortable = null;
 let linkSortables = [];
 
+// Ids of the closest siblings matching the selector, so the server only has to move one row
+function neighbourIds(el, selector) {
+    let prev = el.previousElementSibling;
+    while (prev && !prev.matches(selector)) prev = prev.previousElementSibling;
+    let next = el.nextElementSibling;
+    while (next && !next.matches(selector)) next = next.nextElementSibling;
+    return {
+        prev_id: prev ? prev.getAttribute('data-id') : null,
+        next_id: next ? next.getAttribute('data-id') : null
+    };
+}
+
 export const DragDrop = {
     init: (isEditMode) => {
         const gridContainer = document.getElementById('grid-container');
@@ -29,9 +41,12 @@ export const DragDrop = {
                 onEnd: function (evt) { 
                     document.body.classList.remove('dragging-active');
                     document.body.style.overflow = '';
-                    const sections = gridContainer.querySelectorAll('.draggable-section');
-                    const ids = Array.from(sections).map(sec => sec.getAttribute('data-id'));
-                    API.updateSectionOrder(ids);
+                    if (evt.oldIndex === evt.newIndex) return;
+                    API.moveItem({
+                        type: 'section',
+                        id: evt.item.getAttribute('data-id'),
+                        ...neighbourIds(evt.item, '.draggable-section')
+                    });
                 }
             });
         }
@@ -61,9 +76,13 @@ export const DragDrop = {
                 UI.checkLinkLimit(evt.from);
                 if (evt.from !== evt.to) UI.checkLinkLimit(evt.to);
                 
-                const links = evt.to.querySelectorAll('.draggable-link');
-                const ids = Array.from(links).map(link => link.getAttribute('data-id'));
-                API.updateLinkOrder(evt.to.getAttribute('data-section-id'), ids);
+                if (evt.from === evt.to && evt.oldIndex === evt.newIndex) return;
+                API.moveItem({
+                    type: 'link',
+                    id: evt.item.getAttribute('data-id'),
+                    section_id: evt.to.getAttribute('data-section-id'),
+                    ...neighbourIds(evt.item, '.draggable-link')
+                });
             }
         });
         linkSortables.push(sortable);
@@ -0,0 +1,93 @@
+import { CLIENT_ID } from './api.js';
+import { UI } from './ui.js';
+
+let source = null;
+
+function sectionEl(id) { return document.querySelector(`.draggable-section[data-id="${id}"]`); }
+function linkEl(id) { return document.querySelector(`.draggable-link[data-id="${id}"]`); }
+function linkContainer(sectionId) { return document.querySelector(`.section-links[data-section-id="${sectionId}"]`); }
+
+function placeBetween(el, container, prevEl, nextEl, fallbackBefore) {
+    if (prevEl && prevEl.parentNode === container) prevEl.after(el);
+    else if (nextEl && nextEl.parentNode === container) container.insertBefore(el, nextEl);
+    else if (fallbackBefore) container.insertBefore(el, fallbackBefore);
+    else container.appendChild(el);
+}
+
+function applyTheme(theme) {
+    document.documentElement.classList.toggle('dark', !!theme.is_dark);
+    let style = document.getElementById('dynamic-theme-styles');
+    if (!style) {
+        style = document.createElement('style');
+        style.id = 'dynamic-theme-styles';
+        document.head.appendChild(style);
+    }
+    style.textContent = ':root {' + Object.entries(theme.colors || {}).map(([k, v]) => `${k}: ${v};`).join('') + '}';
+    const value = encodeURIComponent(JSON.stringify(theme));
+    document.cookie = `theme_data=${value}; expires=${new Date(Date.now() + 365 * 864e5).toUTCString()}; path=/`;
+}
+
+const handlers = {
+    section_added: (data, hooks) => {
+        const grid = document.getElementById('grid-container');
+        if (!grid || grid.getAttribute('data-page-id') !== String(data.page_id) || sectionEl(data.section.id)) return;
+        const container = UI.appendNewSection(data.section);
+        if (hooks.onSectionAdded) hooks.onSectionAdded(container);
+    },
+    link_added: (data) => {
+        if (!linkContainer(data.section_id) || linkEl(data.link.id)) return;
+        UI.appendNewLink(data.section_id, data.link);
+    },
+    item_updated: (data) => UI.updateUiItem(data),
+    item_deleted: (data) => UI.removeItemFromDom(data.type, data.id),
+    item_moved: (data) => {
+        if (data.type === 'section') {
+            const el = sectionEl(data.id);
+            const grid = document.getElementById('grid-container');
+            if (!el || !grid) return;
+            placeBetween(el, grid, sectionEl(data.prev_id), sectionEl(data.next_id), grid.querySelector('.add-section-btn'));
+        } else {
+            const el = linkEl(data.id);
+            const target = linkContainer(data.section_id);
+            if (!el || !target) return;
+            const from = el.closest('.section-links');
+            placeBetween(el, target, linkEl(data.prev_id), linkEl(data.next_id));
+            UI.checkLinkLimit(from);
+            if (from !== target) UI.checkLinkLimit(target);
+        }
+    },
+    sections_reordered: (data) => {
+        const grid = document.getElementById('grid-container');
+        if (!grid) return;
+        const addBtn = grid.querySelector('.add-section-btn');
+        data.ids.forEach(id => { const el = sectionEl(id); if (el) placeBetween(el, grid, null, null, addBtn); });
+    },
+    links_reordered: (data) => {
+        const target = linkContainer(data.section_id);
+        if (!target) return;
+        const touched = new Set([target]);
+        data.ids.forEach(id => {
+            const el = linkEl(id);
+            if (!el) return;
+            touched.add(el.closest('.section-links'));
+            target.appendChild(el);
+        });
+        touched.forEach(container => UI.checkLinkLimit(container));
+    },
+    theme_changed: (data) => applyTheme(data)
+};
+
+export const LiveSync = {
+    // Patches the DOM with edits made in other tabs or on other devices
+    init: (hooks = {}) => {
+        if (!window.EventSource || source) return;
+        source = new EventSource('/api/events/');
+        source.onmessage = (e) => {
+            let event;
+            try { event = JSON.parse(e.data); } catch (err) { return; }
+            if (event.origin === CLIENT_ID) return;
+            const handler = handlers[event.type];
+            if (handler) handler(event.data, hooks);
+        };
+    }
+};
@@ -0,0 +1,46 @@
+// Links to the user's other startpages. The pages are prefetched when the pointer
+// heads for a link, so switching paints instantly while unopened pages cost nothing.
+
+function addPrefetchHints(nav, urls) {
+    if (HTMLScriptElement.supports && HTMLScriptElement.supports('speculationrules')) {
+        const rules = document.createElement('script');
+        rules.type = 'speculationrules';
+        // "moderate": fetched on hover or pointer down, not on page load
+        rules.textContent = JSON.stringify({ prefetch: [{ source: 'list', urls, eagerness: 'moderate' }] });
+        document.head.appendChild(rules);
+        return;
+    }
+    // Fallback: a prefetch hint the first time the pointer enters a link
+    nav.querySelectorAll('a').forEach(a => a.addEventListener('pointerenter', () => {
+        const hint = document.createElement('link');
+        hint.rel = 'prefetch';
+        hint.href = a.href;
+        document.head.appendChild(hint);
+    }, { once: true }));
+}
+
+export const PageSwitcher = {
+    init: () => {
+        const nav = document.getElementById('page-switcher');
+        if (!nav) return;
+        const currentId = nav.getAttribute('data-current');
+
+        // Revalidated with its ETag, so an unchanged list is a 304
+        fetch('/api/pages/')
+            .then(res => res.json())
+            .then(data => {
+                const others = data.pages.filter(page => String(page.id) !== currentId);
+                if (!others.length) return;
+                others.forEach(page => {
+                    const a = document.createElement('a');
+                    a.href = page.url;
+                    a.textContent = page.title;
+                    a.className = 'px-3 py-1.5 rounded-full bg-white/60 dark:bg-black/30 backdrop-blur-sm text-sm font-semibold text-secondary-700 dark:text-secondary-200 hover:text-primary-600 dark:hover:text-primary-300 shadow-sm border border-primary-100 dark:border-primary-900/50 transition-colors';
+                    nav.appendChild(a);
+                });
+                nav.classList.remove('hidden');
+                addPrefetchHints(nav, others.map(page => page.url));
+            })
+            .catch(() => {});
+    }
+};
@@ -95,6 +95,7 @@ export const UI = {
         const div = document.createElement('div');
         div.className = "draggable-link relative rounded-md group/link transition-colors duration-200 border border-transparent";
         div.setAttribute('data-id', linkData.id);
+        UI.setItemData(div, linkData);
         
         div.innerHTML = `
             <a href="${linkData.url}" target="_blank"
@@ -112,6 +113,7 @@ export const UI = {
         `;
         container.appendChild(div);
         UI.checkLinkLimit(container);
+        return div;
     },
 
     appendNewSection: (sectionData) => {
@@ -120,6 +122,7 @@ export const UI = {
         const section = document.createElement('section');
         section.className = "draggable-section bg-white dark:bg-secondary-800 container px-5 pt-4 pb-1 flex flex-col gap-3 rounded-xl text-secondary-900 dark:text-secondary-200 w-full relative group select-none h-[30rem] border-t-4 border-primary-500 dark:border-primary-400 shadow-xl shadow-primary-100/50 dark:shadow-none transition-shadow duration-300 hover:shadow-2xl hover:shadow-primary-200/50 dark:hover:shadow-black/30";
         section.setAttribute('data-id', sectionData.id);
+        UI.setItemData(section, sectionData);
 
         section.innerHTML = `
         <div class="flex justify-between items-center section-header pb-2 border-b border-secondary-100 dark:border-secondary-700 cursor-grab active:cursor-grabbing">
@@ -149,27 +152,55 @@ export const UI = {
         return section.querySelector('.section-links');
     },
 
-    removeItemFromDom: (type, id) => {
-        if (type === 'section') {
-            const el = document.querySelector(`.draggable-section[data-id="${id}"]`);
-            if (el) { el.remove(); UI.checkSectionEmptyState(); }
-        } else if (type === 'link') {
-            const el = document.querySelector(`.draggable-link[data-id="${id}"]`);
-            if (el) {
-                const container = el.closest('.section-links');
-                el.remove();
-                if (container) UI.checkLinkLimit(container);
-            }
+    // Item details live in data attributes on the cards (see _link.html / _section.html),
+    // so the edit modal can open without asking the server
+    getItemEl: (type, id) => document.querySelector(`.draggable-${type}[data-id="${id}"]`),
+
+    getItemData: (type, id) => {
+        const el = UI.getItemEl(type, id);
+        if (!el) return null;
+        const data = { type, id, name: el.dataset.name || '' };
+        if (type === 'link') {
+            data.url = el.dataset.url || '';
+            data.color = el.dataset.color || '';
+        }
+        return data;
+    },
+
+    setItemData: (el, data) => {
+        el.dataset.name = data.name;
+        if (el.classList.contains('draggable-link')) {
+            el.dataset.url = data.url;
+            el.dataset.color = data.color || '';
         }
     },
 
+    // Returns a function that puts the element back where it was (rollback of optimistic deletes)
+    removeItemFromDom: (type, id) => {
+        const el = UI.getItemEl(type, id);
+        if (!el) return () => {};
+        const parent = el.parentNode;
+        const next = el.nextSibling;
+        const refresh = () => {
+            if (type === 'section') UI.checkSectionEmptyState();
+            else UI.checkLinkLimit(parent);
+        };
+        el.remove();
+        refresh();
+        return () => { parent.insertBefore(el, next); refresh(); };
+    },
+
     updateUiItem: (data) => {
         if (data.type === 'section') {
-            const section = document.querySelector(`.draggable-section[data-id="${data.id}"]`);
-            if (section) section.querySelector('h2').innerText = data.name;
+            const section = UI.getItemEl('section', data.id);
+            if (section) {
+                section.querySelector('h2').innerText = data.name;
+                UI.setItemData(section, data);
+            }
         } else if (data.type === 'link') {
-            const linkWrapper = document.querySelector(`.draggable-link[data-id="${data.id}"]`);
+            const linkWrapper = UI.getItemEl('link', data.id);
             if (linkWrapper) {
+                UI.setItemData(linkWrapper, data);
                 const anchor = linkWrapper.querySelector('a');
                 if (anchor) {
                     anchor.querySelector('.truncate').innerText = data.name;
@@ -155,6 +155,19 @@ window.openPageEditModal = (button) => {
     document.getElementById('page-edit-form').action = `/profile/page/${id}/edit/`;
     document.getElementById('page-delete-form').action = `/profile/page/${id}/delete/`;
     document.getElementById('edit-page-export-btn').href = `/profile/page/${id}/export/`;
+    document.getElementById('page-share-form').action = `/profile/page/${id}/share/`;
+    document.getElementById('page-duplicate-form').action = `/profile/page/${id}/duplicate/`;
+
+    // Share link: show it with "Stop Sharing", or only offer to create one
+    const shareUrl = button.getAttribute('data-share-url');
+    const shareInput = document.getElementById('edit-page-share-url');
+    const enableBtn = document.getElementById('btn-share-enable');
+    shareInput.value = shareUrl || '';
+    shareInput.classList.toggle('hidden', !shareUrl);
+    document.getElementById('btn-share-disable').classList.toggle('hidden', !shareUrl);
+    enableBtn.innerText = shareUrl ? 'New Link' : 'Create Share Link';
+    enableBtn.classList.toggle('col-span-2', !shareUrl);
+    enableBtn.classList.toggle('col-span-1', !!shareUrl);
     
     // Reset delete button state
     const textSpan = document.getElementById('btn-delete-page-text');
@@ -1,6 +1,8 @@
 import { API } from './modules/api.js';
 import { UI } from './modules/ui.js';
 import { DragDrop } from './modules/drag-drop.js';
+import { LiveSync } from './modules/live-sync.js';
+import { PageSwitcher } from './modules/page-switcher.js';
 
 document.addEventListener('DOMContentLoaded', () => {
     document.querySelectorAll('.section-links').forEach(container => UI.checkLinkLimit(container));
@@ -8,6 +10,8 @@ document.addEventListener('DOMContentLoaded', () => {
     DragDrop.init(isEditMode);
     initInteractionListeners();
     initModalLogic();
+    LiveSync.init({ onSectionAdded: (container) => DragDrop.initSingleLinkSortable(container, isEditMode) });
+    PageSwitcher.init();
 });
 
 let isEditMode = false;
@@ -70,6 +74,21 @@ function toggleEditMode(enable) {
 }
 
 // --- Modals ---
+// Optimistic updates: the DOM is changed before the request, `rollback` undoes that change
+// if the server refuses it or cannot be reached. Resolves to the response, or undefined after a rollback.
+function optimistic(request, rollback, successMessage) {
+    return request
+        .then(res => {
+            if (res.status !== 'success') throw new Error(res.message || 'Request failed.');
+            showToast(successMessage);
+            return res;
+        })
+        .catch(err => {
+            rollback();
+            showToast(`Not saved: ${err.message}`, 'error');
+        });
+}
+
 function initModalLogic() {
     const form = document.getElementById('edit-form');
     if(form) {
@@ -79,14 +98,27 @@ function initModalLogic() {
             const formEl = document.getElementById('edit-form');
             const formData = Object.fromEntries(new FormData(formEl).entries());
 
+            closeEditModal();
+
             if (type === 'new_link') {
-                API.addLink({section_id: formData.id, name: formData.name, url: formData.url, color: formData.color})
-                   .then(res => { if(res.status ==='success') { closeEditModal(); UI.appendNewLink(formData.id, res.link); showToast('Link added'); }});
+                // Placeholder until the server assigns the id, then swapped for the real card
+                const ref = API.newRef();
+                const pending = UI.appendNewLink(formData.id, {id: ref, name: formData.name, url: formData.url, color: formData.color});
+                const dropPending = () => { if (pending) { const container = pending.parentNode; pending.remove(); UI.checkLinkLimit(container); } };
+                pending?.classList.add('opacity-50', 'pointer-events-none');
+                optimistic(API.addLink({section_id: formData.id, name: formData.name, url: formData.url, color: formData.color}, ref), dropPending, 'Link added')
+                    .then(res => { if (res) { dropPending(); UI.appendNewLink(formData.id, res.link); }});
             } else if (type === 'new_section') {
-                API.addSection(formData.name)
-                   .then(res => { if(res.status ==='success') { closeEditModal(); const newCont = UI.appendNewSection(res.section); DragDrop.initSingleLinkSortable(newCont, true); showToast('Section created'); }});
+                const ref = API.newRef();
+                const pending = UI.appendNewSection({id: ref, name: formData.name}).closest('section');
+                const dropPending = () => { pending.remove(); UI.checkSectionEmptyState(); };
+                pending.classList.add('opacity-50', 'pointer-events-none');
+                optimistic(API.addSection(formData.name, ref), dropPending, 'Section created')
+                    .then(res => { if (res) { dropPending(); const newCont = UI.appendNewSection(res.section); DragDrop.initSingleLinkSortable(newCont, true); }});
             } else {
-                API.saveItem(formData).then(res => { if(res.status ==='success') { closeEditModal(); UI.updateUiItem(formData); showToast('Saved'); }});
+                const previous = UI.getItemData(type, formData.id);
+                UI.updateUiItem(formData);
+                optimistic(API.saveItem(formData), () => previous && UI.updateUiItem(previous), 'Saved');
             }
         });
     }
@@ -131,15 +163,11 @@ function initModalLogic() {
             const isAborted = e.type === 'mouseleave' || e.type === 'touchcancel';
 
             if (isReadyToDelete && !isAborted) {
-                API.deleteItem(document.getElementById('edit-type').value, document.getElementById('edit-id').value)
-                   .then(res => { 
-                       if(res.status==='success'){ 
-                           closeEditModal(); 
-                           UI.removeItemFromDom(document.getElementById('edit-type').value, document.getElementById('edit-id').value); 
-                           showToast('Deleted'); 
-                       }
-                   });
-                textSpan.innerText = "Deleting...";
+                const type = document.getElementById('edit-type').value;
+                const id = document.getElementById('edit-id').value;
+                closeEditModal();
+                const restore = UI.removeItemFromDom(type, id);
+                optimistic(API.deleteItem(type, id), restore, 'Deleted');
             } else {
                 // Reset if aborted or released too early
                 textSpan.innerText = "Delete";
@@ -177,20 +205,21 @@ window.openEditModal = (type, id) => {
     if(textSpan) textSpan.innerText = "Delete";
     if(fillBar) { fillBar.style.width = '0%'; fillBar.style.transition = 'none'; }
 
-    API.getItem(type, id).then(data => {
-        document.getElementById('edit-name').value = data.name;
-        if (type === 'link') {
-            document.getElementById('url-field-group').style.display = 'block';
-            document.getElementById('color-field-group').style.visibility = 'visible';
-            document.getElementById('edit-url').value = data.url;
-            document.getElementById('edit-color').value = data.color || '';
-            UI.sanitizeColorInput(document.getElementById('edit-color'));
-        } else {
-            document.getElementById('url-field-group').style.display = 'none';
-            document.getElementById('color-field-group').style.visibility = 'hidden';
-        }
-        modal.classList.remove('hidden');
-    });
+    // Filled from the card's data attributes, no request needed
+    const data = UI.getItemData(type, id);
+    if (!data) return;
+    document.getElementById('edit-name').value = data.name;
+    if (type === 'link') {
+        document.getElementById('url-field-group').style.display = 'block';
+        document.getElementById('color-field-group').style.visibility = 'visible';
+        document.getElementById('edit-url').value = data.url;
+        document.getElementById('edit-color').value = data.color;
+        UI.sanitizeColorInput(document.getElementById('edit-color'));
+    } else {
+        document.getElementById('url-field-group').style.display = 'none';
+        document.getElementById('color-field-group').style.visibility = 'hidden';
+    }
+    modal.classList.remove('hidden');
 };
 
 window.openAddLinkModal = (sectionId) => {